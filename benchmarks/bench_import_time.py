@@ -0,0 +1,119 @@
+"""
+Import-time benchmark for the fetcher's cold start.
+
+Imports each entry point in a fresh interpreter with `python -X importtime`
+and reports the median cumulative import time over several runs together
+with the slowest imported packages. Modules that must stay off the start-up
+path (matplotlib) are checked as well. With `--max-ms`, the script exits
+non-zero when an entry point exceeds the budget or imports a forbidden
+module, so it can guard the scheduled job's start-up cost.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 5] [--top 10] [--max-ms 600] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# (entry point, directory it is run from)
+ENTRY_POINTS = [
+    ('spr_fetcher_v1', os.path.join(ROOT, 'scripts')),
+    ('telegram_bot', os.path.join(ROOT, 'notifications')),
+]
+
+FORBIDDEN_MODULES = ['matplotlib']
+
+
+def import_profile(module: str, cwd: str) -> List[Tuple[str, int, int]]:
+    """
+    Import a module in a fresh interpreter and parse the -X importtime report.
+
+    Args:
+        module: Module to import
+        cwd: Directory to run from (the module's directory)
+
+    Returns:
+        List of (module name, self microseconds, cumulative microseconds)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, capture_output=True, text=True, check=True
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str, cwd: str, runs: int, top: int) -> Dict[str, Any]:
+    """Profile an entry point over several runs and summarise the results."""
+    totals = []
+    profile = []
+    for _ in range(runs):
+        profile = import_profile(module, cwd)
+        totals.append(next(cumulative for name, _, cumulative in profile if name == module))
+
+    # Top-level packages (the least indented entries) by cumulative time, from the last run
+    packages = {}
+    for name, _, cumulative in profile:
+        if '.' not in name and name != module:
+            packages[name] = max(packages.get(name, 0), cumulative)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    imported = {name.split('.')[0] for name, _, _ in profile}
+    return {
+        'module': module,
+        'median_ms': statistics.median(totals) / 1000,
+        'min_ms': min(totals) / 1000,
+        'runs': runs,
+        'slowest_packages_ms': {name: us / 1000 for name, us in slowest},
+        'forbidden_imported': sorted(imported & set(FORBIDDEN_MODULES)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark entry point import times")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="Number of slowest packages to list")
+    parser.add_argument('--max-ms', type=float, help="Fail if an entry point's median import time exceeds this")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+    for module, cwd in ENTRY_POINTS:
+        stats = measure(module, cwd, args.runs, args.top)
+        results.append(stats)
+
+        print(f"{module}: median {stats['median_ms']:.0f} ms, min {stats['min_ms']:.0f} ms over {args.runs} runs")
+        for name, ms in stats['slowest_packages_ms'].items():
+            print(f"  {name:<24} {ms:>8.1f} ms")
+
+        if stats['forbidden_imported']:
+            print(f"  FAIL: imports {', '.join(stats['forbidden_imported'])} at start-up")
+            failed = True
+        if args.max_ms is not None and stats['median_ms'] > args.max_ms:
+            print(f"  FAIL: exceeds the {args.max_ms:.0f} ms budget")
+            failed = True
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
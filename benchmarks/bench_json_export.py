@@ -0,0 +1,127 @@
+"""
+Benchmark for building and serialising the pool_data.json export.
+
+Compares the previous `_save_to_json` path (a `merged_df.loc[date, col]`
+lookup and `pd.isna` check per cell, serialised with `json.dump`) with the
+current one (records built from the frame's float matrix in one pass and
+serialised with `publish.encode_json`, which uses orjson when installed).
+Build and encode times are reported separately.
+
+Usage:
+    python benchmarks/bench_json_export.py [--dates 365] [--pools 100 500] [--repeat 3] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import publish  # noqa: E402
+from spr_fetcher_v1 import _build_pool_data_records  # noqa: E402
+
+
+def legacy_build_pool_data_records(merged_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Previous implementation: one label lookup and isna check per cell."""
+    pool_data_for_json = {}
+
+    for date in merged_df.index:
+        date_str = str(date)
+        pool_data_for_json[date_str] = {}
+
+        for col in merged_df.columns:
+            value = merged_df.loc[date, col]
+            if pd.isna(value):
+                pool_data_for_json[date_str][col] = None
+            else:
+                pool_data_for_json[date_str][col] = float(value)
+
+    return pool_data_for_json
+
+
+def legacy_encode(payload: Any) -> bytes:
+    """Previous serialisation: json with two-space indentation."""
+    return json.dumps(payload, indent=2, default=str).encode('utf-8')
+
+
+def make_merged_frame(n_dates: int, n_pools: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a merged frame shaped like the fetcher's output.
+
+    About a third of the pools start part way through the window, leaving
+    leading NaNs, as newly listed pools do.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=n_dates, freq='D').date
+
+    columns = {}
+    for i in range(n_pools):
+        start = int(rng.integers(0, n_dates // 2)) if rng.random() < 0.3 else 0
+        apy = rng.random(n_dates) * 10
+        tvl = rng.integers(1_000_000, 5_000_000_000, n_dates).astype(float)
+        apy[:start] = np.nan
+        tvl[:start] = np.nan
+        columns[f'apy_pool-{i:05d}'] = apy
+        columns[f'tvlUsd_pool-{i:05d}'] = tvl
+
+    merged_df = pd.DataFrame(columns, index=pd.Index(dates, name='date'))
+    merged_df['weighted_apy'] = rng.random(n_dates) * 10
+    merged_df['ma_apy_14d'] = merged_df['weighted_apy'].rolling(14, min_periods=1).mean()
+    return merged_df
+
+
+def best_of(func: Callable, *args, repeat: int = 3) -> Tuple[float, Any]:
+    """Return the fastest wall time over `repeat` calls and the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the pool_data.json export")
+    parser.add_argument('--dates', type=int, default=365)
+    parser.add_argument('--pools', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    encoder = 'orjson' if publish.orjson is not None else 'json'
+    results: List[Dict[str, Any]] = []
+    print(f"{'pools':>6} {'impl':>10} {'build s':>9} {'encode s':>9} {'total s':>9} {'MB':>7}")
+    for n_pools in args.pools:
+        merged_df = make_merged_frame(args.dates, n_pools)
+
+        build_legacy, records_legacy = best_of(legacy_build_pool_data_records, merged_df, repeat=args.repeat)
+        encode_legacy, data_legacy = best_of(legacy_encode, records_legacy, repeat=args.repeat)
+
+        build_new, records_new = best_of(_build_pool_data_records, merged_df, repeat=args.repeat)
+        encode_new, data_new = best_of(publish.encode_json, records_new, 2, repeat=args.repeat)
+
+        assert json.loads(data_legacy) == json.loads(data_new)
+
+        for name, build, encode, data in (('legacy', build_legacy, encode_legacy, data_legacy),
+                                          (f'vec+{encoder}', build_new, encode_new, data_new)):
+            print(f"{n_pools:>6} {name:>10} {build:>9.3f} {encode:>9.3f} {build + encode:>9.3f} "
+                  f"{len(data) / 1024 / 1024:>7.1f}")
+            results.append({
+                'dates': args.dates, 'pools': n_pools, 'impl': name,
+                'build_seconds': build, 'encode_seconds': encode, 'bytes': len(data)
+            })
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
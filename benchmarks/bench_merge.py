@@ -0,0 +1,149 @@
+"""
+Benchmark for merging per-pool histories into the wide pool DataFrame.
+
+Compares the previous implementation of `_merge_pool_dataframes` (one
+`pd.merge` per pool) with the batched concat/pivot and with the streamed
+`PoolMatrix` fold the fetcher now uses, on synthetic pool histories,
+reporting wall time and peak traced memory. Expect the legacy run at 2,000
+pools to take several minutes.
+
+Usage:
+    python benchmarks/bench_merge.py [--pools 100 500 2000] [--days 360] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from spr_fetcher_v1 import _merge_pool_dataframes  # noqa: E402
+from pool_matrix import PoolMatrix  # noqa: E402
+
+
+def legacy_merge_pool_dataframes(pool_data: Dict[str, Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """Previous implementation: outer-merge pools one at a time."""
+    merged_df = None
+
+    for pool_id, pool_info in pool_data.items():
+        df = pool_info['data']
+
+        df = df.copy()
+        df.index = pd.to_datetime(df.index).date
+        df.index.name = 'date'
+
+        numeric_cols = ['apy', 'tvlUsd']
+        available_cols = [col for col in numeric_cols if col in df.columns]
+
+        if len(available_cols) == 2:
+            df_subset = df[available_cols].copy()
+
+            if len(df_subset) != len(df_subset.groupby(df_subset.index).size()):
+                df_subset = df_subset.groupby(df_subset.index).mean()
+
+            df_subset = df_subset.rename(columns={
+                'apy': f'apy_{pool_id}',
+                'tvlUsd': f'tvlUsd_{pool_id}'
+            })
+
+            if merged_df is None:
+                merged_df = df_subset
+            else:
+                merged_df = pd.merge(merged_df, df_subset, left_index=True, right_index=True, how='outer')
+
+    return merged_df
+
+
+def streamed_merge_pool_dataframes(pool_data: Dict[str, Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """Fold pools into a PoolMatrix one at a time, as the fetcher does while downloading."""
+    matrix = PoolMatrix()
+    for pool_id, pool_info in pool_data.items():
+        matrix.add(pool_id, pool_info['data'])
+    return matrix.build(pool_data)
+
+
+def make_pool_data(n_pools: int, days: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Build synthetic pool histories shaped like DeFiLlama chart responses.
+
+    Pools start at random offsets, a few have gaps and some report two
+    snapshots on the same day.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().normalize()
+    pool_data = {}
+
+    for i in range(n_pools):
+        start = int(rng.integers(0, days // 2)) if rng.random() < 0.3 else 0
+        index = end - pd.to_timedelta(np.arange(days - 1, start - 1, -1), unit='D') + pd.Timedelta(hours=23)
+        if rng.random() < 0.1:
+            index = index[rng.random(len(index)) > 0.05]
+        if rng.random() < 0.1:
+            index = index.append(index[-5:] - pd.Timedelta(hours=12)).sort_values()
+
+        pool_data[f'pool-{i:05d}'] = {
+            'data': pd.DataFrame({
+                'tvlUsd': rng.integers(1_000_000, 5_000_000_000, len(index)),
+                'apy': rng.random(len(index)) * 10,
+                'apyBase': rng.random(len(index)) * 10,
+            }, index=index),
+            'name': f'Pool_{i}',
+        }
+
+    return pool_data
+
+
+def measure(func, pool_data) -> Dict[str, Any]:
+    """
+    Run func twice: once for wall time, once under tracemalloc for peak memory.
+
+    The two passes are kept separate because tracing slows pandas down
+    considerably and would distort the timings.
+    """
+    start = time.perf_counter()
+    result = func(pool_data)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(pool_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'seconds': elapsed, 'peak_mb': peak / 1024 / 1024, 'shape': list(result.shape)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pool DataFrame merging")
+    parser.add_argument('--pools', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--days', type=int, default=360)
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'pools':>6} {'impl':>8} {'seconds':>9} {'peak MB':>9}")
+    for n_pools in args.pools:
+        pool_data = make_pool_data(n_pools, args.days)
+
+        legacy = measure(legacy_merge_pool_dataframes, pool_data)
+        batched = measure(_merge_pool_dataframes, pool_data)
+        streamed = measure(streamed_merge_pool_dataframes, pool_data)
+        assert legacy['shape'] == batched['shape'] == streamed['shape']
+
+        for name, stats in (('legacy', legacy), ('batched', batched), ('streamed', streamed)):
+            print(f"{n_pools:>6} {name:>8} {stats['seconds']:>9.3f} {stats['peak_mb']:>9.1f}")
+            results.append({'pools': n_pools, 'days': args.days, 'impl': name, **stats})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
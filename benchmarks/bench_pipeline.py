@@ -0,0 +1,458 @@
+"""
+End-to-end benchmark for the fetch, merge and save pipeline.
+
+Replays DeFiLlama `/pools` and `/chart` responses from disk through the
+fetcher's own HTTP session (a transport adapter serves the fixtures), so
+`fetch_and_process_pools`, `merge_and_save_pool_data` and
+`print_summary_statistics` run unchanged and fully offline. Recorded pools
+are cloned to scale up to thousands of pools, and their histories are cycled
+back in time to cover the requested number of days.
+
+As in the fetcher, each history is folded into a `PoolMatrix` as it
+arrives, so the fetch stage includes that work and the merge stage only
+assembles the matrix into a frame.
+
+Each stage (fetch, merge, clean, weighting, SQLite save, JSON save,
+summary) reports wall time, resident memory and the process's peak RSS. A
+second pass with tracemalloc enabled reports the peak and net memory the
+stage allocated; it runs separately so tracing does not distort timings.
+Every scale runs in a fresh interpreter, so peak RSS figures do not carry
+over between scales.
+
+Fixtures are read from `--fixtures DIR` (`pools.json` and `chart/<pool_id>`,
+as written by `--record DIR`). Without it they are rebuilt from the
+committed `data/pool_data.json` and `data/pool_metadata.json`.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--pools 100 1000 5000] [--days 1825] [--json out.json]
+    python benchmarks/bench_pipeline.py --compare before.json --json after.json [--max-regression 20]
+    python benchmarks/bench_pipeline.py --record benchmarks/fixtures [--record-pools 100]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+import config  # noqa: E402
+
+RESULT_FORMAT = 'pipeline-benchmark-v1'
+STAGES = ['fetch', 'merge', 'clean', 'weighting', 'sqlite_save', 'json_save', 'summary']
+
+
+def load_fixtures(fixtures_dir: Optional[str]) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Load the pools listing and chart rows to replay.
+
+    Only listed pools with a recorded chart are kept, so every pool the
+    fetcher selects can be served.
+
+    Args:
+        fixtures_dir: Directory with pools.json and chart/<pool_id>, or None
+            to rebuild fixtures from the committed data files
+
+    Returns:
+        Tuple of (listing entries, chart rows keyed by pool ID)
+    """
+    if fixtures_dir is None:
+        return _fixtures_from_data_files(os.path.join(ROOT, 'data'))
+
+    charts = {}
+    chart_dir = os.path.join(fixtures_dir, 'chart')
+    for name in os.listdir(chart_dir):
+        with open(os.path.join(chart_dir, name), 'rb') as f:
+            body = json.loads(f.read())
+        rows = body.get('data', []) if isinstance(body, dict) else body
+        if rows:
+            charts[os.path.splitext(name)[0]] = rows
+
+    with open(os.path.join(fixtures_dir, 'pools.json'), 'rb') as f:
+        listing = [pool for pool in json.loads(f.read())['data'] if pool.get('pool') in charts]
+    return listing, charts
+
+
+def _fixtures_from_data_files(data_dir: str) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """Rebuild listing entries and chart rows from pool_metadata.json and pool_data.json."""
+    with open(os.path.join(data_dir, 'pool_metadata.json'), 'r') as f:
+        metadata = json.load(f)['pool_metadata']
+    with open(os.path.join(data_dir, 'pool_data.json'), 'r') as f:
+        pool_data = json.load(f)['pool_data']
+
+    listing = []
+    charts = {}
+    dates = sorted(pool_data)
+    for pool in metadata:
+        pool_id = pool['pool_id']
+        rows = []
+        for date in dates:
+            apy = pool_data[date].get(f'apy_{pool_id}')
+            tvl = pool_data[date].get(f'tvlUsd_{pool_id}')
+            if apy is not None and tvl is not None:
+                rows.append({'timestamp': f'{date}T00:00:00.000Z', 'tvlUsd': tvl, 'apy': apy})
+        if not rows:
+            continue
+        charts[pool_id] = rows
+        listing.append({'pool': pool_id, 'chain': pool['chain'], 'project': pool['project'],
+                        'symbol': pool['symbol'], 'tvlUsd': pool['current_tvl'],
+                        'apy': pool['current_apy'], 'stablecoin': True})
+    return listing, charts
+
+
+def scale_fixtures(listing: List[Dict[str, Any]], charts: Dict[str, List[Dict[str, Any]]],
+                   n_pools: int, days: int, seed: int = 0) -> Tuple[bytes, Dict[str, bytes]]:
+    """
+    Build encoded /pools and /chart responses for `n_pools` pools and `days` days.
+
+    Recorded pools are cloned (with their own IDs and listing TVL/APY) until
+    there are `n_pools`; clones share their source pool's chart. Each chart
+    is re-dated to end today and cycled back in time to `days` rows.
+
+    Args:
+        listing: Recorded listing entries
+        charts: Recorded chart rows keyed by pool ID
+        n_pools: Number of pools to serve
+        days: Number of daily rows per chart
+        seed: Seed for the clones' listing values
+
+    Returns:
+        Tuple of (encoded /pools body, encoded /chart bodies keyed by pool ID)
+    """
+    rng = np.random.default_rng(seed)
+    today = datetime.now(timezone.utc).date()
+    timestamps = [(today - timedelta(days=days - 1 - i)).isoformat() + 'T00:00:00.000Z' for i in range(days)]
+
+    templates = {}
+    for pool_id, rows in charts.items():
+        cycled = [rows[(i - days) % len(rows)] for i in range(days)]
+        templates[pool_id] = json.dumps({'status': 'success', 'data': [
+            {'timestamp': timestamp, 'tvlUsd': row.get('tvlUsd'), 'apy': row.get('apy')}
+            for timestamp, row in zip(timestamps, cycled)
+        ]}).encode('utf-8')
+
+    pools = []
+    bodies = {}
+    for i in range(n_pools):
+        source = listing[i % len(listing)]
+        pool = dict(source)
+        if i >= len(listing):
+            pool['pool'] = f"{source['pool']}-x{i // len(listing)}"
+            pool['tvlUsd'] = source['tvlUsd'] * float(rng.uniform(0.5, 1.5))
+            pool['apy'] = (source.get('apy') or 0) * float(rng.uniform(0.8, 1.2)) or 1.0
+        pools.append(pool)
+        bodies[pool['pool']] = templates[source['pool']]
+
+    return json.dumps({'status': 'success', 'data': pools}).encode('utf-8'), bodies
+
+
+class FixtureAdapter(BaseAdapter):
+    """Transport adapter answering DeFiLlama requests from in-memory fixtures."""
+
+    def __init__(self, pools_body: bytes, chart_bodies: Dict[str, bytes]):
+        super().__init__()
+        self.pools_body = pools_body
+        self.chart_bodies = chart_bodies
+
+    def send(self, request, **kwargs) -> requests.Response:
+        path = request.path_url.split('?')[0]
+        if path.endswith('/pools'):
+            body = self.pools_body
+        else:
+            body = self.chart_bodies.get(path.rsplit('/', 1)[-1])
+
+        response = requests.Response()
+        response.status_code = 200 if body is not None else 404
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+        response.raw = io.BytesIO(body if body is not None else b'{"status": "error"}')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to the peak elsewhere."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stage(name: str, func: Callable, trace: bool, results: Dict[str, Dict[str, Any]]) -> Any:
+    """Run one pipeline stage and record its measurements (see `main` for its logging)."""
+    peak_before = peak_rss_mb()
+    if trace:
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+
+    stats = {'seconds': seconds, 'rss_mb': rss_mb(), 'peak_rss_mb': peak_rss_mb(),
+             'peak_rss_growth_mb': peak_rss_mb() - peak_before}
+    if trace:
+        traced_after, traced_peak = tracemalloc.get_traced_memory()
+        stats['alloc_peak_mb'] = (traced_peak - traced_before) / 1024 / 1024
+        stats['alloc_net_mb'] = (traced_after - traced_before) / 1024 / 1024
+    results[name] = stats
+    return result
+
+
+def run_pipeline(fixtures_dir: Optional[str], n_pools: int, days: int, workers: int,
+                 trace: bool) -> Dict[str, Any]:
+    """
+    Run the pipeline once against replayed fixtures in a scratch directory.
+
+    Must run in a fresh interpreter: the HTTP cache and rate limit are
+    switched off before the fetcher modules are imported.
+    """
+    config.HTTP_CACHE_ENABLED = False
+    config.DEFILLAMA_REQUESTS_PER_SECOND = 1e9
+    config.DEFILLAMA_RATE_LIMIT_BURST = 10 ** 9
+    import utils
+    import spr_fetcher_v1 as fetcher
+    from pool_matrix import PoolMatrix
+
+    listing, charts = load_fixtures(fixtures_dir)
+    pools_body, chart_bodies = scale_fixtures(listing, charts, n_pools, days)
+    session = requests.Session()
+    adapter = FixtureAdapter(pools_body, chart_bodies)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    utils._http_session = session
+
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    os.makedirs('data')
+    db_filename = os.path.join('data', 'defi_prime_rate.db')
+    if trace:
+        tracemalloc.start()
+
+    stages = {}
+    matrix = PoolMatrix()
+    try:
+        # Histories are folded into the matrix while fetching, as in the fetcher's run_pipeline
+        pool_data = run_stage('fetch', lambda: fetcher.fetch_and_process_pools(
+            limit=n_pools, days=days, incremental=False, db_filename=db_filename,
+            max_workers=workers, matrix=matrix), trace, stages)
+        merged_df = run_stage('merge', lambda: matrix.build(pool_data), trace, stages)
+        merged_df = run_stage('clean', lambda: fetcher._clean_merged_data(merged_df), trace, stages)
+        merged_df = run_stage('weighting', lambda: fetcher._calculate_weighted_metrics(merged_df), trace, stages)
+        run_stage('sqlite_save', lambda: fetcher._save_to_database(merged_df, pool_data, db_filename),
+                  trace, stages)
+        run_stage('json_save', lambda: fetcher._save_to_json(merged_df, pool_data, config.DEFAULT_JSON_FILENAME),
+                  trace, stages)
+        run_stage('summary', lambda: fetcher.print_summary_statistics(merged_df, pool_data), trace, stages)
+
+        stages['sqlite_save']['output_mb'] = os.path.getsize(db_filename) / 1024 / 1024
+        stages['json_save']['output_mb'] = sum(
+            os.path.getsize(os.path.join('data', name)) for name in os.listdir('data')
+            if name.endswith(('.json', '.gz', '.br'))
+        ) / 1024 / 1024
+    finally:
+        if trace:
+            tracemalloc.stop()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'pools': n_pools,
+        'days': days,
+        'pools_fetched': len(pool_data),
+        'dates': len(merged_df),
+        'stages': stages
+    }
+
+
+def run_in_subprocess(args: argparse.Namespace, n_pools: int, trace: bool) -> Dict[str, Any]:
+    """Run one pipeline pass in a fresh interpreter and return its measurements."""
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--pools', str(n_pools),
+               '--days', str(args.days), '--workers', str(args.workers)]
+    if args.fixtures:
+        command += ['--fixtures', os.path.abspath(args.fixtures)]
+    if trace:
+        command.append('--trace')
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def merge_passes(timed: List[Dict[str, Any]], traced: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine repeated timing passes (fastest per stage) with the allocation pass."""
+    run = dict(timed[0])
+    run['stages'] = {}
+    for stage in STAGES:
+        best = min((passes['stages'][stage] for passes in timed), key=lambda stats: stats['seconds'])
+        stats = dict(best)
+        if traced is not None:
+            stats['alloc_peak_mb'] = traced['stages'][stage]['alloc_peak_mb']
+            stats['alloc_net_mb'] = traced['stages'][stage]['alloc_net_mb']
+        run['stages'][stage] = stats
+    run['total_seconds'] = sum(stats['seconds'] for stats in run['stages'].values())
+    run['peak_rss_mb'] = max(stats['peak_rss_mb'] for stats in run['stages'].values())
+    return run
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the commit and environment the results were measured on."""
+    def git(*git_args: str) -> Optional[str]:
+        try:
+            return subprocess.run(['git', *git_args], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'measured_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """
+    Print per-stage changes against a baseline result file.
+
+    Returns:
+        False if a stage got slower by more than `max_regression` percent
+    """
+    ok = True
+    baseline_runs = {run['pools']: run for run in baseline['runs'] if run['days'] == current['days']}
+    print(f"\nCompared with {(baseline.get('environment') or {}).get('commit') or 'baseline'}:")
+    print(f"{'pools':>6} {'stage':<12} {'before s':>9} {'after s':>9} {'change':>8} {'peak RSS MB':>16}")
+    for run in current['runs']:
+        before = baseline_runs.get(run['pools'])
+        if before is None:
+            continue
+        for stage in STAGES:
+            old, new = before['stages'][stage], run['stages'][stage]
+            change = (new['seconds'] - old['seconds']) / old['seconds'] * 100 if old['seconds'] > 0 else 0.0
+            flag = ''
+            # Sub-10 ms stages are dominated by noise
+            if max_regression is not None and change > max_regression and new['seconds'] >= 0.01:
+                flag = '  REGRESSION'
+                ok = False
+            print(f"{run['pools']:>6} {stage:<12} {old['seconds']:>9.3f} {new['seconds']:>9.3f} {change:>+7.1f}% "
+                  f"{old['peak_rss_mb']:>7.0f} -> {new['peak_rss_mb']:<6.0f}{flag}")
+    return ok
+
+
+def record_fixtures(fixtures_dir: str, n_pools: int) -> None:
+    """Record live /pools and /chart responses for the top `n_pools` pools."""
+    from spr_fetcher_v1 import fetch_top_stablecoin_pools_by_tvl
+    from utils import DEFILLAMA_RATE_LIMITER, DEFILLAMA_RETRY_POLICY, request_with_retry
+
+    os.makedirs(os.path.join(fixtures_dir, 'chart'), exist_ok=True)
+    response = request_with_retry(config.API_ENDPOINTS['defi_llama_yields'],
+                                  rate_limiter=DEFILLAMA_RATE_LIMITER, retry_policy=DEFILLAMA_RETRY_POLICY)
+    if response is None or response.status_code != 200:
+        sys.exit("Failed to record the pools listing")
+    with open(os.path.join(fixtures_dir, 'pools.json'), 'wb') as f:
+        f.write(response.content)
+
+    for pool in fetch_top_stablecoin_pools_by_tvl(n_pools):
+        response = request_with_retry(f"{config.API_ENDPOINTS['defi_llama_chart']}{pool['pool']}",
+                                      rate_limiter=DEFILLAMA_RATE_LIMITER, retry_policy=DEFILLAMA_RETRY_POLICY)
+        if response is not None and response.status_code == 200:
+            with open(os.path.join(fixtures_dir, 'chart', f"{pool['pool']}.json"), 'wb') as f:
+                f.write(response.content)
+    print(f"Recorded fixtures to {fixtures_dir}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the fetch, merge and save pipeline offline")
+    parser.add_argument('--pools', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--days', type=int, default=1825)
+    parser.add_argument('--workers', type=int, default=config.FETCH_MAX_WORKERS)
+    parser.add_argument('--repeat', type=int, default=1, help="Timing passes per scale (fastest is kept)")
+    parser.add_argument('--no-allocations', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--fixtures', help="Directory of recorded responses (default: rebuilt from data/)")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against")
+    parser.add_argument('--max-regression', type=float,
+                        help="With --compare, fail if a stage is this many percent slower")
+    parser.add_argument('--record', metavar='DIR', help="Record live DeFiLlama responses into DIR and exit")
+    parser.add_argument('--record-pools', type=int, default=100)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--trace', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # The fetcher logs to stderr; only warnings are kept so formatting log lines stays out of the timings
+        config.configure_logging('WARNING')
+        print(json.dumps(run_pipeline(args.fixtures, args.pools[0], args.days, args.workers, args.trace)))
+        return
+
+    if args.record:
+        record_fixtures(args.record, args.record_pools)
+        return
+
+    results = {
+        'format': RESULT_FORMAT,
+        'environment': environment_info(),
+        'fixtures': os.path.abspath(args.fixtures) if args.fixtures else 'data/',
+        'days': args.days,
+        'runs': []
+    }
+    print(f"{'pools':>6} {'stage':<12} {'seconds':>9} {'RSS MB':>8} {'peak MB':>8} {'alloc MB':>9}")
+    for n_pools in args.pools:
+        timed = [run_in_subprocess(args, n_pools, trace=False) for _ in range(args.repeat)]
+        traced = None if args.no_allocations else run_in_subprocess(args, n_pools, trace=True)
+        run = merge_passes(timed, traced)
+        results['runs'].append(run)
+
+        for stage, stats in run['stages'].items():
+            alloc = f"{stats['alloc_peak_mb']:>9.1f}" if 'alloc_peak_mb' in stats else f"{'-':>9}"
+            print(f"{n_pools:>6} {stage:<12} {stats['seconds']:>9.3f} {stats['rss_mb']:>8.0f} "
+                  f"{stats['peak_rss_mb']:>8.0f} {alloc}")
+        print(f"{n_pools:>6} {'total':<12} {run['total_seconds']:>9.3f}   "
+              f"({run['pools_fetched']} pools x {run['dates']} dates)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if not compare_results(baseline, results, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Offline check of the Telegram alert mode.
+
+Writes synthetic prime rate and pool metadata files and a database holding
+the pool selection to a temporary data directory, points the bot at an in-process stub of the Bot API through
+`TELEGRAM_API_BASE`, and runs `telegram_bot.py --mode alerts` once per step,
+checking which messages are sent and what is left in the alert state file:
+
+1. First run: reference values are recorded, nothing is sent
+2. Same snapshot again: nothing is evaluated or sent
+3. Prime rate move, TVL drop and a pool leaving the top list: one message,
+   while a pool whose history failed to fetch is not reported
+4. A further prime rate move within the cooldown: suppressed
+5. The same move once the cooldown has passed: sent
+
+Usage:
+    python notifications/check_alerts.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import database  # noqa: E402
+
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'telegram_bot.py')
+CHAT_ID = 'main'
+
+
+class StubBotApi(BaseHTTPRequestHandler):
+    """Accepts every sendMessage call and records its chat and text."""
+
+    sent: List[Dict] = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.sent.append({'chat_id': str(body['chat_id']), 'text': body['text']})
+        data = json.dumps({'ok': True, 'result': {'message_id': len(self.sent)}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_snapshot(data_dir: str, snapshot: str, prime_rate: float, tvls: Dict[str, float],
+                   failed: Sequence[str] = ()) -> None:
+    """
+    Write the files and pool selection the alert mode reads.
+
+    Every pool in `tvls` is selected; pools in `failed` are left out of
+    pool_metadata.json, as the fetcher does when a history cannot be fetched.
+    """
+    summary = {
+        'date': '2026-01-02', 'previous_date': '2026-01-01', 'weighted_apy': prime_rate,
+        'ma_apy_14d': prime_rate, 'weighted_apy_change_1d': 0.0, 'ma_apy_14d_change_1d': 0.0,
+        'data_points': 2, 'pool_count': len(tvls)
+    }
+    with open(os.path.join(data_dir, 'prime_rate.json'), 'w') as f:
+        json.dump({'format': 'prime-rate-v1', 'summary': summary}, f)
+
+    pools = [{'pool_id': pool_id, 'name': pool_id, 'current_tvl': tvl, 'current_apy': 4.0,
+              'chain': 'Ethereum', 'project': 'proto', 'symbol': pool_id.upper()}
+             for pool_id, tvl in tvls.items()]
+    fetched = [pool for pool in pools if pool['pool_id'] not in failed]
+    with open(os.path.join(data_dir, 'pool_metadata.json'), 'w') as f:
+        json.dump({'pool_metadata': fetched,
+                   'export_info': {'export_timestamp': snapshot, 'total_pools': len(fetched)}}, f)
+
+    conn = database.connect(os.path.join(data_dir, 'defi_prime_rate.db'))
+    try:
+        with conn:
+            conn.execute("DELETE FROM pools")
+            conn.executemany(
+                "INSERT INTO pools (pool_id, name, chain, project, symbol, current_tvl, current_apy, rank, active) "
+                "VALUES (:pool_id, :name, :chain, :project, :symbol, :current_tvl, :current_apy, :rank, 1)",
+                [{**pool, 'rank': rank} for rank, pool in enumerate(pools, start=1)]
+            )
+    finally:
+        conn.close()
+
+
+def run_alerts(data_dir: str, env: Dict[str, str]) -> List[Dict]:
+    """Run the bot in alert mode and return the messages it sent."""
+    sent_before = len(StubBotApi.sent)
+    result = subprocess.run([sys.executable, BOT_SCRIPT, '--mode', 'alerts', '--data-dir', data_dir],
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Alert run failed with exit code {result.returncode}:\n{result.stderr}")
+    return StubBotApi.sent[sent_before:]
+
+
+def check(condition: bool, description: str) -> None:
+    """Print a passed check, or stop at the first failed one."""
+    if not condition:
+        raise SystemExit(f"FAIL: {description}")
+    print(f"ok    {description}")
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubBotApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        state_file = os.path.join(data_dir, 'alert_state.json')
+        env = {**os.environ, 'TELEGRAM_BOT_TOKEN': 'TEST', 'TELEGRAM_CHAT_ID': CHAT_ID,
+               'TELEGRAM_API_BASE': f"http://127.0.0.1:{server.server_port}",
+               'TELEGRAM_ALERT_STATE_FILE': state_file, 'TELEGRAM_SUBSCRIBER_CHAT_IDS': '',
+               'TELEGRAM_SUBSCRIBERS_FILE': ''}
+        tvls = {f"pool{i}": 1e9 / (i + 1) for i in range(12)}
+
+        write_snapshot(data_dir, 't1', 4.0, tvls)
+        sent = run_alerts(data_dir, env)
+        check(not sent, "first run records reference values without sending")
+        with open(state_file) as f:
+            state = json.load(f)
+        check(state['snapshot'] == '2026-01-02@t1' and state['prime_rate']['reference'] == 4.0,
+              "first run saves the snapshot and prime rate reference")
+        check(len(state['pools']) == len(tvls), "first run saves every pool's TVL")
+
+        sent = run_alerts(data_dir, env)
+        with open(state_file) as f:
+            check(not sent and json.load(f) == state, "same snapshot is not evaluated again")
+
+        tvls['pool0'] *= 0.7
+        del tvls['pool11']
+        write_snapshot(data_dir, 't2', 4.3, tvls, failed=['pool5'])
+        sent = run_alerts(data_dir, env)
+        check(len(sent) == 1 and sent[0]['chat_id'] == CHAT_ID, "triggered alerts are sent as one message")
+        text = sent[0]['text']
+        check('Prime rate moved +30 bp' in text, "prime rate move is reported")
+        check('TVL of proto POOL0 (Ethereum) fell 30.0%' in text, "TVL drop of a top pool is reported")
+        check('proto POOL11 (Ethereum) dropped out of the top 100' in text, "pool leaving the top list is reported")
+        check('POOL5' not in text, "pool whose history failed to fetch is not reported as dropped out")
+        with open(state_file) as f:
+            check('pool5' in json.load(f)['pools'], "pool whose history failed to fetch stays in the state")
+
+        write_snapshot(data_dir, 't3', 4.6, tvls)
+        sent = run_alerts(data_dir, env)
+        with open(state_file) as f:
+            state = json.load(f)
+        check(not sent, "repeated prime rate move within the cooldown is suppressed")
+        check(state['snapshot'] == '2026-01-02@t3' and state['prime_rate']['reference'] == 4.3,
+              "suppressed alert keeps its reference value")
+
+        # Move the last alert times back past the cooldown
+        for key, sent_at in state['alerts'].items():
+            state['alerts'][key] = (datetime.fromisoformat(sent_at) - timedelta(days=1)).isoformat()
+        with open(state_file, 'w') as f:
+            json.dump(state, f)
+
+        write_snapshot(data_dir, 't4', 4.6, tvls)
+        sent = run_alerts(data_dir, env)
+        check(len(sent) == 1 and 'Prime rate moved +30 bp to 4.600%' in sent[0]['text'],
+              "prime rate move is sent again once the cooldown has passed")
+        check('TVL of' not in sent[0]['text'], "TVL alert is not repeated after its reference was reset")
+
+    server.shutdown()
+    print("All alert checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline check of Telegram message delivery pacing.
+
+Broadcasts a message through `TelegramBot` to an in-process stub of the Bot
+API in which one chat answers its first message with a 429 `retry_after`,
+and checks that the other chats are still sent on time while the throttled
+chat is retried once its delay has passed.
+
+Usage:
+    python notifications/check_delivery.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from telegram_bot import SEND_WORKERS, SendScheduler, TelegramBot  # noqa: E402
+
+RETRY_AFTER = 3
+THROTTLED_CHAT = 'throttled'
+
+
+class StubBotApi(BaseHTTPRequestHandler):
+    """Records every sendMessage call; the throttled chat's first one gets a 429."""
+
+    calls: List[Dict] = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        chat_id = str(body['chat_id'])
+        with self.lock:
+            first = not any(call['chat_id'] == chat_id for call in self.calls)
+            self.calls.append({'chat_id': chat_id, 'at': time.monotonic()})
+
+        if chat_id == THROTTLED_CHAT and first:
+            status, response = 429, {'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                                     'parameters': {'retry_after': RETRY_AFTER}}
+        else:
+            status, response = 200, {'ok': True, 'result': {'message_id': len(self.calls)}}
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check(condition: bool, description: str) -> None:
+    """Print a passed check, or stop at the first failed one."""
+    if not condition:
+        raise SystemExit(f"FAIL: {description}")
+    print(f"ok    {description}")
+
+
+def main() -> None:
+    scheduler = SendScheduler()
+    scheduler.defer('deferred', 5)
+    threading.Thread(target=scheduler.wait_turn, args=('deferred',), daemon=True).start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    scheduler.wait_turn('other')
+    check(time.monotonic() - start < 0.5, "a chat waiting out a deferral does not hold back other chats")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubBotApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Fewer workers than chats, so later chats queue behind the throttled one
+    chat_ids = [THROTTLED_CHAT] + [f"chat{i}" for i in range(2 * SEND_WORKERS)]
+    bot = TelegramBot('TEST', chat_ids[0], chat_ids[1:], api_base=f"http://127.0.0.1:{server.server_port}")
+    start = time.monotonic()
+    results = bot.broadcast("Delivery check")
+    server.shutdown()
+
+    check(all(result['ok'] for result in results.values()), "every chat is delivered")
+    check(results[THROTTLED_CHAT]['attempts'] == 2, "the throttled chat is retried once")
+    delivered_at = {call['chat_id']: call['at'] - start for call in StubBotApi.calls}
+    check(max(delivered_at[chat_id] for chat_id in chat_ids[1:]) < 1.0,
+          "the other chats are sent within a second despite the 429")
+    check(delivered_at[THROTTLED_CHAT] >= RETRY_AFTER, "the throttled chat waits out its retry_after")
+    print("All delivery checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,28 @@ Telegram Bot for Daily DeFi Prime Rate Notifications
 This script reads the latest DeFi analytics data from local JSON files
 and sends daily notifications via Telegram with the current stablecoin prime rate,
 14-day moving average, and daily changes.
+
+With `--mode alerts` it instead checks the latest data against alert rules
+(prime rate moves, TVL drops of top pools, pools leaving the top 100) and
+only sends a message when one triggers. The values the rules compare against
+are kept in a small state file that each run updates, so no history is
+rescanned.
 """
 
+import argparse
+import copy
+import html
 import os
 import json
+import tempfile
+import sqlite3
+import threading
+import time
 import requests
-from datetime import datetime
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
 import logging
 
 # Try to load .env file if it exists (for local development)
@@ -26,30 +41,207 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Delivery settings, kept below Telegram's documented limits
+# (about 30 messages/second overall, 1/second per chat and 20/minute per group)
+GLOBAL_MESSAGES_PER_SECOND = 25
+CHAT_SEND_INTERVAL = 1.0
+GROUP_CHAT_SEND_INTERVAL = 3.0
+SEND_MAX_ATTEMPTS = 4
+SEND_BACKOFF_BASE = 1.0
+SEND_WORKERS = 8
+SEND_TIMEOUT = (10, 30)  # (connect, read) seconds
+
+# Alert rules
+ALERT_PRIME_RATE_MOVE_BPS = 25.0  # Prime rate move since the last alert, in basis points
+ALERT_TVL_DROP_PERCENT = 20.0  # TVL drop from a pool's peak since its last alert
+ALERT_TVL_TOP_POOLS = 10  # Pools watched for TVL drops, by current TVL
+ALERT_TOP_RANK = 100  # Pools leaving this top list trigger an alert
+ALERT_COOLDOWN_HOURS = 12.0  # Minimum time between two alerts with the same key
+ALERT_STATE_VERSION = 1
+
+
+class SendScheduler:
+    """
+    Paces sends across worker threads under a global and a per-chat limit.
+
+    A send first waits until its chat is eligible again, without holding
+    anything, and only then reserves the next free global slot. A chat held
+    back by a 429 `retry_after` therefore never delays the other chats.
+    Group chats (negative IDs) get the longer interval Telegram requires for
+    them.
+    """
+
+    def __init__(self, messages_per_second: float = GLOBAL_MESSAGES_PER_SECOND,
+                 chat_interval: float = CHAT_SEND_INTERVAL,
+                 group_chat_interval: float = GROUP_CHAT_SEND_INTERVAL):
+        self.global_interval = 1.0 / messages_per_second
+        self.chat_interval = chat_interval
+        self.group_chat_interval = group_chat_interval
+        self._global_next = 0.0
+        self._chat_next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait_turn(self, chat_id: str) -> None:
+        """Block until the chat may be sent the next message."""
+        interval = self.group_chat_interval if str(chat_id).startswith('-') else self.chat_interval
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                chat_ready = self._chat_next.get(chat_id, 0.0)
+                if chat_ready <= now:
+                    slot = max(now, self._global_next)
+                    self._global_next = slot + self.global_interval
+                    self._chat_next[chat_id] = slot + interval
+                    break
+            # Deferred chats wait outside the global order, then compete for a slot again
+            time.sleep(chat_ready - now)
+        if slot > now:
+            time.sleep(slot - now)
+
+    def defer(self, chat_id: str, seconds: float) -> None:
+        """Push a chat's next slot back, e.g. by a 429 retry_after."""
+        with self._lock:
+            self._chat_next[chat_id] = max(self._chat_next.get(chat_id, 0.0), time.monotonic() + seconds)
+
+
 class TelegramBot:
-    def __init__(self, bot_token: str, chat_id: str):
-        """Initialize Telegram bot with token and chat ID."""
+    def __init__(self, bot_token: str, chat_id: str, subscriber_chat_ids: Optional[List[str]] = None,
+                 api_base: str = "https://api.telegram.org", scheduler: Optional[SendScheduler] = None):
+        """
+        Initialize Telegram bot with token and chat IDs.
+
+        Args:
+            bot_token: Bot API token
+            chat_id: Primary chat, which also receives error messages
+            subscriber_chat_ids: Additional chats that receive broadcasts
+            api_base: Bot API base URL
+            scheduler: Send pacing shared by all deliveries
+        """
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.api_url = f"https://api.telegram.org/bot{bot_token}"
+        self.subscriber_chat_ids = [c for c in (subscriber_chat_ids or []) if c != chat_id]
+        self.api_url = f"{api_base.rstrip('/')}/bot{bot_token}"
+        self.scheduler = scheduler or SendScheduler()
+
+        # One pooled session for every send, sized for the broadcast workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SEND_WORKERS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
-    def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
-        """Send a message via Telegram bot."""
+    def send_message(self, message: str, parse_mode: str = "HTML", chat_id: Optional[str] = None) -> bool:
+        """Send a message to one chat (the primary chat by default)."""
+        result = self.deliver(chat_id or self.chat_id, message, parse_mode)
+        if result['ok']:
+            logger.info("Message sent successfully to Telegram")
+        return result['ok']
+    
+    def deliver(self, chat_id: str, message: str, parse_mode: str = "HTML") -> Dict:
+        """
+        Send a message to one chat, retrying rate limits and transient errors.
+
+        429 responses are retried after the `retry_after` Telegram asks for;
+        server and connection errors back off exponentially. Other 4xx errors
+        (bot blocked, chat not found, bad markup) are not retried.
+
+        Args:
+            chat_id: Target chat
+            message: Message text
+            parse_mode: Telegram parse mode
+
+        Returns:
+            Result dictionary with chat_id, ok, attempts, status, permanent
+            (failure will not go away by retrying) and error
+        """
         url = f"{self.api_url}/sendMessage"
         payload = {
-            "chat_id": self.chat_id,
+            "chat_id": chat_id,
             "text": message,
             "parse_mode": parse_mode
         }
+        result = {'chat_id': chat_id, 'ok': False, 'attempts': 0, 'status': None,
+                  'permanent': False, 'error': None}
         
+        for attempt in range(1, SEND_MAX_ATTEMPTS + 1):
+            self.scheduler.wait_turn(chat_id)
+            result['attempts'] = attempt
+            try:
+                response = self.session.post(url, json=payload, timeout=SEND_TIMEOUT)
+            except requests.exceptions.RequestException as e:
+                result['error'] = str(e)
+                self.scheduler.defer(chat_id, SEND_BACKOFF_BASE * 2 ** (attempt - 1))
+                continue
+            
+            result['status'] = response.status_code
+            if response.ok:
+                result['ok'] = True
+                result['error'] = None
+                return result
+            
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            result['error'] = body.get('description') or f"HTTP {response.status_code}"
+            
+            if response.status_code == 429:
+                retry_after = (body.get('parameters') or {}).get('retry_after', SEND_BACKOFF_BASE)
+                logger.warning(f"Rate limited sending to {chat_id}, retrying after {retry_after}s")
+                self.scheduler.defer(chat_id, float(retry_after))
+            elif response.status_code >= 500:
+                self.scheduler.defer(chat_id, SEND_BACKOFF_BASE * 2 ** (attempt - 1))
+            else:
+                result['permanent'] = True
+                break
+        
+        logger.error(f"Failed to send Telegram message to {chat_id}: {result['error']}")
+        return result
+    
+    def broadcast(self, message: str, parse_mode: str = "HTML",
+                  chat_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Send a message to many chats concurrently over the pooled session.
+
+        Args:
+            message: Message text
+            parse_mode: Telegram parse mode
+            chat_ids: Target chats (the primary chat and subscribers by default)
+
+        Returns:
+            Delivery results keyed by chat ID, see deliver()
+        """
+        chat_ids = chat_ids or [self.chat_id] + self.subscriber_chat_ids
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(SEND_WORKERS, len(chat_ids))) as executor:
+            futures = {executor.submit(self.deliver, chat_id, message, parse_mode): chat_id
+                       for chat_id in chat_ids}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        
+        delivered = sum(1 for result in results.values() if result['ok'])
+        logger.info(f"Delivered to {delivered}/{len(chat_ids)} chats")
+        return results
+
+
+def load_subscriber_chat_ids() -> List[str]:
+    """
+    Read subscriber chat IDs from the environment.
+
+    TELEGRAM_SUBSCRIBER_CHAT_IDS holds a comma-separated list, and
+    TELEGRAM_SUBSCRIBERS_FILE names a file with one chat ID per line (blank
+    lines and lines starting with # are ignored).
+    """
+    chat_ids = [c.strip() for c in os.getenv('TELEGRAM_SUBSCRIBER_CHAT_IDS', '').split(',') if c.strip()]
+    
+    subscribers_file = os.getenv('TELEGRAM_SUBSCRIBERS_FILE')
+    if subscribers_file:
         try:
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
-            logger.info("Message sent successfully to Telegram")
-            return True
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to send Telegram message: {e}")
-            return False
+            with open(subscribers_file, 'r') as f:
+                chat_ids += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        except OSError as e:
+            logger.error(f"Could not read subscribers file {subscribers_file}: {e}")
+    
+    return list(dict.fromkeys(chat_ids))
 
 
 class DataLoader:
@@ -58,6 +250,112 @@ class DataLoader:
         self.data_dir = data_dir
         self.pool_data_file = os.path.join(data_dir, "pool_data.json")
         self.pool_metadata_file = os.path.join(data_dir, "pool_metadata.json")
+        self.prime_rate_file = os.path.join(data_dir, "prime_rate.json")
+        self.db_file = os.path.join(data_dir, "defi_prime_rate.db")
+        self.alert_state_file = os.getenv('TELEGRAM_ALERT_STATE_FILE') or os.path.join(data_dir, "alert_state.json")
+    
+    def load_prime_rate(self) -> Optional[Dict]:
+        """Load the slim prime rate series (a few KB) written by the fetcher."""
+        try:
+            with open(self.prime_rate_file, 'r') as f:
+                data = json.load(f)
+            logger.info(f"Successfully loaded prime rate series from {self.prime_rate_file}")
+            return data
+        except FileNotFoundError:
+            logger.warning(f"Prime rate file not found: {self.prime_rate_file}")
+            return None
+        except json.JSONDecodeError as e:
+            logger.warning(f"Failed to parse prime rate JSON: {e}")
+            return None
+    
+    def load_latest_from_db(self, rows: int = 2) -> Optional[Dict]:
+        """
+        Read the last prime rate rows from the SQLite database.
+
+        The rows come from a reverse scan of the prime_rate primary key and the
+        pool count from the small pools table; nothing counts the stored
+        history, so the cost does not depend on how much of it there is.
+        """
+        if not os.path.exists(self.db_file):
+            logger.warning(f"Database file not found: {self.db_file}")
+            return None
+        
+        try:
+            conn = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
+            try:
+                latest = conn.execute(
+                    "SELECT date, weighted_apy, ma_apy_14d FROM prime_rate ORDER BY date DESC LIMIT ?",
+                    (rows,)
+                ).fetchall()
+                pool_count = conn.execute("SELECT COUNT(*) FROM pools WHERE active = 1").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read prime rate from database: {e}")
+            return None
+        
+        logger.info(f"Successfully loaded latest prime rate rows from {self.db_file}")
+        return {'rows': latest, 'pool_count': pool_count}
+    
+    def load_selected_pools(self) -> Optional[List[Dict]]:
+        """
+        Read the current pool selection from the SQLite database.
+
+        The fetcher records every pool picked from the listing as active at
+        its TVL rank, including pools whose history could not be fetched, so
+        this is the top list itself rather than the pools in the dataset.
+        """
+        if not os.path.exists(self.db_file):
+            logger.warning(f"Database file not found: {self.db_file}")
+            return None
+        
+        try:
+            conn = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                rows = conn.execute(
+                    "SELECT pool_id, name, chain, project, symbol, current_tvl, rank "
+                    "FROM pools WHERE active = 1 ORDER BY rank"
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read pool selection from database: {e}")
+            return None
+        
+        logger.info(f"Successfully loaded {len(rows)} selected pools from {self.db_file}")
+        return [dict(row) for row in rows]
+    
+    def load_alert_state(self) -> Dict:
+        """Load the alert state left by the previous run (empty on the first run)."""
+        try:
+            with open(self.alert_state_file, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            logger.info(f"No alert state at {self.alert_state_file}, starting fresh")
+            return {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Failed to parse alert state JSON, starting fresh: {e}")
+            return {}
+        
+        if state.get('version') != ALERT_STATE_VERSION:
+            logger.warning(f"Ignoring alert state with unsupported version {state.get('version')}")
+            return {}
+        return state
+    
+    def save_alert_state(self, state: Dict) -> None:
+        """Write the alert state atomically, so a failed run leaves the previous state."""
+        directory = os.path.dirname(self.alert_state_file) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.alert_state.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.alert_state_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        logger.info(f"Saved alert state to {self.alert_state_file}")
     
     def load_pool_data(self) -> Optional[Dict]:
         """Load pool data from local JSON file."""
@@ -91,10 +389,50 @@ class DataLoader:
 class AnalyticsCalculator:
     @staticmethod
     def get_sorted_dates(pool_data: Dict) -> List[str]:
-        """Get sorted list of dates from pool data."""
-        dates = list(pool_data['pool_data'].keys())
-        dates.sort(key=lambda x: datetime.strptime(x, '%Y-%m-%d'))
-        return dates
+        """Get sorted list of dates from pool data (ISO dates sort as strings)."""
+        return sorted(pool_data['pool_data'])
+    
+    @staticmethod
+    def stats_from_prime_rate(prime_rate: Dict) -> Optional[Dict]:
+        """Read current stats and daily changes from the prime rate summary."""
+        summary = prime_rate.get('summary', {})
+        if summary.get('previous_date') is None or summary.get('weighted_apy_change_1d') is None:
+            logger.error("Insufficient data points for analysis")
+            return None
+        
+        return {
+            'date': summary['date'],
+            'previous_date': summary['previous_date'],
+            'current_prime_rate': summary['weighted_apy'],
+            'current_ma_14d': summary.get('ma_apy_14d') or 0,
+            'prime_rate_change': summary['weighted_apy_change_1d'],
+            'ma_14d_change': summary.get('ma_apy_14d_change_1d') or 0,
+            'data_points': summary['data_points'],
+            'pool_count': summary.get('pool_count')
+        }
+    
+    @staticmethod
+    def stats_from_latest_rows(latest: Dict) -> Optional[Dict]:
+        """Calculate current stats and daily changes from the newest database rows."""
+        rows = latest['rows']
+        if len(rows) < 2 or None in (rows[0][1], rows[1][1]):
+            logger.error("Insufficient data points for analysis")
+            return None
+        
+        latest_date, current_prime_rate, current_ma_14d = rows[0]
+        previous_date, previous_prime_rate, previous_ma_14d = rows[1]
+        current_ma_14d = current_ma_14d or 0
+        previous_ma_14d = previous_ma_14d or 0
+        
+        return {
+            'date': latest_date,
+            'previous_date': previous_date,
+            'current_prime_rate': current_prime_rate,
+            'current_ma_14d': current_ma_14d,
+            'prime_rate_change': current_prime_rate - previous_prime_rate,
+            'ma_14d_change': current_ma_14d - previous_ma_14d,
+            'pool_count': latest.get('pool_count')
+        }
     
     @staticmethod
     def calculate_daily_stats(pool_data: Dict) -> Optional[Dict]:
@@ -138,6 +476,129 @@ class AnalyticsCalculator:
             return None
 
 
+class AlertEngine:
+    """
+    Evaluates alert rules against the latest values and the previous run's state.
+
+    The state holds one reference value per rule subject: the prime rate at
+    its last alert, and each top pool's peak TVL since its last alert. A rule
+    fires when the latest value has moved far enough from its reference,
+    after which the reference is reset. Every alert has a key (rule and
+    subject) that is not sent again within the cooldown; an alert held back
+    by its cooldown keeps the reference, so it fires once the cooldown ends
+    if the condition still holds.
+    """
+
+    def __init__(self, prime_rate_move_bps: float = ALERT_PRIME_RATE_MOVE_BPS,
+                 tvl_drop_percent: float = ALERT_TVL_DROP_PERCENT,
+                 tvl_top_pools: int = ALERT_TVL_TOP_POOLS,
+                 top_rank: int = ALERT_TOP_RANK,
+                 cooldown_hours: float = ALERT_COOLDOWN_HOURS):
+        self.prime_rate_move_bps = prime_rate_move_bps
+        self.tvl_drop_percent = tvl_drop_percent
+        self.tvl_top_pools = tvl_top_pools
+        self.top_rank = top_rank
+        self.cooldown = timedelta(hours=cooldown_hours)
+    
+    @staticmethod
+    def pool_label(pool: Dict) -> str:
+        """Describe a pool for alert messages, e.g. 'aave-v3 USDC (Ethereum)'."""
+        return f"{pool.get('project', '?')} {pool.get('symbol', '?')} ({pool.get('chain', '?')})"
+    
+    def evaluate(self, state: Dict, snapshot: str, stats: Dict, pools: List[Dict],
+                 now: Optional[datetime] = None,
+                 track_membership: bool = True) -> Tuple[List[Dict], Dict]:
+        """
+        Check the latest data against the rules.
+
+        Args:
+            state: Alert state from the previous run (empty on the first run)
+            snapshot: Identifier of the data being evaluated; data already
+                evaluated under the same identifier triggers nothing
+            stats: Latest statistics, see AnalyticsCalculator
+            pools: Current pool selection with pool_id and current_tvl
+            now: Evaluation time (UTC), defaults to the current time
+            track_membership: Whether `pools` is the whole selection. When it
+                is not, pools missing from it keep their state instead of
+                being reported as dropped out.
+
+        Returns:
+            Tuple of (alerts, new state). Each alert has key, rule and text.
+            The new state should only be saved once the alerts are delivered.
+        """
+        now = now or datetime.now(timezone.utc)
+        if state.get('snapshot') == snapshot:
+            logger.info(f"Data snapshot {snapshot} was already evaluated")
+            return [], state
+        
+        new_state = copy.deepcopy(state) if state else {'version': ALERT_STATE_VERSION, 'alerts': {}}
+        first_run = 'prime_rate' not in new_state
+        new_state['snapshot'] = snapshot
+        new_state['evaluated_at'] = now.isoformat()
+        sent = new_state.setdefault('alerts', {})
+        alerts = []
+        
+        def fire(key: str, rule: str, text: str) -> bool:
+            last_sent = sent.get(key)
+            if last_sent and now - datetime.fromisoformat(last_sent) < self.cooldown:
+                logger.info(f"Alert {key} suppressed by cooldown (last sent {last_sent})")
+                return False
+            sent[key] = now.isoformat()
+            alerts.append({'key': key, 'rule': rule, 'text': text})
+            return True
+        
+        # Prime rate move since the last alert
+        rate = stats['current_prime_rate']
+        reference = new_state.get('prime_rate', {})
+        if first_run or reference.get('reference') is None:
+            new_state['prime_rate'] = {'reference': rate, 'reference_date': stats['date']}
+        else:
+            move_bps = (rate - reference['reference']) * 100
+            if abs(move_bps) >= self.prime_rate_move_bps:
+                text = (f"Prime rate moved {move_bps:+.0f} bp to {rate:.3f}% "
+                        f"(from {reference['reference']:.3f}% on {reference['reference_date']})")
+                if fire('prime_rate_move', 'prime_rate_move', text):
+                    new_state['prime_rate'] = {'reference': rate, 'reference_date': stats['date']}
+        
+        # TVL drops of the largest pools, and pools leaving the top list
+        ranked = sorted((p for p in pools if p.get('current_tvl') is not None),
+                        key=lambda p: p['current_tvl'], reverse=True)[:self.top_rank]
+        previous_pools = new_state.get('pools', {})
+        current_pools = {}
+        for rank, pool in enumerate(ranked, start=1):
+            pool_id = pool['pool_id']
+            tvl = float(pool['current_tvl'])
+            previous = previous_pools.get(pool_id)
+            peak = max(previous['tvl_peak'], tvl) if previous else tvl
+            
+            if previous and rank <= self.tvl_top_pools and peak > 0:
+                drop_percent = (peak - tvl) / peak * 100
+                if drop_percent >= self.tvl_drop_percent:
+                    text = (f"TVL of {self.pool_label(pool)} fell {drop_percent:.1f}% "
+                            f"to ${tvl / 1e6:,.1f}M (peak ${peak / 1e6:,.1f}M)")
+                    if fire(f"tvl_drop:{pool_id}", 'tvl_drop', text):
+                        peak = tvl
+            
+            current_pools[pool_id] = {'label': self.pool_label(pool), 'rank': rank, 'tvl': tvl, 'tvl_peak': peak}
+        
+        # An empty pool list means the data is unusable, not that every pool left
+        if current_pools:
+            for pool_id, previous in previous_pools.items():
+                if pool_id in current_pools:
+                    continue
+                if track_membership:
+                    fire(f"dropped_out:{pool_id}", 'dropped_out',
+                         f"{previous['label']} dropped out of the top {self.top_rank} "
+                         f"(was #{previous['rank']})")
+                else:
+                    current_pools[pool_id] = previous
+            new_state['pools'] = current_pools
+        
+        if first_run:
+            logger.info("First alert evaluation, recorded reference values only")
+        return alerts, new_state
+
+
 class MessageFormatter:
     @staticmethod
     def format_change(value: float) -> str:
@@ -163,8 +624,8 @@ class MessageFormatter:
         prime_rate_change = MessageFormatter.format_change(stats['prime_rate_change'])
         ma_14d_change = MessageFormatter.format_change(stats['ma_14d_change'])
         
-        # Get pool count from metadata if available
-        pool_count = stats['data_points']
+        # Get pool count from the summary or metadata if available
+        pool_count = stats.get('pool_count') or stats.get('data_points')
         if metadata and 'pool_metadata' in metadata:
             pool_count = len(metadata['pool_metadata'])
         
@@ -184,40 +645,82 @@ class MessageFormatter:
 <i>Data from {pool_count} stablecoin pools</i>"""
         
         return message
+    
+    @staticmethod
+    def create_alert_message(alerts: List[Dict], stats: Dict) -> str:
+        """Create formatted message listing triggered alerts."""
+        lines = "\n".join(f"• {html.escape(alert['text'])}" for alert in alerts)
+        
+        return f"""<b>🚨 DeFi Prime Rate Alert</b>
 
+📊 <b>Data for {stats['date']}</b>
 
-def main():
-    """Main function to load data, calculate stats, and send Telegram notification."""
-    # Get environment variables
-    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
-    
-    if not bot_token:
-        logger.error("TELEGRAM_BOT_TOKEN environment variable not set")
-        return False
+{lines}
+
+💰 <b>Current Prime Rate:</b> {stats['current_prime_rate']:.3f}%
+
+🔗 Details on <a href="https://512m.io/analytics">512m.io/analytics</a>"""
+
+
+def load_stats(data_loader: DataLoader) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Load the latest statistics, reading as little data as possible.
+
+    The slim prime rate series is tried first, then the newest database rows.
+    The full pool data and metadata are the last resort.
+
+    Returns:
+        Tuple of (stats or None, pool metadata if it had to be loaded)
+    """
+    logger.info("Loading prime rate data from local files...")
+    stats = None
+    pool_metadata = None
+    prime_rate = data_loader.load_prime_rate()
+    if prime_rate:
+        logger.info("Calculating daily statistics...")
+        stats = AnalyticsCalculator.stats_from_prime_rate(prime_rate)
     
-    if not chat_id:
-        logger.error("TELEGRAM_CHAT_ID environment variable not set")
-        return False
+    if not stats:
+        latest = data_loader.load_latest_from_db()
+        if latest:
+            logger.info("Calculating daily statistics...")
+            stats = AnalyticsCalculator.stats_from_latest_rows(latest)
     
-    # Initialize components
-    telegram_bot = TelegramBot(bot_token, chat_id)
-    data_loader = DataLoader()
-    
-    # Load data from local files
-    logger.info("Loading pool data from local files...")
-    pool_data = data_loader.load_pool_data()
-    if not pool_data:
-        error_message = "❌ <b>Error:</b> Failed to load DeFi analytics data from local files."
-        telegram_bot.send_message(error_message)
-        return False
+    if not stats:
+        logger.info("Loading pool data from local files...")
+        pool_data = data_loader.load_pool_data()
+        if pool_data:
+            # Load metadata (optional)
+            pool_metadata = data_loader.load_pool_metadata()
+            
+            # Calculate statistics
+            logger.info("Calculating daily statistics...")
+            stats = AnalyticsCalculator.calculate_daily_stats(pool_data)
     
-    # Load metadata (optional)
-    pool_metadata = data_loader.load_pool_metadata()
+    return stats, pool_metadata
+
+
+def delivery_succeeded(results: Dict[str, Dict]) -> bool:
+    """
+    Summarise broadcast results.
+
+    Chats that blocked the bot or no longer exist are reported but do not
+    fail the run, unless every chat rejected the message.
+    """
+    rejected = [r for r in results.values() if not r['ok'] and r['permanent']]
+    failed = [r for r in results.values() if not r['ok'] and not r['permanent']]
+    for result in rejected:
+        logger.warning(f"Chat {result['chat_id']} rejected the notification: {result['error']}")
     
-    # Calculate statistics
-    logger.info("Calculating daily statistics...")
-    stats = AnalyticsCalculator.calculate_daily_stats(pool_data)
+    if not failed and len(rejected) < len(results):
+        return True
+    logger.error(f"Failed to deliver to {len(failed) + len(rejected)} of {len(results)} chats")
+    return False
+
+
+def send_daily_notification(telegram_bot: TelegramBot, data_loader: DataLoader) -> bool:
+    """Send the daily prime rate update."""
+    stats, pool_metadata = load_stats(data_loader)
     if not stats:
         error_message = "❌ <b>Error:</b> Failed to calculate daily statistics. Data may be incomplete."
         telegram_bot.send_message(error_message)
@@ -226,14 +729,88 @@ def main():
     # Format and send message
     logger.info("Formatting and sending message...")
     message = MessageFormatter.create_daily_message(stats, pool_metadata)
-    success = telegram_bot.send_message(message)
-    
-    if success:
+    if delivery_succeeded(telegram_bot.broadcast(message)):
         logger.info("Daily notification sent successfully!")
         return True
+    return False
+
+
+def send_alerts(telegram_bot: TelegramBot, data_loader: DataLoader) -> bool:
+    """
+    Evaluate the alert rules and send a message only if any of them trigger.
+
+    The updated alert state is saved once the alerts are delivered (or when
+    nothing triggered), so an undelivered alert is evaluated again next run.
+    """
+    stats, _ = load_stats(data_loader)
+    metadata = data_loader.load_pool_metadata()
+    if not stats or not metadata:
+        # Alerts run after every fetch; a missing file is logged rather than messaged
+        logger.error("Alert evaluation skipped: statistics or pool metadata unavailable")
+        return False
+    
+    export_info = metadata.get('export_info', {})
+    snapshot = f"{stats['date']}@{export_info.get('export_timestamp')}"
+    
+    # Pool metadata only lists pools whose history was fetched, so membership
+    # comes from the selection recorded in the database
+    pools = data_loader.load_selected_pools()
+    track_membership = bool(pools)
+    if not track_membership:
+        logger.warning("Pool selection unavailable, dropped-out alerts are skipped this run")
+        pools = metadata.get('pool_metadata', [])
+    
+    state = data_loader.load_alert_state()
+    alerts, new_state = AlertEngine().evaluate(state, snapshot, stats, pools,
+                                               track_membership=track_membership)
+    if new_state is state:
+        return True
+    
+    if alerts:
+        logger.info(f"{len(alerts)} alert(s) triggered: {', '.join(alert['key'] for alert in alerts)}")
+        message = MessageFormatter.create_alert_message(alerts, stats)
+        if not delivery_succeeded(telegram_bot.broadcast(message)):
+            return False
     else:
-        logger.error("Failed to send daily notification")
+        logger.info("No alerts triggered")
+    
+    data_loader.save_alert_state(new_state)
+    return True
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Send DeFi Prime Rate notifications to Telegram")
+    parser.add_argument('--mode', choices=['daily', 'alerts'], default=os.getenv('TELEGRAM_BOT_MODE', 'daily'),
+                        help="Send the daily update, or only alerts triggered by the latest data")
+    parser.add_argument('--data-dir', default='../data', help="Directory with the published data files")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function to load data, calculate stats, and send Telegram notification."""
+    args = parse_args(argv)
+    
+    # Get environment variables
+    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
+    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    api_base = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org')
+    
+    if not bot_token:
+        logger.error("TELEGRAM_BOT_TOKEN environment variable not set")
         return False
+    
+    if not chat_id:
+        logger.error("TELEGRAM_CHAT_ID environment variable not set")
+        return False
+    
+    # Initialize components
+    telegram_bot = TelegramBot(bot_token, chat_id, load_subscriber_chat_ids(), api_base=api_base)
+    data_loader = DataLoader(args.data_dir)
+    
+    if args.mode == 'alerts':
+        return send_alerts(telegram_bot, data_loader)
+    return send_daily_notification(telegram_bot, data_loader)
 
 
 if __name__ == "__main__":
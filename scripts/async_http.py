@@ -0,0 +1,344 @@
+"""
+Asyncio HTTP backend for DeFi Prime Rate analysis project.
+
+Implements the contracts of `utils.fetch_pool_chart_data` and
+`utils.safe_api_request` on an event loop, so hundreds of pool history downloads can be in flight at once and each one
+is parsed as soon as it arrives. A semaphore bounds the requests in flight,
+connections are pooled per host, and every request still goes through the
+same rate limiter, retry policy and response cache as the blocking backend,
+so both share one DeFiLlama budget. Cache lookups and stores touch the disk,
+so they run on a worker thread rather than on the loop.
+
+aiohttp is optional: without it each request is sent with a blocking
+requests session on a thread pool sized to the concurrency limit, which keeps
+the same contracts and bounds.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import (
+    API_ENDPOINTS, ASYNC_MAX_CONCURRENCY, ASYNC_CONNECTIONS_PER_HOST, COINGECKO_FREE_TIER_DELAY,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+)
+from http_cache import ResponseCache
+from metrics import METRICS
+from utils import (
+    DEFILLAMA_RATE_LIMITER, DEFILLAMA_RESPONSE_CACHE, DEFILLAMA_RETRY_POLICY, HTTP_TIMEOUT,
+    RateLimiter, RetryPolicy, accept_response, api_request_headers, check_api_response, check_cache,
+    create_http_session, endpoint_label, may_retry, parse_pool_chart_response, record_request_error,
+    record_retryable_status
+)
+
+# aiohttp gives true non-blocking sockets; fall back to requests on a thread pool without it
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+ChartJob = Tuple[str, Optional[str], Optional[date]]
+
+
+class AsyncHttpClient:
+    """
+    Async context manager sending GET requests with bounded concurrency.
+
+    `semaphore` bounds the requests in flight; connections are kept alive
+    and pooled per host. Responses are returned as fully read
+    `requests.Response` objects so the cache and response handling of the
+    blocking backend apply unchanged.
+    """
+
+    def __init__(self, max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+                 connections_per_host: int = ASYNC_CONNECTIONS_PER_HOST):
+        self.max_concurrency = max(1, max_concurrency)
+        self.connections_per_host = max(1, connections_per_host)
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.transport_errors: Tuple[type, ...] = (requests.RequestException,)
+        self._session = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def __aenter__(self) -> 'AsyncHttpClient':
+        # Created here so the semaphore belongs to the running loop (Python 3.9)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip, deflate'}
+
+        if aiohttp is not None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             limit_per_host=self.connections_per_host)
+            timeout = aiohttp.ClientTimeout(total=None, connect=HTTP_CONNECT_TIMEOUT,
+                                            sock_read=HTTP_READ_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+            self.transport_errors = (aiohttp.ClientError, asyncio.TimeoutError)
+            logger.debug("Asyncio HTTP backend using aiohttp, %d requests in flight",
+                         self.max_concurrency)
+        else:
+            self._session = create_http_session(pool_size=self.connections_per_host)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix='async_http')
+            logger.debug("Asyncio HTTP backend using requests on %d threads (aiohttp not installed)",
+                         self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._session is not None:
+            close = self._session.close()
+            if asyncio.iscoroutine(close):
+                await close
+            self._session = None
+
+    async def get(self, url: str, headers: dict = None, params: dict = None) -> requests.Response:
+        """
+        Send one GET request and read its body.
+
+        Args:
+            url: Request URL
+            headers: Extra request headers (optional)
+            params: Query parameters (optional)
+
+        Returns:
+            The response, with its body already read
+
+        Raises:
+            One of `transport_errors` if no response was obtained
+        """
+        if self._executor is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                partial(self._session.get, url, headers=headers, params=params, timeout=HTTP_TIMEOUT)
+            )
+
+        async with self._session.get(url, headers=headers, params=params) as resp:
+            body = await resp.read()
+            return _build_response(resp.status, resp.reason, resp.headers, body, str(resp.url))
+
+    async def run_blocking(self, func: Callable, *args):
+        """Run a blocking call, such as a cache lookup, on a worker thread instead of the loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+
+def _build_response(status: int, reason: Optional[str], headers, body: bytes, url: str) -> requests.Response:
+    """Wrap a downloaded aiohttp response in a requests Response."""
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response._content_consumed = True
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.reason = reason
+    response.encoding = get_encoding_from_headers(response.headers)
+    return response
+
+
+async def acquire_async(rate_limiter: RateLimiter) -> None:
+    """Wait for a token of a (thread-safe) rate limiter without blocking the event loop."""
+    while True:
+        wait_time = rate_limiter.try_acquire()
+        if wait_time <= 0:
+            return
+        await asyncio.sleep(wait_time)
+
+
+async def request_with_retry_async(client: AsyncHttpClient, url: str, headers: dict = None,
+                                   params: dict = None, max_attempts: Optional[int] = None,
+                                   rate_limiter: Optional[RateLimiter] = None,
+                                   retry_policy: Optional[RetryPolicy] = None,
+                                   cache: Optional[ResponseCache] = None,
+                                   label: str = None) -> Optional[requests.Response]:
+    """
+    Asyncio counterpart of `utils.request_with_retry` (without streaming).
+
+    A request holds one of the client's slots while it waits for the rate
+    limiter and while it is in flight, but not during backoff.
+
+    Args:
+        client: Open client to send the request with
+        url: Request URL
+        headers: Extra request headers (optional)
+        params: Query parameters (optional)
+        max_attempts: Attempts for this request, defaults to the policy's
+        rate_limiter: Limiter to acquire before each attempt (optional)
+        retry_policy: Shared policy; a fresh default policy is used if omitted
+        cache: Response cache to serve from and store into (optional)
+        label: Name used in log messages (optional)
+
+    Returns:
+        The last response received, or None if no response was obtained
+    """
+    policy = retry_policy or RetryPolicy()
+    attempts = max_attempts or policy.max_attempts
+    label = label or url
+    endpoint = endpoint_label(url)
+    response = None
+
+    cached_response, entry, headers = await client.run_blocking(check_cache, cache, url, params,
+                                                                headers, endpoint)
+    if cached_response is not None:
+        return cached_response
+
+    for attempt in range(attempts):
+        if not policy.allow_request():
+            logger.warning("Circuit breaker open, not requesting %s", label)
+            break
+
+        retry_after = None
+        async with client.semaphore:
+            if rate_limiter:
+                await acquire_async(rate_limiter)
+
+            try:
+                with METRICS.span('http_request', endpoint=endpoint) as span:
+                    span['attempt'] = attempt + 1
+                    response = await client.get(url, headers=headers, params=params)
+                    span['status'] = response.status_code
+            except client.transport_errors as e:
+                record_request_error(e, policy, endpoint, label, attempt)
+                response = None
+
+        if response is not None:
+            if response.status_code not in policy.RETRY_STATUS_CODES:
+                return await client.run_blocking(accept_response, response, policy, cache, entry,
+                                                 url, params, endpoint)
+            retry_after = record_retryable_status(response, policy, endpoint, label, attempt)
+
+        if not may_retry(policy, attempt, attempts, label, endpoint):
+            break
+
+        delay = policy.backoff_delay(attempt, retry_after)
+        logger.info("Retrying %s in %.1f seconds", label, delay)
+        await asyncio.sleep(delay)
+
+    return response
+
+
+async def fetch_pool_chart_data_async(client: AsyncHttpClient, pool_id: str, pool_name: str = None,
+                                      days: int = 360, since: Optional[date] = None,
+                                      rate_limiter: Optional[RateLimiter] = DEFILLAMA_RATE_LIMITER,
+                                      retry_policy: Optional[RetryPolicy] = DEFILLAMA_RETRY_POLICY,
+                                      cache: Optional[ResponseCache] = DEFILLAMA_RESPONSE_CACHE
+                                      ) -> Optional[pd.DataFrame]:
+    """
+    Asyncio counterpart of `utils.fetch_pool_chart_data`.
+
+    Args:
+        client: Open client to send the request with
+        pool_id: Pool ID from DeFiLlama
+        pool_name: Pool name for logging (optional)
+        days: Number of days of historical data to fetch
+        since: Only keep rows dated on or after this date (optional)
+        rate_limiter: Limiter to acquire before each request (optional)
+        retry_policy: Retry policy shared across requests (optional)
+        cache: Response cache for the chart endpoint (optional)
+
+    Returns:
+        DataFrame with historical APY and TVL data, or None if failed
+    """
+    display_name = pool_name or pool_id
+
+    try:
+        logger.debug("Fetching data for %s", display_name)
+        url = f"{API_ENDPOINTS['defi_llama_chart']}{pool_id}"
+        response = await request_with_retry_async(client, url, rate_limiter=rate_limiter,
+                                                  retry_policy=retry_policy, cache=cache,
+                                                  label=display_name)
+        return parse_pool_chart_response(response, display_name, days, since)
+    except Exception as e:
+        logger.warning("Error fetching chart data for %s: %s", display_name, e)
+        return None
+
+
+async def safe_api_request_async(client: AsyncHttpClient, url: str, max_retries: int = 3,
+                                 is_coingecko: bool = False, api_key: str = None, params: dict = None,
+                                 rate_limiter: Optional[RateLimiter] = None,
+                                 retry_policy: Optional[RetryPolicy] = None,
+                                 cache: Optional[ResponseCache] = None) -> Optional[requests.Response]:
+    """
+    Asyncio counterpart of `utils.safe_api_request`.
+
+    Failures are logged and None is returned; nothing is raised.
+
+    Args:
+        client: Open client to send the request with
+        url: API endpoint URL
+        max_retries: Maximum number of attempts
+        is_coingecko: Whether this is a CoinGecko API call (requires special handling)
+        api_key: CoinGecko Pro API key if available
+        params: Query parameters for the request
+        rate_limiter: Limiter to acquire before each attempt (optional)
+        retry_policy: Retry policy shared across requests (optional)
+        cache: Response cache to serve from and store into (optional)
+
+    Returns:
+        Response object or None if failed
+    """
+    headers = api_request_headers(url, api_key)
+    response = await request_with_retry_async(client, url, headers=headers, params=params,
+                                              max_attempts=max_retries, rate_limiter=rate_limiter,
+                                              retry_policy=retry_policy, cache=cache)
+    response = check_api_response(url, response)
+
+    if response is not None and is_coingecko:
+        await asyncio.sleep(COINGECKO_FREE_TIER_DELAY)
+
+    return response
+
+
+def fetch_pool_charts(jobs: Iterable[ChartJob], days: int,
+                      on_result: Callable[[str, Optional[pd.DataFrame]], None],
+                      max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+                      connections_per_host: int = ASYNC_CONNECTIONS_PER_HOST) -> None:
+    """
+    Download many pool histories concurrently on an event loop.
+
+    Blocks until every history has been handled. `on_result` is called in
+    the calling thread as each history arrives, in completion order.
+
+    Args:
+        jobs: (pool ID, pool name, since date) of each pool to fetch
+        days: Number of days of historical data to fetch
+        on_result: Called with the pool ID and its DataFrame (None if failed)
+        max_concurrency: Maximum number of requests in flight
+        connections_per_host: Keep-alive connections kept per host
+    """
+    asyncio.run(_fetch_pool_charts(list(jobs), days, on_result, max_concurrency, connections_per_host))
+
+
+async def _fetch_pool_charts(jobs: List[ChartJob], days: int,
+                             on_result: Callable[[str, Optional[pd.DataFrame]], None],
+                             max_concurrency: int, connections_per_host: int) -> None:
+    """Fetch the pool histories of `fetch_pool_charts` inside the running loop."""
+    async with AsyncHttpClient(max_concurrency, connections_per_host) as client:
+        async def fetch(pool_id: str, pool_name: Optional[str],
+                        since: Optional[date]) -> Tuple[str, Optional[pd.DataFrame]]:
+            return pool_id, await fetch_pool_chart_data_async(client, pool_id, pool_name, days, since=since)
+
+        for next_done in asyncio.as_completed([fetch(*job) for job in jobs]):
+            pool_id, df = await next_done
+            on_result(pool_id, df)
+
+
+# Export commonly used items
+__all__ = [
+    'AsyncHttpClient',
+    'acquire_async',
+    'request_with_retry_async',
+    'fetch_pool_chart_data_async',
+    'safe_api_request_async',
+    'fetch_pool_charts',
+]
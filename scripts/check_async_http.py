@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Offline check of the asyncio API request wrapper.
+
+Serves a few fixed responses from an in-process stub server and checks that
+`async_http.safe_api_request_async` keeps the contract of
+`utils.safe_api_request`: failures are logged, the last response is returned,
+and an endpoint that is still rate limiting or cannot be reached yields None
+instead of raising. Runs on aiohttp when it is installed, otherwise on the
+requests fallback.
+
+Usage:
+    python scripts/check_async_http.py
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import async_http  # noqa: E402
+from utils import RetryPolicy, safe_api_request  # noqa: E402
+
+STATUSES = {'/ok': 200, '/missing': 404, '/throttled': 429, '/down': 503}
+
+
+class StubApi(BaseHTTPRequestHandler):
+    """Answers each path with a fixed status and a small JSON body."""
+
+    def do_GET(self):
+        status = STATUSES.get(self.path.split('?')[0], 404)
+        body = b'{"data": []}' if status == 200 else b'{"error": "stub"}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check(condition: bool, description: str) -> None:
+    """Print a passed check, or stop at the first failed one."""
+    if not condition:
+        raise SystemExit(f"FAIL: {description}")
+    print(f"ok    {description}")
+
+
+def quick_policy() -> RetryPolicy:
+    """A fresh policy with short backoffs, so one request's failures do not open the circuit for the next."""
+    return RetryPolicy(base_delay=0.05, max_delay=0.1, retry_budget=None, failure_threshold=100)
+
+
+def status_of(response) -> Optional[int]:
+    """Status code of a response, or None if there was none."""
+    return None if response is None else response.status_code
+
+
+async def request_all(urls: List[str]) -> List[Optional[int]]:
+    """Send each request in turn through one client and return the status codes."""
+    async with async_http.AsyncHttpClient(max_concurrency=4) as client:
+        return [status_of(await async_http.safe_api_request_async(client, url, max_retries=2,
+                                                                  retry_policy=quick_policy()))
+                for url in urls]
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    # A port that was just released, so connections to it are refused
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed = f"http://127.0.0.1:{sock.getsockname()[1]}/ok"
+
+    print(f"Backend: {'aiohttp' if async_http.aiohttp is not None else 'requests on a thread pool'}")
+    urls = [f"{base}/ok", f"{base}/missing", f"{base}/throttled", f"{base}/down", closed]
+    results = asyncio.run(request_all(urls))
+    expected = [status_of(safe_api_request(url, max_retries=2, retry_policy=quick_policy())) for url in urls]
+    server.shutdown()
+
+    ok, missing, throttled, down, unreachable = results
+    check(ok == 200, "a successful response is returned")
+    check(missing == 404, "a non-retryable error response is returned for the caller to inspect")
+    check(throttled is None, "a response still rate limited after the retries yields None")
+    check(down == 503, "a server error on every attempt returns the last response")
+    check(unreachable is None, "an unreachable endpoint yields None instead of raising")
+    check(results == expected, "results match utils.safe_api_request")
+    print("All async request checks passed")
+
+
+if __name__ == "__main__":
+    main()
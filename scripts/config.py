@@ -5,9 +5,13 @@ This module contains all constants, API endpoints, plotting styles, and configur
 settings used across the project to ensure consistency and eliminate duplication.
 """
 
+import json
+import logging
 import logging.config
-from typing import Dict, List
-import matplotlib.pyplot as plt
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
 # API Configuration
 API_ENDPOINTS = {
@@ -22,6 +26,12 @@ DEFAULT_DB_FILENAME = "data/defi_prime_rate.db"
 DEFAULT_JSON_FILENAME = "data/defi_prime_rate.json"
 DEFAULT_JSON_DATA_FILENAME = "data/pool_data.json"
 DEFAULT_JSON_METADATA_FILENAME = "data/pool_metadata.json"
+DEFAULT_JSON_COLUMNAR_FILENAME = "data/pool_data.columnar.json"
+DEFAULT_JSON_PRIME_RATE_FILENAME = "data/prime_rate.json"
+DEFAULT_JSON_POOL_CONTRIBUTIONS_FILENAME = "data/pool_contributions.json"
+DEFAULT_JSON_PROTOCOL_CONTRIBUTIONS_FILENAME = "data/protocol_contributions.json"
+DEFAULT_JSON_CHAIN_CONTRIBUTIONS_FILENAME = "data/chain_contributions.json"
+DEFAULT_MANIFEST_FILENAME = "data/manifest.json"
 
 # Pool Configuration
 SPECIFIC_POOL_IDS = [
@@ -34,22 +44,72 @@ POOL_NAMES = {
     "f981a304-bb6c-45b8-b0c5-fd2f515ad23a": "USDT"
 }
 
+# Pool Selection Configuration
+POOL_EXCLUDED_PROJECTS = ['merkl']  # Yield farming aggregators double count underlying pools
+POOL_EXCLUDE_ZERO_APY = True
+POOL_MIN_TVL_USD = 0.0
+POOL_MIN_APY = None  # Minimum APY in percent, None to disable
+POOL_CHAIN_ALLOWLIST = None  # e.g. ['Ethereum', 'Base'], None for all chains
+POOL_SYMBOL_PATTERNS = None  # Shell-style patterns such as ['USD*', '*DAI*'], None for all
+
 # Logo Configuration
 DEFAULT_LOGO_PATH = "public/512m_logo.png"
 DEFAULT_LOGO_ALPHA = 0.05
 
 # Data Fetching Configuration
 DEFAULT_FETCH_DAYS = 700
-RATE_LIMIT_DELAY = 2.0  # Increased from 0.5 to 2.0 seconds for free tier
-RATE_LIMIT_RETRY_DELAY = 5  # Increased from 2 to 5 seconds for free tier
 COINGECKO_FREE_TIER_DELAY = 1.5  # Additional delay specifically for CoinGecko free tier
 
+# Concurrent Fetching Configuration
+FETCH_MAX_WORKERS = 8  # Parallel pool history downloads
+DEFILLAMA_REQUESTS_PER_SECOND = 4.0  # Global DeFiLlama budget shared by all workers
+DEFILLAMA_RATE_LIMIT_BURST = 8  # Requests allowed back-to-back before throttling
+
+# HTTP Session Configuration
+HTTP_CONNECT_TIMEOUT = 10  # Seconds to establish a connection
+HTTP_READ_TIMEOUT = 60  # Seconds to wait between bytes of a response
+HTTP_POOL_SIZE = FETCH_MAX_WORKERS  # Keep-alive connections kept per host, grown to match --workers
+HTTP_CONNECTION_RETRIES = 3  # Transport-level retries for failed connection attempts
+HTTP_RETRY_BACKOFF = 0.5  # Backoff factor between transport-level retries
+HTTP_STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read at a time from streamed responses
+
+# HTTP Backend Configuration
+HTTP_BACKEND = "requests"  # "requests" (worker threads) or "asyncio" (event loop, aiohttp if installed)
+ASYNC_MAX_CONCURRENCY = 64  # Requests in flight at once with the asyncio backend
+ASYNC_CONNECTIONS_PER_HOST = 16  # Keep-alive connections kept per host by the asyncio backend
+
+# Retry Policy Configuration
+RETRY_MAX_ATTEMPTS = 4  # Attempts per request, including the first one
+RETRY_BASE_DELAY = 2.0  # Base of the exponential backoff (seconds)
+RETRY_MAX_DELAY = 60.0  # Upper bound for a single backoff or Retry-After wait
+RETRY_BUDGET = 50  # Retries allowed per run across all requests
+CIRCUIT_BREAKER_THRESHOLD = 5  # Consecutive 5xx/connection failures before the circuit opens
+CIRCUIT_BREAKER_COOLDOWN = 60.0  # Seconds the circuit stays open before a trial request
+
+# HTTP Response Cache Configuration
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_DIR = ".cache/http"
+HTTP_CACHE_TTL = 3600  # Seconds a cached response is served without revalidation (under the 4-hour schedule)
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Least recently used entries are evicted beyond this
+
+# Metrics Configuration
+METRICS_PREFIX = "spr_fetcher"  # Prefix of exported Prometheus metric names
+METRICS_JSONL_FILENAME = "logs/fetcher_metrics.jsonl"  # Spans and run summaries, one JSON object per line
+METRICS_PROMETHEUS_FILENAME = None  # e.g. "/var/lib/node_exporter/textfile_collector/spr_fetcher.prom"
+
+# Logging Configuration
+LOG_LEVEL = "INFO"  # DEBUG shows every request and per-pool message
+LOG_FORMAT = "text"  # "text" or "json" (one JSON object per line)
+LOG_REPEAT_BURST = 5  # Messages with the same template logged per period before suppression
+LOG_REPEAT_PERIOD = 60.0  # Seconds after which suppressed messages are summarised
+
 # Analysis Configuration
 ROLLING_WINDOW_SIZES = {
     'short': 14,
     'medium': 30,
     'long': 90
 }
+CONTRIBUTION_TOP_POOLS = 7  # Pools shown individually in the contributions over time chart
 
 # Display Configuration
 DISPLAY_POOL_NAMES = {
@@ -64,6 +124,89 @@ DISPLAY_POOL_NAMES = {
     '13': 'Fluid USDC'
 }
 
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RepeatedMessageFilter(logging.Filter):
+    """
+    Rate-limit records that share a message template.
+
+    Per-pool messages such as "Error fetching chart data for %s" are logged
+    for the first `burst` pools in each `period`; the last of those notes
+    that further ones are suppressed, and the first record let through in a
+    later period reports how many were.
+    """
+
+    def __init__(self, burst: int = 5, period: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._windows: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(key, [now, 0, 0])  # [window start, logged, suppressed]
+            if now - window[0] >= self.period:
+                if window[2]:
+                    record.msg = f"{record.msg} ({window[2]} similar messages suppressed)"
+                window[:] = [now, 0, 0]
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[1] == self.burst:
+                record.msg = f"{record.msg} (suppressing similar messages for {self.period:.0f}s)"
+        return True
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None) -> None:
+    """
+    Configure the root logger for the command line scripts.
+
+    Args:
+        level: Log level name, defaults to LOG_LEVEL
+        log_format: "text" or "json", defaults to LOG_FORMAT
+    """
+    json_format = (log_format or LOG_FORMAT) == 'json'
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'text': {'format': '%(asctime)s %(levelname)-7s %(name)s: %(message)s',
+                     'datefmt': '%Y-%m-%d %H:%M:%S'},
+            'json': {'()': JsonFormatter}
+        },
+        'filters': {
+            'repeated': {'()': RepeatedMessageFilter, 'burst': LOG_REPEAT_BURST, 'period': LOG_REPEAT_PERIOD}
+        },
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'formatter': 'json' if json_format else 'text',
+                'filters': ['repeated']
+            }
+        },
+        'root': {'level': (level or LOG_LEVEL).upper(), 'handlers': ['console']},
+        # Connection pool chatter is only useful when debugging the HTTP layer
+        'loggers': {'urllib3': {'level': 'WARNING'}}
+    })
+
+
 # Export commonly used items
 __all__ = [
     'API_ENDPOINTS',
@@ -71,11 +214,54 @@ __all__ = [
     'DEFAULT_JSON_FILENAME',
     'DEFAULT_JSON_DATA_FILENAME',
     'DEFAULT_JSON_METADATA_FILENAME',
+    'DEFAULT_JSON_COLUMNAR_FILENAME',
+    'DEFAULT_JSON_PRIME_RATE_FILENAME',
+    'DEFAULT_JSON_POOL_CONTRIBUTIONS_FILENAME',
+    'DEFAULT_JSON_PROTOCOL_CONTRIBUTIONS_FILENAME',
+    'DEFAULT_JSON_CHAIN_CONTRIBUTIONS_FILENAME',
+    'DEFAULT_MANIFEST_FILENAME',
     'SPECIFIC_POOL_IDS',
     'POOL_NAMES',
+    'POOL_EXCLUDED_PROJECTS',
+    'POOL_EXCLUDE_ZERO_APY',
+    'POOL_MIN_TVL_USD',
+    'POOL_MIN_APY',
+    'POOL_CHAIN_ALLOWLIST',
+    'POOL_SYMBOL_PATTERNS',
     'DEFAULT_FETCH_DAYS',
-    'RATE_LIMIT_DELAY',
-    'RATE_LIMIT_RETRY_DELAY',
+    'FETCH_MAX_WORKERS',
+    'DEFILLAMA_REQUESTS_PER_SECOND',
+    'DEFILLAMA_RATE_LIMIT_BURST',
+    'HTTP_CONNECT_TIMEOUT',
+    'HTTP_READ_TIMEOUT',
+    'HTTP_POOL_SIZE',
+    'HTTP_CONNECTION_RETRIES',
+    'HTTP_RETRY_BACKOFF',
+    'HTTP_STREAM_CHUNK_SIZE',
+    'HTTP_BACKEND',
+    'ASYNC_MAX_CONCURRENCY',
+    'ASYNC_CONNECTIONS_PER_HOST',
+    'RETRY_MAX_ATTEMPTS',
+    'RETRY_BASE_DELAY',
+    'RETRY_MAX_DELAY',
+    'RETRY_BUDGET',
+    'CIRCUIT_BREAKER_THRESHOLD',
+    'CIRCUIT_BREAKER_COOLDOWN',
+    'HTTP_CACHE_ENABLED',
+    'HTTP_CACHE_DIR',
+    'HTTP_CACHE_TTL',
+    'HTTP_CACHE_MAX_BYTES',
+    'METRICS_PREFIX',
+    'METRICS_JSONL_FILENAME',
+    'METRICS_PROMETHEUS_FILENAME',
+    'LOG_LEVEL',
+    'LOG_FORMAT',
+    'LOG_REPEAT_BURST',
+    'LOG_REPEAT_PERIOD',
     'ROLLING_WINDOW_SIZES',
+    'CONTRIBUTION_TOP_POOLS',
     'DISPLAY_POOL_NAMES',
+    'JsonFormatter',
+    'RepeatedMessageFilter',
+    'configure_logging',
 ]
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Contribution aggregates for DeFi Prime Rate analysis project.
+
+Each pool contributes APY x TVL to the TVL-weighted prime rate. These
+functions compute the breakdowns shown by the contribution charts (per pool
+over time, per protocol and per chain) once per fetch run, so the Plotly
+pages download small precomputed artifacts instead of recomputing them from
+the full dataset in the browser.
+"""
+
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config import CONTRIBUTION_TOP_POOLS
+
+# Contribution percentages are only displayed to two decimals (%{y:.2f} in the chart hover)
+CONTRIBUTION_DECIMALS = 2
+
+
+def pool_display_name(project: str, symbol: str) -> str:
+    """Build the chart label for a pool, e.g. 'Aave v3 USDC'."""
+    project = re.sub(r'\b\w', lambda m: m.group().upper(), str(project).replace('-', ' ', 1), flags=re.ASCII)
+    return f"{project} {str(symbol).upper()}"
+
+
+def protocol_display_name(protocol: str) -> str:
+    """Build the chart label for a protocol, e.g. 'Spark Savings'."""
+    return ' '.join(word[:1].upper() + word[1:] for word in str(protocol).split('-'))
+
+
+def pool_contributions_over_time(merged_df: pd.DataFrame, pool_metadata: List[Dict[str, Any]],
+                                 top_n: int = CONTRIBUTION_TOP_POOLS) -> Dict[str, Any]:
+    """
+    Compute each pool's share of the prime rate per date, keeping the top contributors.
+
+    A pool's share on a date is apy * tvl / (weighted_apy * total_tvl) * 100,
+    and 0 where it has no data or the date has no positive rate or TVL. Pools
+    are ranked by their mean share over all dates; the remainder of the top
+    `top_n` is reported as a single 'other' series.
+
+    Args:
+        merged_df: Merged DataFrame with apy_/tvlUsd_ columns and weighted_apy
+        pool_metadata: Pool metadata dictionaries, for chart labels
+        top_n: Number of pools to report individually
+
+    Returns:
+        Dictionary with dates, the top pools' series (largest first) and the
+        'other' series, all in percent
+    """
+    pool_ids = [col[4:] for col in merged_df.columns
+                if col.startswith('apy_') and f'tvlUsd_{col[4:]}' in merged_df.columns]
+    apy = merged_df[[f'apy_{pool_id}' for pool_id in pool_ids]].to_numpy(dtype=float)
+    tvl = merged_df[[f'tvlUsd_{pool_id}' for pool_id in pool_ids]].to_numpy(dtype=float)
+    weighted_apy = merged_df['weighted_apy'].to_numpy(dtype=float)
+
+    total_tvl = np.nansum(tvl, axis=1)
+    date_ok = (total_tvl > 0) & (weighted_apy > 0)
+    valid = ~np.isnan(apy) & ~np.isnan(tvl) & date_ok[:, None]
+
+    denominator = np.where(date_ok, weighted_apy * total_tvl, 1.0)[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = np.where(valid, apy * tvl / denominator * 100, 0.0)
+    shares = np.nan_to_num(shares, nan=0.0, posinf=0.0, neginf=0.0)
+
+    mean_shares = shares.mean(axis=0) if len(shares) else np.zeros(len(pool_ids))
+    ranked = [i for i in np.argsort(-mean_shares, kind='stable') if mean_shares[i] > 0][:top_n]
+
+    metadata = {pool['pool_id']: pool for pool in pool_metadata}
+    pools = []
+    for i in ranked:
+        pool = metadata.get(pool_ids[i], {})
+        pools.append({
+            'pool_id': pool_ids[i],
+            'display_name': pool_display_name(pool.get('project', ''), pool.get('symbol', ''))
+                            if pool else f"Pool_{pool_ids[i]}",
+            'project': pool.get('project'),
+            'symbol': pool.get('symbol'),
+            'chain': pool.get('chain'),
+            'avg_contribution': float(mean_shares[i]),
+            'contributions': np.round(shares[:, i], CONTRIBUTION_DECIMALS).tolist()
+        })
+
+    other = 100 - shares[:, ranked].sum(axis=1)
+    return {
+        'format': 'pool-contributions-v1',
+        'top_n': top_n,
+        'dates': [str(date) for date in merged_df.index],
+        'pools': pools,
+        'other': np.round(other, CONTRIBUTION_DECIMALS).tolist()
+    }
+
+
+def group_contributions(pool_metadata: List[Dict[str, Any]], by: str) -> Dict[str, Any]:
+    """
+    Aggregate the current APY x TVL contributions of pools by a metadata field.
+
+    Args:
+        pool_metadata: Pool metadata dictionaries with current_tvl and current_apy
+        by: Field to group by ('project' or 'chain')
+
+    Returns:
+        Dictionary with the total contribution and per-group rows sorted by
+        contribution (largest first); groups contributing nothing are left out
+    """
+    pools = pd.DataFrame(pool_metadata, columns=['pool_id', 'project', 'chain', 'current_tvl', 'current_apy'])
+    pools['tvl'] = pd.to_numeric(pools['current_tvl'], errors='coerce').fillna(0.0)
+    pools['apy'] = pd.to_numeric(pools['current_apy'], errors='coerce').fillna(0.0)
+    pools['contribution'] = pools['tvl'] * pools['apy']
+    total_contribution = float(pools['contribution'].sum())
+
+    groups = pools.groupby(by, sort=False).agg(
+        contribution=('contribution', 'sum'),
+        total_tvl=('tvl', 'sum'),
+        pool_count=('pool_id', 'size'),
+        chains=('chain', lambda chains: list(dict.fromkeys(chains)))
+    )
+    groups = groups[groups['contribution'] > 0].sort_values('contribution', ascending=False, kind='stable')
+
+    rows = []
+    for name, group in groups.iterrows():
+        row = {
+            by: name,
+            'contribution': float(group['contribution']),
+            'percentage': float(group['contribution'] / total_contribution * 100),
+            'total_tvl': float(group['total_tvl']),
+            'pool_count': int(group['pool_count']),
+            'avg_apy': float(group['contribution'] / group['total_tvl'])
+        }
+        if by == 'project':
+            row['display_name'] = protocol_display_name(name)
+            row['chain_count'] = len(group['chains'])
+            row['chains'] = group['chains']
+        rows.append(row)
+
+    return {
+        'format': f"{'protocol' if by == 'project' else by}-contributions-v1",
+        'total_contribution': total_contribution,
+        'contributions': rows
+    }
+
+
+# Export commonly used items
+__all__ = [
+    'CONTRIBUTION_DECIMALS',
+    'pool_display_name',
+    'protocol_display_name',
+    'pool_contributions_over_time',
+    'group_contributions',
+]
@@ -0,0 +1,466 @@
+"""
+SQLite storage for DeFi Prime Rate analysis project.
+
+Pool history is stored in long/narrow form so that per-pool and per-date
+range queries are index lookups and the number of pools is not bounded by
+SQLite's column limit:
+
+    pools(pool_id PK, name, chain, project, symbol, current_tvl,
+          current_apy, rank, active, last_updated)
+    pool_observations(pool_id, date, apy, tvl_usd, PK(pool_id, date))
+    prime_rate(date PK, weighted_apy, ma_apy_14d)
+
+Databases written with the previous wide `pool_data` / `pool_metadata`
+tables are migrated in place the first time they are opened for writing.
+Readers open the file read-only and never create or migrate anything.
+
+Writes are upserts inside a single transaction and the database runs in WAL
+mode, so readers keep seeing the previous complete dataset while a run is
+saving and only rows whose values changed are rewritten. VACUUM is left to
+the explicit `vacuum_database` maintenance command.
+"""
+
+import logging
+import os
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pools (
+    pool_id TEXT PRIMARY KEY,
+    name TEXT,
+    chain TEXT,
+    project TEXT,
+    symbol TEXT,
+    current_tvl REAL,
+    current_apy REAL,
+    rank INTEGER,
+    active INTEGER NOT NULL DEFAULT 1,
+    last_updated TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pool_observations (
+    pool_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    apy REAL,
+    tvl_usd REAL,
+    PRIMARY KEY (pool_id, date)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_pool_observations_date ON pool_observations (date);
+
+CREATE TABLE IF NOT EXISTS prime_rate (
+    date TEXT PRIMARY KEY,
+    weighted_apy REAL,
+    ma_apy_14d REAL
+);
+"""
+
+# Stored in PRAGMA user_version once the schema has been created and migrated
+SCHEMA_VERSION = 1
+
+_UPSERT_OBSERVATION = """
+INSERT INTO pool_observations (pool_id, date, apy, tvl_usd) VALUES (?, ?, ?, ?)
+ON CONFLICT (pool_id, date) DO UPDATE SET apy = excluded.apy, tvl_usd = excluded.tvl_usd
+WHERE apy IS NOT excluded.apy OR tvl_usd IS NOT excluded.tvl_usd
+"""
+
+_UPSERT_PRIME_RATE = """
+INSERT INTO prime_rate (date, weighted_apy, ma_apy_14d) VALUES (?, ?, ?)
+ON CONFLICT (date) DO UPDATE SET weighted_apy = excluded.weighted_apy, ma_apy_14d = excluded.ma_apy_14d
+WHERE weighted_apy IS NOT excluded.weighted_apy OR ma_apy_14d IS NOT excluded.ma_apy_14d
+"""
+
+POOL_COLUMNS = ['pool_id', 'name', 'chain', 'project', 'symbol', 'current_tvl',
+                'current_apy', 'rank', 'active', 'last_updated']
+
+DateLike = Union[str, date, pd.Timestamp]
+
+
+def connect(db_filename: str, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Open a database for reading or writing.
+
+    A read-only connection opens an existing file as is. A writer creates the
+    file, and the first time it opens a database it switches it to WAL mode,
+    creates the schema and migrates legacy tables; later writers only check
+    the stored schema version.
+
+    Args:
+        db_filename: SQLite database filename
+        readonly: Open the database read-only
+
+    Returns:
+        Open SQLite connection
+
+    Raises:
+        sqlite3.OperationalError: If a read-only database does not exist
+    """
+    if readonly:
+        return sqlite3.connect(f"{Path(db_filename).resolve().as_uri()}?mode=ro", uri=True)
+
+    db_dir = os.path.dirname(db_filename)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+        logger.info("Created directory: %s", db_dir)
+
+    conn = sqlite3.connect(db_filename)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        initialize_schema(conn)
+    return conn
+
+
+def initialize_schema(conn: sqlite3.Connection) -> None:
+    """
+    Switch a database to WAL mode, create the schema and migrate legacy tables.
+
+    Args:
+        conn: Open SQLite connection
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    migrate_legacy_schema(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    """Check whether a table exists."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    return row is not None
+
+
+def _date_str(value: DateLike) -> str:
+    """Format a date-like value as YYYY-MM-DD."""
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def _nullable(values: np.ndarray) -> List[Any]:
+    """Convert a float array to a list with NaN replaced by None."""
+    return [None if v != v else float(v) for v in values.tolist()]
+
+
+def migrate_legacy_schema(conn: sqlite3.Connection) -> None:
+    """
+    Convert the legacy wide `pool_data` / `pool_metadata` tables to the long schema.
+
+    Does nothing if there is no legacy table or the observations table
+    already holds data.
+
+    Args:
+        conn: Open SQLite connection with the current schema created
+    """
+    if not _table_exists(conn, 'pool_data'):
+        return
+    if conn.execute("SELECT 1 FROM pool_observations LIMIT 1").fetchone() is not None:
+        return
+
+    logger.info("Migrating legacy wide pool_data table to pool_observations")
+    wide_df = pd.read_sql('SELECT * FROM pool_data', conn)
+    index_col = 'date' if 'date' in wide_df.columns else wide_df.columns[0]
+    wide_df = wide_df.set_index(index_col)
+
+    metadata = []
+    if _table_exists(conn, 'pool_metadata'):
+        metadata = pd.read_sql('SELECT * FROM pool_metadata', conn).to_dict('records')
+
+    with conn:
+        _write_observations(conn, wide_df)
+        _write_prime_rate(conn, wide_df)
+        _write_pools(conn, metadata)
+        conn.execute("DROP TABLE IF EXISTS pool_data")
+        conn.execute("DROP TABLE IF EXISTS pool_metadata")
+
+    logger.info("Migrated %d pools and %d dates", len(metadata), len(wide_df))
+
+
+def _pool_ids_from_columns(columns: Sequence[str]) -> List[str]:
+    """Pool IDs that have both an apy_ and a tvlUsd_ column, in column order."""
+    column_set = set(columns)
+    return [col[4:] for col in columns
+            if col.startswith('apy_') and f'tvlUsd_{col[4:]}' in column_set]
+
+
+def _write_observations(conn: sqlite3.Connection, merged_df: pd.DataFrame) -> int:
+    """Upsert the apy_/tvlUsd_ columns of a wide frame as observation rows."""
+    pool_ids = _pool_ids_from_columns(list(merged_df.columns))
+    if not pool_ids or merged_df.empty:
+        return 0
+
+    dates = np.array([_date_str(d) for d in merged_df.index], dtype=object)
+    apy = merged_df[[f'apy_{pool_id}' for pool_id in pool_ids]].to_numpy(dtype=float)
+    tvl = merged_df[[f'tvlUsd_{pool_id}' for pool_id in pool_ids]].to_numpy(dtype=float)
+
+    date_idx, pool_idx = np.nonzero(~(np.isnan(apy) & np.isnan(tvl)))
+    rows = list(zip(
+        np.array(pool_ids, dtype=object)[pool_idx].tolist(),
+        dates[date_idx].tolist(),
+        _nullable(apy[date_idx, pool_idx]),
+        _nullable(tvl[date_idx, pool_idx])
+    ))
+    conn.executemany(_UPSERT_OBSERVATION, rows)
+    return len(rows)
+
+
+def _write_prime_rate(conn: sqlite3.Connection, merged_df: pd.DataFrame) -> int:
+    """Upsert the weighted_apy / ma_apy_14d columns of a wide frame."""
+    if 'weighted_apy' not in merged_df.columns:
+        return 0
+
+    ma = merged_df['ma_apy_14d'] if 'ma_apy_14d' in merged_df.columns else pd.Series(np.nan, index=merged_df.index)
+    rows = list(zip(
+        [_date_str(d) for d in merged_df.index],
+        _nullable(merged_df['weighted_apy'].to_numpy(dtype=float)),
+        _nullable(ma.to_numpy(dtype=float))
+    ))
+    conn.executemany(_UPSERT_PRIME_RATE, rows)
+    return len(rows)
+
+
+def _write_pools(conn: sqlite3.Connection, pool_metadata: List[Dict[str, Any]]) -> int:
+    """
+    Upsert pool metadata rows, ranked in list order.
+
+    Pools that are stored but missing from `pool_metadata` are kept with
+    their history and marked inactive.
+    """
+    rows = [
+        (
+            pool['pool_id'], pool.get('name'), pool.get('chain'), pool.get('project'),
+            pool.get('symbol'), pool.get('current_tvl'), pool.get('current_apy'),
+            rank, 1, pool.get('last_updated')
+        )
+        for rank, pool in enumerate(pool_metadata, start=1)
+    ]
+    updates = ', '.join(f"{col} = excluded.{col}" for col in POOL_COLUMNS[1:])
+    changed = ' OR '.join(f"{col} IS NOT excluded.{col}" for col in POOL_COLUMNS[1:])
+    conn.executemany(
+        f"INSERT INTO pools ({', '.join(POOL_COLUMNS)}) VALUES ({', '.join('?' * len(POOL_COLUMNS))}) "
+        f"ON CONFLICT (pool_id) DO UPDATE SET {updates} WHERE {changed}",
+        rows
+    )
+
+    selected = {row[0] for row in rows}
+    stale = [(pool_id,) for (pool_id,) in conn.execute("SELECT pool_id FROM pools WHERE active = 1")
+             if pool_id not in selected]
+    conn.executemany("UPDATE pools SET active = 0, rank = NULL WHERE pool_id = ?", stale)
+    return len(rows)
+
+
+def save_pool_dataset(db_filename: str, merged_df: pd.DataFrame,
+                      pool_metadata: List[Dict[str, Any]], replace: bool = False) -> int:
+    """
+    Upsert a merged frame and its pool metadata in a single transaction.
+
+    Rows whose values are unchanged are left untouched, and dates outside the
+    frame keep their stored values. With `replace`, every stored row is
+    deleted first (still inside the transaction, so readers never see an
+    empty database).
+
+    Args:
+        db_filename: SQLite database filename
+        merged_df: Wide frame with apy_/tvlUsd_ columns and prime rate metrics
+        pool_metadata: Pool metadata dictionaries, in TVL rank order
+        replace: Discard all stored data before writing
+
+    Returns:
+        Number of rows inserted, updated or deleted
+    """
+    conn = connect(db_filename)
+    try:
+        changes_before = conn.total_changes
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM pool_observations")
+                conn.execute("DELETE FROM prime_rate")
+                conn.execute("DELETE FROM pools")
+            observations = _write_observations(conn, merged_df)
+            _write_prime_rate(conn, merged_df)
+            _write_pools(conn, pool_metadata)
+        changed = conn.total_changes - changes_before
+    finally:
+        conn.close()
+
+    logger.info("Upserted %d pool observations for %d pools (%d rows changed)",
+                observations, len(pool_metadata), changed)
+    return changed
+
+
+def vacuum_database(db_filename: str) -> None:
+    """
+    Checkpoint the WAL and rebuild the database file to reclaim free pages.
+
+    This rewrites the whole file, so it is only run as an explicit
+    maintenance step rather than on every save.
+
+    Args:
+        db_filename: SQLite database filename
+    """
+    size_before = os.path.getsize(db_filename) if os.path.exists(db_filename) else 0
+    conn = connect(db_filename)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    size_after = os.path.getsize(db_filename)
+    logger.info("Vacuumed %s: %.0f KB -> %.0f KB", db_filename, size_before / 1024, size_after / 1024)
+
+
+def load_pools(db_filename: str, active_only: bool = True) -> pd.DataFrame:
+    """
+    Load the pool dimension table.
+
+    Args:
+        db_filename: SQLite database filename
+        active_only: Only return pools in the current selection
+
+    Returns:
+        DataFrame of pool metadata ordered by TVL rank
+    """
+    conn = connect(db_filename, readonly=True)
+    try:
+        query = f"SELECT {', '.join(POOL_COLUMNS)} FROM pools"
+        if active_only:
+            query += " WHERE active = 1"
+        query += " ORDER BY rank IS NULL, rank, pool_id"
+        return pd.read_sql(query, conn)
+    finally:
+        conn.close()
+
+
+def load_pool_observations(db_filename: str, pool_ids: Optional[Sequence[str]] = None,
+                           start: Optional[DateLike] = None,
+                           end: Optional[DateLike] = None) -> pd.DataFrame:
+    """
+    Load observations in long form, optionally for some pools and a date range.
+
+    Args:
+        db_filename: SQLite database filename
+        pool_ids: Only return these pools (optional)
+        start: First date to include (optional)
+        end: Last date to include (optional)
+
+    Returns:
+        DataFrame with pool_id, date (datetime64), apy and tvl_usd columns
+    """
+    clauses = []
+    params: List[Any] = []
+    if pool_ids is not None:
+        if not pool_ids:
+            return pd.DataFrame(columns=['pool_id', 'date', 'apy', 'tvl_usd'])
+        clauses.append(f"pool_id IN ({', '.join('?' * len(pool_ids))})")
+        params.extend(pool_ids)
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(_date_str(start))
+    if end is not None:
+        clauses.append("date <= ?")
+        params.append(_date_str(end))
+
+    query = "SELECT pool_id, date, apy, tvl_usd FROM pool_observations"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY pool_id, date"
+
+    conn = connect(db_filename, readonly=True)
+    try:
+        df = pd.read_sql(query, conn, params=params)
+    finally:
+        conn.close()
+
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def load_prime_rate(db_filename: str, start: Optional[DateLike] = None,
+                    end: Optional[DateLike] = None) -> pd.DataFrame:
+    """
+    Load the prime rate series, optionally for a date range.
+
+    Args:
+        db_filename: SQLite database filename
+        start: First date to include (optional)
+        end: Last date to include (optional)
+
+    Returns:
+        DataFrame with weighted_apy and ma_apy_14d indexed by date
+    """
+    clauses = []
+    params: List[Any] = []
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(_date_str(start))
+    if end is not None:
+        clauses.append("date <= ?")
+        params.append(_date_str(end))
+
+    query = "SELECT date, weighted_apy, ma_apy_14d FROM prime_rate"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY date"
+
+    conn = connect(db_filename, readonly=True)
+    try:
+        df = pd.read_sql(query, conn, params=params)
+    finally:
+        conn.close()
+
+    return df.set_index(pd.DatetimeIndex(pd.to_datetime(df.pop('date')), name='date'))
+
+
+def load_pool_matrix(db_filename: str, start: Optional[DateLike] = None,
+                     end: Optional[DateLike] = None, active_only: bool = True) -> pd.DataFrame:
+    """
+    Load stored data as the wide frame produced by the fetcher.
+
+    Args:
+        db_filename: SQLite database filename
+        start: First date to include (optional)
+        end: Last date to include (optional)
+        active_only: Only include pools in the current selection
+
+    Returns:
+        DataFrame indexed by date with apy_<id>/tvlUsd_<id> columns in rank
+        order, followed by weighted_apy and ma_apy_14d
+    """
+    pool_ids = load_pools(db_filename, active_only)['pool_id'].tolist()
+    observations = load_pool_observations(db_filename, pool_ids if active_only else None, start, end)
+    prime_rate = load_prime_rate(db_filename, start, end)
+
+    if not active_only:
+        pool_ids += sorted(set(observations['pool_id']) - set(pool_ids))
+    if observations.empty:
+        return prime_rate
+
+    wide = observations.pivot(index='date', columns='pool_id', values=['apy', 'tvl_usd'])
+    wide = wide.reindex(columns=pd.MultiIndex.from_tuples(
+        [(col, pool_id) for pool_id in pool_ids for col in ('apy', 'tvl_usd')]
+    ))
+    wide.columns = [f"{'apy' if col == 'apy' else 'tvlUsd'}_{pool_id}" for col, pool_id in wide.columns]
+
+    merged_df = wide.join(prime_rate, how='outer')
+    merged_df.index.name = 'date'
+    return merged_df
+
+
+# Export commonly used items
+__all__ = [
+    'connect',
+    'initialize_schema',
+    'migrate_legacy_schema',
+    'save_pool_dataset',
+    'vacuum_database',
+    'load_pools',
+    'load_pool_observations',
+    'load_prime_rate',
+    'load_pool_matrix',
+]
@@ -0,0 +1,322 @@
+"""
+On-disk HTTP response cache for DeFi Prime Rate analysis project.
+
+Responses are stored per URL together with their validators (ETag and
+Last-Modified). Entries younger than the TTL are served without touching the
+network; older entries are revalidated with a conditional request and reused
+when the server answers 304 Not Modified.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe the wire encoding rather than the (decoded) stored body
+_SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class ResponseCache:
+    """
+    File-backed cache of GET responses keyed by URL and query parameters.
+
+    Each entry is a body file plus a small JSON file with validators and
+    timestamps. Once the cache grows past `max_bytes`, least recently used
+    entries are evicted. The directory is only scanned on the first store and
+    when a running estimate of its size passes `max_bytes`, and eviction then
+    goes down to `EVICT_LOW_WATER` of the limit, so storing many responses
+    does not rescan the directory on every store.
+    """
+
+    EVICT_LOW_WATER = 0.9
+
+    def __init__(self, cache_dir: str, ttl: float, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Bytes in the cache directory, None until it has been scanned; replaced entries are overcounted
+        self._estimated_bytes: Optional[int] = None
+
+    def _key(self, url: str, params: Optional[dict] = None) -> str:
+        """Build the cache key for a URL and its query parameters."""
+        raw = url
+        if params:
+            raw += '?' + '&'.join(f"{k}={params[k]}" for k in sorted(params))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        """Return the (body, metadata) file paths of an entry."""
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.body", f"{base}.json"
+
+    def lookup(self, url: str, params: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the cached entry for a request.
+
+        Args:
+            url: Request URL
+            params: Query parameters (optional)
+
+        Returns:
+            Entry metadata dictionary, or None if nothing usable is cached
+        """
+        body_path, meta_path = self._paths(self._key(url, params))
+        try:
+            with open(meta_path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not os.path.exists(body_path):
+            return None
+
+        entry['body_path'] = body_path
+        entry['meta_path'] = meta_path
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether an entry can be served without revalidation."""
+        return time.time() - entry['stored_at'] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Build the validator headers for revalidating an entry.
+
+        Args:
+            entry: Cached entry metadata
+
+        Returns:
+            Dictionary of If-None-Match / If-Modified-Since headers
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def build_response(self, entry: Dict[str, Any], url: str) -> Optional[requests.Response]:
+        """
+        Rebuild a 200 response from a cached entry.
+
+        Args:
+            entry: Cached entry metadata
+            url: Request URL
+
+        Returns:
+            Response object serving the cached body, or None if it vanished
+        """
+        try:
+            with open(entry['body_path'], 'rb') as f:
+                body = f.read()
+            os.utime(entry['body_path'])
+        except OSError:
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = body
+        response._content_consumed = True
+        response.from_cache = True
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.url = url
+        response.encoding = response.encoding or 'utf-8'
+        response.reason = 'OK (cached)'
+        return response
+
+    def store(self, url: str, params: Optional[dict], response: requests.Response) -> None:
+        """
+        Store a 200 response, replacing any previous entry for the request.
+
+        Args:
+            url: Request URL
+            params: Query parameters (optional)
+            response: Response whose body has been read
+        """
+        body_path, meta_path = self._paths(self._key(url, params))
+        entry = self._entry_metadata(url, response, len(response.content))
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._write_atomic(body_path, response.content)
+            self._write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+        except OSError as e:
+            logger.warning("Could not write cache entry for %s: %s", url, e)
+            return
+
+        self._account(len(response.content))
+
+    def store_stream(self, url: str, params: Optional[dict], response: requests.Response,
+                     chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass a streamed body through while writing it to the cache.
+
+        The entry is only committed once the stream has been read to the end,
+        so an interrupted download never leaves a truncated body behind.
+
+        Args:
+            url: Request URL
+            params: Query parameters (optional)
+            response: Streaming response the chunks belong to
+            chunks: Decoded body chunks
+
+        Yields:
+            The chunks, unchanged
+        """
+        body_path, meta_path = self._paths(self._key(url, params))
+        tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            f = open(tmp_path, 'wb')
+        except OSError as e:
+            logger.warning("Could not write cache entry for %s: %s", url, e)
+            yield from chunks
+            return
+
+        size = 0
+        completed = False
+        try:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+                yield chunk
+            completed = True
+        finally:
+            f.close()
+            if completed:
+                try:
+                    os.replace(tmp_path, body_path)
+                    entry = self._entry_metadata(url, response, size)
+                    self._write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+                except OSError as e:
+                    logger.warning("Could not write cache entry for %s: %s", url, e)
+                else:
+                    self._account(size)
+            else:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _entry_metadata(url: str, response: requests.Response, size: int) -> Dict[str, Any]:
+        """Build the metadata stored alongside a cached body."""
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _SKIPPED_HEADERS}
+        return {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+            'size': size,
+            'headers': headers
+        }
+
+    def refresh(self, entry: Dict[str, Any], response: requests.Response) -> None:
+        """
+        Mark an entry as revalidated after a 304 response.
+
+        Args:
+            entry: Cached entry metadata
+            response: The 304 response, which may carry updated validators
+        """
+        entry = dict(entry)
+        body_path = entry.pop('body_path')
+        meta_path = entry.pop('meta_path')
+        entry['stored_at'] = time.time()
+        entry['etag'] = response.headers.get('ETag', entry.get('etag'))
+        entry['last_modified'] = response.headers.get('Last-Modified', entry.get('last_modified'))
+
+        try:
+            self._write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+            os.utime(body_path)
+        except OSError as e:
+            logger.warning("Could not refresh cache entry for %s: %s", entry['url'], e)
+
+    def _account(self, size: int) -> None:
+        """Add a stored body to the size estimate, evicting once it passes max_bytes."""
+        with self._lock:
+            if self._estimated_bytes is None:
+                target_bytes = self.max_bytes
+            else:
+                self._estimated_bytes += size
+                if self._estimated_bytes <= self.max_bytes:
+                    return
+                target_bytes = int(self.max_bytes * self.EVICT_LOW_WATER)
+        self.evict(target_bytes)
+
+    def evict(self, target_bytes: Optional[int] = None) -> None:
+        """
+        Remove least recently used entries until the cache fits in a size.
+
+        Args:
+            target_bytes: Size to shrink the cache to, defaults to max_bytes
+        """
+        target_bytes = self.max_bytes if target_bytes is None else target_bytes
+        with self._lock:
+            try:
+                names = [name for name in os.listdir(self.cache_dir) if name.endswith('.body')]
+            except OSError:
+                self._estimated_bytes = 0
+                return
+
+            entries = []
+            total_size = 0
+            for name in names:
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+            entries.sort()
+            for _, size, body_path in entries:
+                if total_size <= target_bytes:
+                    break
+                for path in (body_path, body_path[:-len('.body')] + '.json'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total_size -= size
+            self._estimated_bytes = total_size
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            try:
+                names = os.listdir(self.cache_dir)
+            except OSError:
+                return
+            for name in names:
+                if name.endswith(('.body', '.json')):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+            self._estimated_bytes = None
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        """Write a file through a temporary name so readers never see it half written."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+# Export commonly used items
+__all__ = [
+    'ResponseCache',
+]
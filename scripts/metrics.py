@@ -0,0 +1,254 @@
+"""
+Run instrumentation for DeFi Prime Rate analysis project.
+
+A process-wide recorder collects timed spans (each HTTP request, each
+pipeline stage, the whole run), counters (retries, 429 responses, dropped
+pools, bytes downloaded) and gauges (dataset size, published bytes). Spans
+are written as JSON lines as they finish; at the end of the run a summary
+line is appended and, optionally, a Prometheus textfile is published for the
+node_exporter textfile collector, so the 4-hourly job's duration per stage
+can be graphed and alerted on.
+
+Nothing is written until `configure` is called, so modules importing the
+recorder (and benchmarks) only pay for in-memory bookkeeping.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config import METRICS_PREFIX
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    """Build the aggregation key of a metric and its labels."""
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Render labels in Prometheus exposition syntax, e.g. {endpoint="chart"}."""
+    if not labels:
+        return ''
+    escaped = ((key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for key, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+class MetricsRecorder:
+    """
+    Thread-safe collector of spans, counters and gauges for one run.
+
+    Span durations are aggregated per name and labels (count, sum, max);
+    counters accumulate and gauges keep their last value.
+    """
+
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+        self.run_id = uuid.uuid4().hex[:12]
+        self.jsonl_filename: Optional[str] = None
+        self.prometheus_filename: Optional[str] = None
+        self._started = time.time()
+        self._counters: Dict[LabelKey, float] = {}
+        self._gauges: Dict[LabelKey, float] = {}
+        self._spans: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, jsonl_filename: Optional[str] = None,
+                  prometheus_filename: Optional[str] = None) -> None:
+        """
+        Choose where metrics are written and start a new run.
+
+        Args:
+            jsonl_filename: File JSON lines are appended to ('-' for stdout), or None
+            prometheus_filename: Prometheus textfile to publish at the end, or None
+        """
+        self.jsonl_filename = jsonl_filename
+        self.prometheus_filename = prometheus_filename
+        self.reset()
+        if jsonl_filename and jsonl_filename != '-':
+            os.makedirs(os.path.dirname(jsonl_filename) or '.', exist_ok=True)
+
+    def reset(self) -> None:
+        """Discard everything recorded so far and start a new run ID."""
+        with self._lock:
+            self.run_id = uuid.uuid4().hex[:12]
+            self._started = time.time()
+            self._counters.clear()
+            self._gauges.clear()
+            self._spans.clear()
+
+    @contextmanager
+    def span(self, name: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block of code.
+
+        The yielded dictionary can be filled with extra fields (such as an
+        HTTP status) that are written with the span's JSON line but are not
+        used for aggregation.
+
+        Args:
+            name: Span name, e.g. 'http_request' or 'stage'
+            **labels: Low-cardinality labels, e.g. stage='merge'
+        """
+        fields: Dict[str, Any] = {}
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield fields
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            key = _key(name, labels)
+            with self._lock:
+                stats = self._spans.setdefault(key, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = max(stats[2], duration)
+            self.emit({'event': 'span', 'name': name, 'labels': labels,
+                       'duration_s': round(duration, 6), 'ok': ok, **fields})
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a counter, e.g. increment('http_retries_total', endpoint='chart')."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge to its latest value."""
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        """Write one event as a JSON line, if a JSON lines file is configured."""
+        if not self.jsonl_filename:
+            return
+        record = {'ts': datetime.now(timezone.utc).isoformat(), 'run_id': self.run_id, **event}
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            if self.jsonl_filename == '-':
+                print(line, end='', flush=True)
+            else:
+                with open(self.jsonl_filename, 'a') as f:
+                    f.write(line)
+
+    def summary(self, success: bool) -> Dict[str, Any]:
+        """
+        Aggregate the run's metrics.
+
+        Returns:
+            Dictionary with the run's outcome, duration, per-stage seconds and
+            all spans, counters and gauges
+        """
+        with self._lock:
+            spans = [{'name': name, 'labels': dict(labels), 'count': stats[0],
+                      'sum_s': round(stats[1], 6), 'max_s': round(stats[2], 6)}
+                     for (name, labels), stats in self._spans.items()]
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in self._counters.items()]
+            gauges = [{'name': name, 'labels': dict(labels), 'value': value}
+                      for (name, labels), value in self._gauges.items()]
+
+        return {
+            'success': success,
+            'duration_s': round(time.time() - self._started, 3),
+            'stages': {span['labels']['stage']: span['sum_s'] for span in spans
+                       if span['name'] == 'stage' and 'stage' in span['labels']},
+            'spans': spans,
+            'counters': counters,
+            'gauges': gauges
+        }
+
+    def render_prometheus(self, success: bool) -> str:
+        """
+        Render the run's metrics in the Prometheus text exposition format.
+
+        Spans become `<prefix>_<name>_duration_seconds` summaries (sum and
+        count), counters and gauges keep their names.
+        """
+        prefix = self.prefix
+        lines = [
+            f"# HELP {prefix}_last_run_timestamp_seconds Unix time the last run finished.",
+            f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+            f"{prefix}_last_run_timestamp_seconds {time.time():.3f}",
+            f"# TYPE {prefix}_last_run_success gauge",
+            f"{prefix}_last_run_success {int(success)}",
+            f"# TYPE {prefix}_last_run_duration_seconds gauge",
+            f"{prefix}_last_run_duration_seconds {time.time() - self._started:.3f}",
+        ]
+
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+        typed = set()
+        for (name, labels), (count, total, _) in spans:
+            metric = f"{prefix}_{name}_duration_seconds"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} summary")
+                typed.add(metric)
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+
+        for kind, items in (('counter', counters), ('gauge', gauges)):
+            for (name, labels), value in items:
+                metric = f"{prefix}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    typed.add(metric)
+                value = int(value) if float(value).is_integer() else float(value)
+                lines.append(f"{metric}{_format_labels(labels)} {value!r}")
+
+        return '\n'.join(lines) + '\n'
+
+    def finish(self, success: bool) -> Dict[str, Any]:
+        """
+        Write the run summary line and publish the Prometheus textfile.
+
+        The textfile is replaced atomically, as the textfile collector
+        requires, so a scrape never reads a half-written file.
+
+        Args:
+            success: Whether the run completed
+
+        Returns:
+            The run summary, see summary()
+        """
+        summary = self.summary(success)
+        self.emit({'event': 'run_summary', **summary})
+
+        if self.prometheus_filename:
+            directory = os.path.dirname(self.prometheus_filename) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(self.render_prometheus(success))
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.prometheus_filename)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return summary
+
+
+# Shared by the fetcher and its HTTP helpers so one run reports all its metrics together
+METRICS = MetricsRecorder()
+
+
+# Export commonly used items
+__all__ = [
+    'MetricsRecorder',
+    'METRICS',
+]
@@ -13,7 +13,7 @@
     'use strict';
 
     const CONFIG = {
-        metadataUrl: 'https://512m-io.github.io/live_analytics/data/pool_metadata.json',
+        dataUrl: 'https://512m-io.github.io/live_analytics/data/chain_contributions.json',
         logoUrl: 'https://512m-io.github.io/live_analytics/public/512m_logo.png'
     };
 
@@ -43,10 +43,18 @@
 
     async function loadData() {
         try {
-            const metadataResponse = await fetchWithRetry(CONFIG.metadataUrl);
-            const metadata = metadataResponse.pool_metadata;
-
-            return { metadata };
+            // Contributions are aggregated by the fetcher, sorted largest first
+            const response = await fetchWithRetry(CONFIG.dataUrl);
+            const contributions = response.contributions.map(c => ({
+                chain: c.chain,
+                contribution: c.contribution,
+                percentage: c.percentage,
+                totalTVL: c.total_tvl,
+                poolCount: c.pool_count,
+                avgAPY: c.avg_apy
+            }));
+
+            return { contributions };
 
         } catch (error) {
             showError(`Data loading failed: ${error.message}`);
@@ -69,79 +77,19 @@
         }
     }
 
-    function calculateChainContributions(metadata) {
-        try {
-            const chainContributions = {};
-            let totalContribution = 0;
-
-            metadata.forEach(pool => {
-                const chain = pool.chain;
-                const tvl = pool.current_tvl || 0;
-                const apy = pool.current_apy || 0;
-
-                const contribution = tvl * apy;
-
-                if (!chainContributions[chain]) {
-                    chainContributions[chain] = {
-                        chain: chain,
-                        totalContribution: 0,
-                        totalTVL: 0,
-                        poolCount: 0,
-                        avgAPY: 0,
-                        pools: []
-                    };
-                }
-
-                chainContributions[chain].totalContribution += contribution;
-                chainContributions[chain].totalTVL += tvl;
-                chainContributions[chain].poolCount += 1;
-                chainContributions[chain].pools.push({
-                    name: pool.name,
-                    project: pool.project,
-                    symbol: pool.symbol,
-                    tvl: tvl,
-                    apy: apy
-                });
-
-                totalContribution += contribution;
-            });
-
-            const contributions = Object.values(chainContributions)
-                .filter(chain => chain.totalContribution > 0)
-                .map(chain => ({
-                    chain: chain.chain,
-                    contribution: chain.totalContribution,
-                    percentage: (chain.totalContribution / totalContribution) * 100,
-                    totalTVL: chain.totalTVL,
-                    poolCount: chain.poolCount,
-                    avgAPY: chain.totalContribution / chain.totalTVL,
-                    pools: chain.pools
-                }))
-                .sort((a, b) => b.contribution - a.contribution);
-
-            return { contributions, totalContribution };
-
-        } catch (error) {
-            throw error;
-        }
-    }
-
     function createChart(data) {
         try {
-            if (!data || !data.metadata) {
+            if (!data || !data.contributions) {
                 showError('No data available to display');
                 return;
             }
 
-            const { metadata } = data;
-            const result = calculateChainContributions(metadata);
-
-            if (!result || !result.contributions || result.contributions.length === 0) {
+            if (data.contributions.length === 0) {
                 showError('No valid chain data found for chart');
                 return;
             }
 
-            const { contributions } = result;
+            const { contributions } = data;
 
             const chains = contributions.map(c => c.chain);
             const values = contributions.map(c => c.contribution);
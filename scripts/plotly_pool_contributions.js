@@ -14,8 +14,7 @@
     
     // Configuration URLs
     const CONFIG = {
-        dataUrl: 'https://512m-io.github.io/live_analytics/data/pool_data.json',
-        metadataUrl: 'https://512m-io.github.io/live_analytics/data/pool_metadata.json',
+        dataUrl: 'https://512m-io.github.io/live_analytics/data/pool_contributions.json',
         logoUrl: 'https://512m-io.github.io/live_analytics/public/512m_logo.png'
     };
 
@@ -27,24 +26,6 @@
         '#86abc7', '#9bbad1', '#afc8da', '#c3d5e3', '#d7e2ec'
     ];
     
-    // Build mapping from pool IDs to pool metadata
-    function buildPoolMapping(metadata) {
-        const poolMapping = {};
-        metadata.forEach(pool => {
-            const projectFormatted = pool.project.replace('-', ' ').replace(/\b\w/g, l => l.toUpperCase());
-            const symbolFormatted = pool.symbol.toUpperCase();
-
-            poolMapping[pool.pool_id] = {
-                project: pool.project,
-                symbol: pool.symbol,
-                chain: pool.chain,
-                // Generate display name as "ProjectFormatted symbolFormatted"
-                displayName: `${projectFormatted} ${symbolFormatted}`
-            };
-        });
-        return poolMapping;
-    }
-
     // Check if Plotly is already loaded, if not load it
     function loadPlotly(callback) {
         if (typeof Plotly !== 'undefined') {
@@ -64,15 +45,8 @@
     // Load data from GitHub Pages
     async function loadData() {
         try {
-            const [dataResponse, metadataResponse] = await Promise.all([
-                fetchWithRetry(CONFIG.dataUrl),
-                fetchWithRetry(CONFIG.metadataUrl)
-            ]);
-            
-            const poolData = dataResponse.pool_data;
-            const metadata = metadataResponse.pool_metadata;
-            
-            return { poolData, metadata };
+            // Contributions are precomputed by the fetcher: top pools (largest first) plus "other"
+            return await fetchWithRetry(CONFIG.dataUrl);
             
         } catch (error) {
             showError(`Data loading failed: ${error.message}`);
@@ -96,106 +70,22 @@
         }
     }
 
-    // Calculate pool contributions over time
-    function calculateContributionsOverTime(poolData, topN = 7) {
-        try {
-            
-            // Calculate contributions over time
-            const dates = Object.keys(poolData).sort();
-            
-            if (dates.length === 0) {
-                throw new Error('No dates found in pool data');
-            }
-            
-            const contributionsOverTime = {};
-            
-            // Get all pool IDs (handle both new pool_id format and legacy Pool_N format)
-            const allPoolIds = new Set();
-            dates.forEach(date => {
-                const data = poolData[date];
-                if (data) {
-                    Object.keys(data).forEach(key => {
-                        if (key.startsWith('apy_')) {
-                            const identifier = key.replace('apy_', '');
-                            allPoolIds.add(identifier);
-                        }
-                    });
-                }
-            });
-
-            if (allPoolIds.size === 0) {
-                throw new Error('No pools found in data');
-            }
-
-            // Calculate contributions for each pool over time
-            allPoolIds.forEach(identifier => {
-                contributionsOverTime[identifier] = dates.map(date => {
-                    const data = poolData[date];
-                    if (!data) return 0;
-
-                    const apyKey = `apy_${identifier}`;
-                    const tvlKey = `tvlUsd_${identifier}`;
-
-                    if (data[apyKey] !== null && data[tvlKey] !== null && data.weighted_apy !== null) {
-                        const totalTvl = Object.keys(data)
-                            .filter(k => k.startsWith('tvlUsd_'))
-                            .reduce((sum, k) => sum + (data[k] || 0), 0);
-
-                        if (totalTvl > 0 && data.weighted_apy > 0) {
-                            const contribution = (data[apyKey] * data[tvlKey]) / (data.weighted_apy * totalTvl) * 100;
-                            return isNaN(contribution) ? 0 : contribution;
-                        }
-                    }
-                    return 0;
-                });
-            });
-            
-            // Find top N pools by average contribution
-            const avgContributions = Object.entries(contributionsOverTime)
-                .map(([identifier, contributions]) => {
-                    const validContributions = contributions.filter(c => !isNaN(c) && isFinite(c));
-                    const avgContribution = validContributions.length > 0
-                        ? validContributions.reduce((a, b) => a + b, 0) / validContributions.length
-                        : 0;
-                    return {
-                        identifier,
-                        avgContribution: isNaN(avgContribution) ? 0 : avgContribution
-                    };
-                })
-                .filter(pool => pool.avgContribution > 0)
-                .sort((a, b) => b.avgContribution - a.avgContribution);
-
-            const topPools = avgContributions.slice(0, topN);
-            
-            return { dates, contributionsOverTime, topPools };
-            
-        } catch (error) {
-            throw error;
-        }
-    }
-
   
     // Create the pool contributions over time stacked area chart
     function createChart(data) {
         try {
-            if (!data || !data.poolData) {
+            if (!data || !data.dates) {
                 showError('No data available to display');
                 return;
             }
 
-            const { poolData, metadata } = data;
-
-            // Build pool mapping from metadata
-            const poolMapping = buildPoolMapping(metadata);
-
-            const result = calculateContributionsOverTime(poolData, 7);
-            
-            if (!result || !result.topPools || result.topPools.length === 0) {
+            if (!data.pools || data.pools.length === 0) {
                 showError('No valid pool data found for chart');
                 return;
             }
             
-            const { dates, contributionsOverTime, topPools } = result;
+            const { dates, pools } = data;
+            const topPools = pools.slice();
 
         // Create stacked area chart data
         const traces = [];
@@ -203,14 +93,12 @@
         
         // Add top pools in reverse order (so highest contributors are at top of stack)
         topPools.reverse().forEach((pool, idx) => {
-            const poolInfo = poolMapping[pool.identifier];
-            const displayName = poolInfo ? poolInfo.displayName : `Pool_${pool.identifier}`;
             traces.push({
                 x: dateObjects,
-                y: contributionsOverTime[pool.identifier],
+                y: pool.contributions,
                 type: 'scatter',
                 mode: 'lines',
-                name: displayName,
+                name: pool.display_name,
                 stackgroup: 'one',
                 fillcolor: MUTED_BLUES[idx % MUTED_BLUES.length],
                 line: { width: 0.5 },
@@ -222,16 +110,9 @@
         });
 
         // Add "Other pools" category
-        const otherContributions = dates.map((_, dateIdx) => {
-            const topTotal = topPools.reduce((sum, pool) =>
-                sum + contributionsOverTime[pool.identifier][dateIdx], 0
-            );
-            return 100 - topTotal;
-        });
-        
         traces.push({
             x: dateObjects,
-            y: otherContributions,
+            y: data.other,
             type: 'scatter',
             mode: 'lines',
             name: 'Other Pools',
@@ -316,7 +197,7 @@
             Plotly.newPlot('pool-contributions-chart', traces, layout, config);
 
             // Add statistics below chart
-            updateStats(topPools, dates, poolMapping);
+            updateStats(topPools, dates);
             
         } catch (error) {
             showError(`Chart creation failed: ${error.message}`);
@@ -324,13 +205,12 @@
     }
 
     // Update statistics display
-    function updateStats(topPools, dates, poolMapping) {
+    function updateStats(topPools, dates) {
         const totalPools = topPools.length;
         const topContributor = topPools[topPools.length - 1]; // Since we reversed the array
         const latestDate = dates[dates.length - 1];
 
-        const poolInfo = poolMapping[topContributor.identifier];
-        const displayName = poolInfo ? poolInfo.displayName : `Pool ${topContributor.identifier}`;
+        const displayName = topContributor.display_name;
 
         const statsContainer = document.getElementById('pool-contributions-stats');
         if (statsContainer) {
@@ -339,7 +219,7 @@
                     <div style="background: rgba(247,243,236,0.9); padding: 15px; border-radius: 8px; border: 1px solid #ddd; display: inline-block;">
                         <div style="font-size: 14px; font-weight: bold; margin-bottom: 8px; color: #333;">Pool Contributions Over Time Summary</div>
                         <div style="font-size: 12px; margin-bottom: 5px;">
-                            <strong>Top Contributor:</strong> ${displayName} (${topContributor.avgContribution.toFixed(2)}% avg)
+                            <strong>Top Contributor:</strong> ${displayName} (${topContributor.avg_contribution.toFixed(2)}% avg)
                         </div>
                         <div style="font-size: 10px; color: #999;">
                             Data through: ${latestDate} • Updates every 4 hours
@@ -13,7 +13,7 @@
     'use strict';
 
     const CONFIG = {
-        metadataUrl: 'https://512m-io.github.io/live_analytics/data/pool_metadata.json',
+        dataUrl: 'https://512m-io.github.io/live_analytics/data/protocol_contributions.json',
         logoUrl: 'https://512m-io.github.io/live_analytics/public/512m_logo.png'
     };
 
@@ -45,10 +45,21 @@
 
     async function loadData() {
         try {
-            const metadataResponse = await fetchWithRetry(CONFIG.metadataUrl);
-            const metadata = metadataResponse.pool_metadata;
-
-            return { metadata };
+            // Contributions are aggregated by the fetcher, sorted largest first
+            const response = await fetchWithRetry(CONFIG.dataUrl);
+            const contributions = response.contributions.map(c => ({
+                protocol: c.project,
+                displayName: c.display_name,
+                contribution: c.contribution,
+                percentage: c.percentage,
+                totalTVL: c.total_tvl,
+                poolCount: c.pool_count,
+                avgAPY: c.avg_apy,
+                chainCount: c.chain_count,
+                chains: c.chains
+            }));
+
+            return { contributions };
 
         } catch (error) {
             showError(`Data loading failed: ${error.message}`);
@@ -71,85 +82,19 @@
         }
     }
 
-    function calculateProtocolContributions(metadata) {
-        try {
-            const protocolContributions = {};
-            let totalContribution = 0;
-
-            metadata.forEach(pool => {
-                const protocol = pool.project;
-                const tvl = pool.current_tvl || 0;
-                const apy = pool.current_apy || 0;
-
-                const contribution = tvl * apy;
-
-                if (!protocolContributions[protocol]) {
-                    protocolContributions[protocol] = {
-                        protocol: protocol,
-                        totalContribution: 0,
-                        totalTVL: 0,
-                        poolCount: 0,
-                        chains: new Set(),
-                        pools: []
-                    };
-                }
-
-                protocolContributions[protocol].totalContribution += contribution;
-                protocolContributions[protocol].totalTVL += tvl;
-                protocolContributions[protocol].poolCount += 1;
-                protocolContributions[protocol].chains.add(pool.chain);
-                protocolContributions[protocol].pools.push({
-                    name: pool.name,
-                    chain: pool.chain,
-                    symbol: pool.symbol,
-                    tvl: tvl,
-                    apy: apy
-                });
-
-                totalContribution += contribution;
-            });
-
-            const contributions = Object.values(protocolContributions)
-                .filter(protocol => protocol.totalContribution > 0)
-                .map(protocol => ({
-                    protocol: protocol.protocol,
-                    displayName: protocol.protocol.split('-').map(word =>
-                        word.charAt(0).toUpperCase() + word.slice(1)
-                    ).join(' '),
-                    contribution: protocol.totalContribution,
-                    percentage: (protocol.totalContribution / totalContribution) * 100,
-                    totalTVL: protocol.totalTVL,
-                    poolCount: protocol.poolCount,
-                    avgAPY: protocol.totalContribution / protocol.totalTVL,
-                    chainCount: protocol.chains.size,
-                    chains: Array.from(protocol.chains),
-                    pools: protocol.pools
-                }))
-                .sort((a, b) => b.contribution - a.contribution);
-
-            return { contributions, totalContribution };
-
-        } catch (error) {
-            throw error;
-        }
-    }
-
     function createChart(data) {
         try {
-            if (!data || !data.metadata) {
+            if (!data || !data.contributions) {
                 showError('No data available to display');
                 return;
             }
 
-            const { metadata } = data;
-            const result = calculateProtocolContributions(metadata);
-
-            if (!result || !result.contributions || result.contributions.length === 0) {
+            if (data.contributions.length === 0) {
                 showError('No valid protocol data found for chart');
                 return;
             }
 
-            const { contributions } = result;
+            const { contributions } = data;
 
             const protocols = contributions.map(c => c.displayName);
             const values = contributions.map(c => c.contribution);
@@ -14,7 +14,7 @@
     
     // Configuration - Update these URLs after setting up GitHub Pages
     const CONFIG = {
-        dataUrl: 'https://512m-io.github.io/live_analytics/data/pool_data.json',
+        dataUrl: 'https://512m-io.github.io/live_analytics/data/prime_rate.json',
         metadataUrl: 'https://512m-io.github.io/live_analytics/data/pool_metadata.json',
         logoUrl: 'https://512m-io.github.io/live_analytics/public/512m_logo.png'
     };
@@ -46,15 +46,12 @@
                 throw new Error(`HTTP ${response.status}: ${response.statusText}`);
             }
             
+            // Slim prime rate series: parallel date / weighted_apy / ma_apy_14d arrays, already sorted
             const jsonData = await response.json();
-            const poolData = jsonData.pool_data;
-            
-            // Convert to sorted array format
-            const dates = Object.keys(poolData).sort();
-            const data = dates.map(date => ({
+            const data = jsonData.dates.map((date, i) => ({
                 date: new Date(date),
-                weighted_apy: poolData[date].weighted_apy,
-                ma_apy_14d: poolData[date].ma_apy_14d
+                weighted_apy: jsonData.weighted_apy[i],
+                ma_apy_14d: jsonData.ma_apy_14d[i]
             })).filter(row => row.weighted_apy !== null && row.ma_apy_14d !== null);
             
             return data;
@@ -0,0 +1,165 @@
+"""
+Streaming merge of pool histories for DeFi Prime Rate analysis project.
+
+Rather than keeping every pool's history until all downloads have finished
+and then concatenating them, each history is normalised to daily resolution
+and folded into one (dates x pools) float matrix as soon as it arrives. The
+history can be released right away, so CPU work overlaps the remaining
+network waits and memory is bounded by the merged matrix instead of by every
+intermediate frame.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class PoolMatrix:
+    """
+    Accumulating columnar store of daily APY and TVL per pool.
+
+    Each pool owns an `apy`/`tvlUsd` column pair and rows are allocated as
+    new dates appear; the matrix doubles when it runs out of either. Dates
+    are sorted and columns put in the requested order only when the frame is
+    built, so histories can be added in any order. Histories must be added
+    from a single thread.
+
+    Args:
+        initial_pools: Column pairs to allocate up front
+        initial_dates: Rows to allocate up front
+    """
+
+    COLUMNS = ('apy', 'tvlUsd')
+
+    def __init__(self, initial_pools: int = 128, initial_dates: int = 512):
+        self._initial_shape = (max(1, initial_dates), len(self.COLUMNS) * max(1, initial_pools))
+        self._reset()
+
+    def _reset(self) -> None:
+        """Start from an empty matrix."""
+        self._values = np.full(self._initial_shape, np.nan)
+        self._slots: Dict[str, int] = {}  # Pool ID -> column pair of _values
+        self._added = set()
+        # Row of each day number from _first_day on, -1 for days not seen yet
+        self._first_day = 0
+        self._day_rows = np.empty(0, dtype=np.intp)
+        self._row_count = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the matrix."""
+        return self._values.nbytes
+
+    def add(self, pool_id: str, df: pd.DataFrame) -> bool:
+        """
+        Fold one pool's history into the matrix.
+
+        Timestamps are truncated to the day and several snapshots on the same
+        day are averaged. Adding a pool again replaces its previous history.
+
+        Args:
+            pool_id: Pool ID
+            df: History indexed by timestamp with 'apy' and 'tvlUsd' columns
+
+        Returns:
+            True if the history was added, False if it lacks APY or TVL data
+        """
+        if not all(col in df.columns for col in self.COLUMNS):
+            return False
+
+        daily = df[list(self.COLUMNS)].astype(float)
+        index = daily.index if isinstance(daily.index, pd.DatetimeIndex) else pd.to_datetime(daily.index)
+        daily = daily.set_axis(index.normalize(), axis=0)
+        if daily.index.hasnans or not daily.index.is_unique:
+            daily = daily.groupby(level=0).mean()
+
+        days = daily.index.values.astype('datetime64[D]').astype(np.int64)
+        rows = self._rows(days)
+
+        start = len(self.COLUMNS) * self._slot(pool_id)
+        columns = slice(start, start + len(self.COLUMNS))
+        if pool_id in self._added:
+            self._values[:, columns] = np.nan
+        self._values[rows, columns] = daily.to_numpy()
+        self._added.add(pool_id)
+        return True
+
+    def _slot(self, pool_id: str) -> int:
+        """Return the column pair of a pool, allocating one if it is new."""
+        slot = self._slots.get(pool_id)
+        if slot is None:
+            slot = self._slots[pool_id] = len(self._slots)
+            if len(self.COLUMNS) * (slot + 1) > self._values.shape[1]:
+                self._grow(len(self._values), 2 * self._values.shape[1])
+        return slot
+
+    def _rows(self, days: np.ndarray) -> np.ndarray:
+        """Return the rows of an array of day numbers, allocating rows for new days."""
+        if len(days) == 0:
+            return np.empty(0, dtype=np.intp)
+
+        first_day, last_day = int(days.min()), int(days.max())
+        if len(self._day_rows):
+            first_day = min(first_day, self._first_day)
+            last_day = max(last_day, self._first_day + len(self._day_rows) - 1)
+        if first_day != self._first_day or last_day - first_day + 1 != len(self._day_rows):
+            day_rows = np.full(last_day - first_day + 1, -1, dtype=np.intp)
+            offset = self._first_day - first_day
+            day_rows[offset:offset + len(self._day_rows)] = self._day_rows
+            self._first_day, self._day_rows = first_day, day_rows
+
+        offsets = days - self._first_day
+        rows = self._day_rows[offsets]
+        new = rows < 0
+        if new.any():
+            new_offsets = np.unique(offsets[new])
+            self._day_rows[new_offsets] = np.arange(self._row_count, self._row_count + len(new_offsets))
+            self._row_count += len(new_offsets)
+            if self._row_count > len(self._values):
+                self._grow(max(self._row_count, 2 * len(self._values)), self._values.shape[1])
+            rows = self._day_rows[offsets]
+        return rows
+
+    def _grow(self, n_rows: int, n_columns: int) -> None:
+        """Reallocate the matrix with more rows or columns, keeping its values."""
+        grown = np.full((n_rows, n_columns), np.nan)
+        grown[:self._values.shape[0], :self._values.shape[1]] = self._values
+        self._values = grown
+
+    def build(self, pool_ids: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Assemble the merged frame and release the accumulation buffer.
+
+        The result matches `spr_fetcher_v1._merge_pool_dataframes`: indexed by
+        date in ascending order, with `apy_<pool_id>`/`tvlUsd_<pool_id>`
+        columns per pool.
+
+        Args:
+            pool_ids: Column order; pools that were not added are skipped.
+                Defaults to every added pool in the order it was first added.
+
+        Returns:
+            Merged DataFrame, or None if no listed pool was added
+        """
+        pool_ids = [pool_id for pool_id in (self._slots if pool_ids is None else pool_ids)
+                    if pool_id in self._added]
+        if not pool_ids:
+            return None
+
+        # Offsets of the days seen, in ascending order, and the rows holding them
+        day_offsets = np.flatnonzero(self._day_rows >= 0)
+        columns = [len(self.COLUMNS) * self._slots[pool_id] + k
+                   for pool_id in pool_ids for k in range(len(self.COLUMNS))]
+        values = self._values[np.ix_(self._day_rows[day_offsets], columns)]
+        dates = (self._first_day + day_offsets).astype('datetime64[D]').astype(object)
+        self._reset()
+
+        return pd.DataFrame(values, index=pd.Index(dates, name='date'),
+                            columns=[f'{col}_{pool_id}' for pool_id in pool_ids for col in self.COLUMNS])
+
+
+# Export commonly used items
+__all__ = [
+    'PoolMatrix',
+]
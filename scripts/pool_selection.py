@@ -0,0 +1,224 @@
+"""
+Pool selection for DeFi Prime Rate analysis project.
+
+Pools from the DeFiLlama yields listing are passed through a pipeline of
+named predicates and then fed to one or more bounded top-k selectors, so
+several selections (top-20, top-100, per-chain top-10, ...) can be built in a
+single pass over one listing download.
+"""
+
+import fnmatch
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from config import (
+    POOL_EXCLUDED_PROJECTS, POOL_EXCLUDE_ZERO_APY, POOL_MIN_TVL_USD,
+    POOL_MIN_APY, POOL_CHAIN_ALLOWLIST, POOL_SYMBOL_PATTERNS
+)
+
+PoolPredicate = Callable[[Dict[str, Any]], bool]
+
+
+def is_stablecoin_with_tvl() -> PoolPredicate:
+    """Keep stablecoin pools that report a positive TVL."""
+    def predicate(pool: Dict[str, Any]) -> bool:
+        tvl = pool.get('tvlUsd')
+        return tvl is not None and tvl > 0 and pool.get('stablecoin') == True
+    return predicate
+
+
+def exclude_projects(projects: Iterable[str]) -> PoolPredicate:
+    """Drop pools whose project is in the blacklist."""
+    blacklist = {project.lower() for project in projects}
+
+    def predicate(pool: Dict[str, Any]) -> bool:
+        return str(pool.get('project', '')).lower() not in blacklist
+    return predicate
+
+
+def exclude_zero_apy() -> PoolPredicate:
+    """Drop pools reporting exactly 0% APY."""
+    def predicate(pool: Dict[str, Any]) -> bool:
+        return pool.get('apy', 0) != 0
+    return predicate
+
+
+def min_tvl(threshold: float) -> PoolPredicate:
+    """Keep pools with at least `threshold` USD of TVL."""
+    def predicate(pool: Dict[str, Any]) -> bool:
+        return (pool.get('tvlUsd') or 0) >= threshold
+    return predicate
+
+
+def min_apy(threshold: float) -> PoolPredicate:
+    """Keep pools with an APY of at least `threshold` percent."""
+    def predicate(pool: Dict[str, Any]) -> bool:
+        apy = pool.get('apy')
+        return apy is not None and apy >= threshold
+    return predicate
+
+
+def chain_allowlist(chains: Iterable[str]) -> PoolPredicate:
+    """Keep pools deployed on one of the given chains."""
+    allowed = {chain.lower() for chain in chains}
+
+    def predicate(pool: Dict[str, Any]) -> bool:
+        return str(pool.get('chain', '')).lower() in allowed
+    return predicate
+
+
+def symbol_patterns(patterns: Iterable[str]) -> PoolPredicate:
+    """Keep pools whose symbol matches one of the shell-style patterns (e.g. 'USD*')."""
+    patterns = [pattern.upper() for pattern in patterns]
+
+    def predicate(pool: Dict[str, Any]) -> bool:
+        symbol = pool.get('symbol') or ''
+        if isinstance(symbol, list):
+            symbol = '-'.join(symbol)
+        symbol = str(symbol).upper()
+        return any(fnmatch.fnmatchcase(symbol, pattern) for pattern in patterns)
+    return predicate
+
+
+class PoolFilterPipeline:
+    """
+    Ordered list of named predicates applied lazily to a stream of pools.
+
+    The number of pools rejected by each filter is kept in `rejected`; a pool
+    is only counted against the first filter it fails.
+    """
+
+    def __init__(self, filters: List[Tuple[str, PoolPredicate]]):
+        self.filters = filters
+        self.rejected: Dict[str, int] = {name: 0 for name, _ in filters}
+
+    def apply(self, pools: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the pools that pass every filter.
+
+        Args:
+            pools: Pool dictionaries from the yields listing
+
+        Yields:
+            Pools accepted by the pipeline
+        """
+        for pool in pools:
+            for name, predicate in self.filters:
+                if not predicate(pool):
+                    self.rejected[name] += 1
+                    break
+            else:
+                yield pool
+
+
+class TopKSelector:
+    """
+    Keep the k largest pools by a numeric field in O(n log k) time and O(k) memory.
+
+    With `group_by`, an independent top-k is kept for every value of that
+    field (e.g. per chain). An optional predicate restricts the selection
+    further without affecting other selectors fed from the same stream.
+    Ties keep the pool seen first, like a stable descending sort.
+    """
+
+    def __init__(self, k: int, key: str = 'tvlUsd', group_by: Optional[str] = None,
+                 predicate: Optional[PoolPredicate] = None):
+        self.k = k
+        self.key = key
+        self.group_by = group_by
+        self.predicate = predicate
+        self._heaps: Dict[Any, list] = {}
+        self._counter = itertools.count()
+
+    def push(self, pool: Dict[str, Any]) -> None:
+        """Offer a pool to the selection."""
+        if self.k <= 0 or (self.predicate and not self.predicate(pool)):
+            return
+
+        value = pool.get(self.key)
+        if value is None:
+            return
+
+        group = pool.get(self.group_by, 'Unknown') if self.group_by else None
+        heap = self._heaps.setdefault(group, [])
+        entry = (value, -next(self._counter), pool)
+
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    def result(self) -> Union[List[Dict[str, Any]], Dict[Any, List[Dict[str, Any]]]]:
+        """
+        Return the selection sorted by the key in descending order.
+
+        Returns:
+            List of pools, or a dictionary of lists keyed by group with `group_by`
+        """
+        def ordered(heap: list) -> List[Dict[str, Any]]:
+            return [pool for _, _, pool in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+
+        if self.group_by:
+            return {group: ordered(heap) for group, heap in self._heaps.items()}
+        return ordered(self._heaps.get(None, []))
+
+
+def build_default_pipeline() -> PoolFilterPipeline:
+    """
+    Build the filter pipeline configured in config.py.
+
+    Returns:
+        PoolFilterPipeline for prime rate pool selection
+    """
+    filters = [('stablecoin with TVL', is_stablecoin_with_tvl())]
+    if POOL_EXCLUDED_PROJECTS:
+        filters.append(('project blacklist', exclude_projects(POOL_EXCLUDED_PROJECTS)))
+    if POOL_EXCLUDE_ZERO_APY:
+        filters.append(('0% APY', exclude_zero_apy()))
+    if POOL_MIN_TVL_USD:
+        filters.append(('minimum TVL', min_tvl(POOL_MIN_TVL_USD)))
+    if POOL_MIN_APY is not None:
+        filters.append(('minimum APY', min_apy(POOL_MIN_APY)))
+    if POOL_CHAIN_ALLOWLIST:
+        filters.append(('chain allowlist', chain_allowlist(POOL_CHAIN_ALLOWLIST)))
+    if POOL_SYMBOL_PATTERNS:
+        filters.append(('symbol patterns', symbol_patterns(POOL_SYMBOL_PATTERNS)))
+    return PoolFilterPipeline(filters)
+
+
+def select_pools(pools: Iterable[Dict[str, Any]], selectors: Dict[str, TopKSelector],
+                 pipeline: Optional[PoolFilterPipeline] = None) -> Dict[str, Any]:
+    """
+    Run pools through the pipeline once and feed every selector.
+
+    Args:
+        pools: Pool dictionaries from the yields listing
+        selectors: Selectors keyed by selection name
+        pipeline: Filter pipeline, defaults to the configured one
+
+    Returns:
+        Dictionary of selection results keyed by selection name
+    """
+    pipeline = pipeline or build_default_pipeline()
+    for pool in pipeline.apply(pools):
+        for selector in selectors.values():
+            selector.push(pool)
+    return {name: selector.result() for name, selector in selectors.items()}
+
+
+# Export commonly used items
+__all__ = [
+    'PoolPredicate',
+    'is_stablecoin_with_tvl',
+    'exclude_projects',
+    'exclude_zero_apy',
+    'min_tvl',
+    'min_apy',
+    'chain_allowlist',
+    'symbol_patterns',
+    'PoolFilterPipeline',
+    'TopKSelector',
+    'build_default_pipeline',
+    'select_pools',
+]
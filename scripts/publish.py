@@ -0,0 +1,279 @@
+"""
+Atomic publication of data artifacts for DeFi Prime Rate analysis project.
+
+Every artifact is written to a temporary file in its destination directory,
+flushed to disk and moved into place with `os.replace`, so readers (the
+Telegram bot, the Plotly pages) see either the previous file or the new one,
+never a truncated one. Once all artifacts of a run are in place, a manifest
+recording each file's SHA-256, size and row count is published the same way
+under an incremented generation number. The manifest is written last, so a
+run that fails part way leaves the previous generation's manifest in place.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import DEFAULT_MANIFEST_FILENAME
+
+# orjson serialises large exports several times faster; fall back to json without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Brotli copies are only published when the brotli package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_VERSION = 1
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Write a file so that readers never observe it partially written.
+
+    Args:
+        path: Destination filename
+        data: File contents
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str) -> None:
+    """Persist a rename by syncing its directory (not supported on every platform)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def encode_json(payload: Any, indent: Optional[int] = None) -> bytes:
+    """
+    Serialise a payload to UTF-8 JSON bytes, using orjson when it is installed.
+
+    Objects that are not natively serialisable are converted with str().
+    orjson only supports two-space indentation, so other indents always go
+    through the standard library encoder.
+
+    Args:
+        payload: JSON-serialisable object
+        indent: Indentation width, or None for compact output
+
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        return orjson.dumps(payload, default=str, option=option)
+
+    separators = None if indent is not None else (',', ':')
+    return json.dumps(payload, indent=indent, separators=separators, default=str).encode('utf-8')
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_entry(path: str, rows: Optional[int] = None, sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Describe a published file for the manifest.
+
+    Args:
+        path: Published filename
+        rows: Number of data rows the file holds (optional)
+        sha256: Precomputed checksum, computed from the file if omitted
+
+    Returns:
+        Manifest entry with path, bytes, sha256 and rows
+    """
+    return {
+        'path': path,
+        'bytes': os.path.getsize(path),
+        'sha256': sha256 or file_sha256(path),
+        'rows': rows
+    }
+
+
+def publish_bytes(path: str, data: bytes, rows: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Publish raw file contents atomically.
+
+    Args:
+        path: Destination filename
+        data: File contents
+        rows: Number of data rows the file holds, for the manifest
+
+    Returns:
+        Manifest entry for the published file
+    """
+    write_atomic(path, data)
+    return {
+        'path': path,
+        'bytes': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'rows': rows
+    }
+
+
+def publish_json(path: str, payload: Any, rows: Optional[int] = None,
+                 indent: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Serialise a payload to JSON and publish it atomically.
+
+    Args:
+        path: Destination filename
+        payload: JSON-serialisable object
+        rows: Number of data rows the payload holds, for the manifest
+        indent: Indentation width, or None for compact output
+
+    Returns:
+        Manifest entry for the published file
+    """
+    return publish_bytes(path, encode_json(payload, indent), rows)
+
+
+def publish_compressed_copies(path: str, data: bytes, rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Publish pre-compressed copies of a file next to it.
+
+    A `.gz` copy is always written and a `.br` copy when brotli is
+    installed. The gzip header carries no timestamp, so unchanged data
+    produces byte-identical copies.
+
+    Args:
+        path: Filename of the uncompressed file
+        data: Uncompressed file contents
+        rows: Number of data rows the file holds, for the manifest
+
+    Returns:
+        Manifest entries for the published copies
+    """
+    artifacts = [publish_bytes(f"{path}.gz", gzip.compress(data, compresslevel=9, mtime=0), rows)]
+    if brotli is not None:
+        artifacts.append(publish_bytes(f"{path}.br", brotli.compress(data, quality=11), rows))
+    return artifacts
+
+
+def load_manifest(manifest_filename: str = DEFAULT_MANIFEST_FILENAME) -> Optional[Dict[str, Any]]:
+    """
+    Load the current manifest.
+
+    Args:
+        manifest_filename: Manifest filename
+
+    Returns:
+        Manifest dictionary, or None if there is no readable manifest
+    """
+    try:
+        with open(manifest_filename, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(artifacts: List[Dict[str, Any]],
+                   manifest_filename: str = DEFAULT_MANIFEST_FILENAME) -> Dict[str, Any]:
+    """
+    Publish a manifest for a completed run under the next generation number.
+
+    Artifact paths are stored relative to the manifest's directory, so the
+    manifest is valid wherever the data directory is served from.
+
+    Args:
+        artifacts: Entries from publish_json / artifact_entry
+        manifest_filename: Manifest filename
+
+    Returns:
+        The published manifest
+    """
+    previous = load_manifest(manifest_filename) or {}
+    base_dir = os.path.dirname(manifest_filename) or '.'
+
+    files = {}
+    for artifact in artifacts:
+        name = os.path.relpath(artifact['path'], base_dir).replace(os.sep, '/')
+        files[name] = {key: value for key, value in artifact.items() if key != 'path'}
+
+    manifest = {
+        'manifest_version': MANIFEST_VERSION,
+        'generation': int(previous.get('generation', 0)) + 1,
+        'generated_at': datetime.now().isoformat(),
+        'files': files
+    }
+    write_atomic(manifest_filename, json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def verify_artifact(manifest: Dict[str, Any], name: str,
+                    manifest_filename: str = DEFAULT_MANIFEST_FILENAME) -> bool:
+    """
+    Check that a published file matches the checksum recorded in a manifest.
+
+    Args:
+        manifest: Manifest dictionary
+        name: File name as listed in the manifest
+        manifest_filename: Manifest filename, used to resolve relative paths
+
+    Returns:
+        True if the file exists and its checksum matches
+    """
+    entry = manifest.get('files', {}).get(name)
+    if not entry:
+        return False
+    path = os.path.join(os.path.dirname(manifest_filename) or '.', name)
+    try:
+        return file_sha256(path) == entry['sha256']
+    except OSError:
+        return False
+
+
+# Export commonly used items
+__all__ = [
+    'MANIFEST_VERSION',
+    'write_atomic',
+    'encode_json',
+    'file_sha256',
+    'artifact_entry',
+    'publish_bytes',
+    'publish_json',
+    'publish_compressed_copies',
+    'load_manifest',
+    'write_manifest',
+    'verify_artifact',
+]
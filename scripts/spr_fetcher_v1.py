@@ -5,24 +5,39 @@ This module fetches top stablecoin pools by TVL from DeFiLlama,
 processes the data, and saves it to a SQLite database for analysis.
 """
 
-import requests
+import argparse
+import logging
+import numpy as np
 import pandas as pd
-import sqlite3
-import json
 import time
 import os
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 from config import (
     API_ENDPOINTS, DEFAULT_DB_FILENAME, DEFAULT_FETCH_DAYS, 
-    RATE_LIMIT_DELAY, ROLLING_WINDOW_SIZES, DEFAULT_JSON_FILENAME,
-    DEFAULT_JSON_DATA_FILENAME, DEFAULT_JSON_METADATA_FILENAME
+    FETCH_MAX_WORKERS, HTTP_BACKEND, ASYNC_MAX_CONCURRENCY, ROLLING_WINDOW_SIZES, DEFAULT_JSON_FILENAME,
+    DEFAULT_JSON_DATA_FILENAME, DEFAULT_JSON_METADATA_FILENAME, DEFAULT_JSON_COLUMNAR_FILENAME,
+    DEFAULT_JSON_PRIME_RATE_FILENAME, DEFAULT_JSON_POOL_CONTRIBUTIONS_FILENAME,
+    DEFAULT_JSON_PROTOCOL_CONTRIBUTIONS_FILENAME, DEFAULT_JSON_CHAIN_CONTRIBUTIONS_FILENAME,
+    DEFAULT_MANIFEST_FILENAME, METRICS_JSONL_FILENAME, METRICS_PROMETHEUS_FILENAME,
+    LOG_LEVEL, LOG_FORMAT, configure_logging
 )
 from utils import (
-    fetch_pool_chart_data, purge_database, safe_api_request,
-    validate_dataframe
+    DEFILLAMA_RATE_LIMITER, DEFILLAMA_RESPONSE_CACHE, DEFILLAMA_RETRY_POLICY, fetch_pool_chart_data,
+    get_http_session, load_stored_pool_history, stream_json_array, utc_now, validate_dataframe
 )
+from database import save_pool_dataset, vacuum_database
+from publish import (
+    artifact_entry, encode_json, publish_bytes, publish_compressed_copies, publish_json, write_manifest
+)
+from contributions import group_contributions, pool_contributions_over_time
+from pool_selection import PoolFilterPipeline, TopKSelector, build_default_pipeline, select_pools
+from pool_matrix import PoolMatrix
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 
 def fetch_top_stablecoin_pools_by_tvl(limit: int = 100) -> List[Dict[str, Any]]:
@@ -35,50 +50,63 @@ def fetch_top_stablecoin_pools_by_tvl(limit: int = 100) -> List[Dict[str, Any]]:
     Returns:
         List of pool dictionaries sorted by TVL
     """
-    try:
-        print(f"Fetching top {limit} stablecoin pools by TVL...")
-        response = safe_api_request(API_ENDPOINTS['defi_llama_yields'])
+    logger.info("Fetching top %d stablecoin pools by TVL", limit)
+    selections = fetch_pool_selections({'top': TopKSelector(limit)})
+    top_pools = selections.get('top', [])
+    
+    if top_pools:
+        logger.info("Selected %d stablecoin pools with highest TVL", len(top_pools))
+    return top_pools
+
+
+def fetch_pool_selections(selectors: Dict[str, TopKSelector],
+                          pipeline: Optional[PoolFilterPipeline] = None) -> Dict[str, Any]:
+    """
+    Download the yields listing once and build several pool selections from it.
+    
+    The listing is parsed as it streams in: each pool goes through the filter
+    pipeline configured in config.py and is offered to every selector, which
+    only keeps its own bounded top-k. Memory stays proportional to the
+    selections rather than to the size of the listing.
+    
+    Args:
+        selectors: Selectors keyed by selection name, e.g.
+            {'top100': TopKSelector(100), 'per_chain': TopKSelector(10, group_by='chain')}
+        pipeline: Filter pipeline, defaults to the configured one
         
-        if response and response.status_code == 200:
-            data = response.json()
-            
-            # Filter for stablecoin pools only, excluding Merkl (yield farming) and 0% APY pools
-            stablecoin_pools = []
-            merkl_pools_excluded = 0
-            zero_apy_pools_excluded = 0
-            
-            for pool in data['data']:
-                if (pool.get('tvlUsd') is not None and pool['tvlUsd'] > 0 and 
-                    pool.get('stablecoin') == True):
-                    if pool.get('project') == 'merkl':
-                        merkl_pools_excluded += 1
-                    elif pool.get('apy', 0) == 0:
-                        zero_apy_pools_excluded += 1
-                    else:
-                        stablecoin_pools.append(pool)
-            
-            if merkl_pools_excluded > 0:
-                print(f"Excluded {merkl_pools_excluded} Merkl yield farming pools")
-            if zero_apy_pools_excluded > 0:
-                print(f"Excluded {zero_apy_pools_excluded} pools with 0% APY")
-            
-            stablecoin_pools.sort(key=lambda x: x['tvlUsd'], reverse=True)
-            top_pools = stablecoin_pools[:limit]
+    Returns:
+        Dictionary of selection results keyed by selection name, empty if failed
+    """
+    try:
+        with METRICS.span('stage', stage='fetch_listing'):
+            pools = stream_json_array(API_ENDPOINTS['defi_llama_yields'], 'data',
+                                      rate_limiter=DEFILLAMA_RATE_LIMITER,
+                                      retry_policy=DEFILLAMA_RETRY_POLICY,
+                                      cache=DEFILLAMA_RESPONSE_CACHE)
+            if pools is None:
+                logger.error("Error fetching pools: no response")
+                return {}
             
-            print(f"Successfully fetched {len(top_pools)} stablecoin pools with highest TVL")
-            return top_pools
-        else:
-            error_code = response.status_code if response else "No response"
-            print(f"Error fetching pools: {error_code}")
-            return []
+            pipeline = pipeline or build_default_pipeline()
+            selections = select_pools(pools, selectors, pipeline)
+        
+        for name, count in pipeline.rejected.items():
+            METRICS.gauge('pools_rejected', count, filter=name)
+            if count > 0:
+                logger.info("Excluded %d pools by filter: %s", count, name)
+        
+        return selections
     except Exception as e:
-        print(f"Error fetching pools: {e}")
-        return []
+        logger.exception("Error fetching pools: %s", e)
+        return {}
 
 
 def merge_and_save_pool_data(pool_data: Dict[str, Dict[str, Any]], 
                            db_filename: str = DEFAULT_DB_FILENAME,
-                           json_filename: str = DEFAULT_JSON_FILENAME) -> Optional[pd.DataFrame]:
+                           json_filename: str = DEFAULT_JSON_FILENAME,
+                           replace: bool = False,
+                           matrix: Optional[PoolMatrix] = None,
+                           selection: Optional[List[Dict[str, Any]]] = None) -> Optional[pd.DataFrame]:
     """
     Merge all pool data by date and save to both SQLite database and JSON file.
     
@@ -86,63 +114,98 @@ def merge_and_save_pool_data(pool_data: Dict[str, Dict[str, Any]],
         pool_data: Dictionary containing pool data
         db_filename: SQLite database filename
         json_filename: JSON filename
+        replace: Replace all stored rows instead of upserting into them
+        matrix: Store the histories were folded into by `fetch_and_process_pools`;
+            the merged frame is built from it instead of from the pool frames (optional)
+        selection: Metadata of every selected pool, as collected by
+            `fetch_and_process_pools`, recorded as the active pools in the
+            database. Defaults to the pools in the final dataset.
         
     Returns:
         Merged and cleaned DataFrame, or None if failed
     """
-    merged_df = _merge_pool_dataframes(pool_data)
+    with METRICS.span('stage', stage='merge'):
+        if matrix is not None:
+            METRICS.gauge('merge_matrix_bytes', matrix.nbytes)
+            merged_df = matrix.build(pool_data)
+        else:
+            merged_df = _merge_pool_dataframes(pool_data)
     if merged_df is None or merged_df.empty:
-        print("No data to merge. Exiting.")
+        logger.error("No data to merge")
         return None
 
-    print(f"Successfully merged data for {len(pool_data)} pools")
-    
-    merged_df = _clean_merged_data(merged_df)
-    
-    merged_df = _calculate_weighted_metrics(merged_df)
-    
-    # Save data to both SQLite and JSON
-    _save_to_database(merged_df, pool_data, db_filename)
-    _save_to_json(merged_df, pool_data, json_filename)
+    logger.info("Merged data for %d pools", len(pool_data))
+    
+    pools_before_clean = sum(col.startswith('apy_') for col in merged_df.columns)
+    with METRICS.span('stage', stage='clean'):
+        merged_df = _clean_merged_data(merged_df)
+    METRICS.increment('pools_dropped_total',
+                      pools_before_clean - sum(col.startswith('apy_') for col in merged_df.columns),
+                      reason='incomplete_data')
+    
+    with METRICS.span('stage', stage='weighting'):
+        merged_df = _calculate_weighted_metrics(merged_df)
+    METRICS.gauge('dataset_dates', len(merged_df))
+    METRICS.gauge('dataset_pools', sum(col.startswith('apy_') for col in merged_df.columns))
+    METRICS.gauge('weighted_apy', float(merged_df['weighted_apy'].iloc[-1]))
+    
+    # Save data to both SQLite and JSON, then publish the manifest for this generation
+    with METRICS.span('stage', stage='save_sqlite'):
+        _save_to_database(merged_df, pool_data, db_filename, replace, selection)
+    with METRICS.span('stage', stage='save_json'):
+        artifacts = _save_to_json(merged_df, pool_data, json_filename)
+    with METRICS.span('stage', stage='publish_manifest'):
+        artifacts.append(artifact_entry(db_filename, rows=len(merged_df)))
+        manifest = write_manifest(artifacts)
+    METRICS.gauge('published_bytes', sum(artifact['bytes'] for artifact in artifacts))
+    logger.info("Published generation %d to %s", manifest['generation'], DEFAULT_MANIFEST_FILENAME)
     
     return merged_df
 
 def _merge_pool_dataframes(pool_data: Dict[str, Dict[str, Any]]) -> Optional[pd.DataFrame]:
-    """Merge individual pool dataframes into a single dataframe."""
-    print("Merging pool data...")
-    merged_df = None
+    """
+    Merge individual pool dataframes into a single wide dataframe.
+    
+    All pools are stacked into one long (pool_id, date) frame, duplicate
+    days are averaged in a single groupby, and the result is pivoted onto a
+    shared date index with `apy_<pool_id>`/`tvlUsd_<pool_id>` columns.
+    
+    Args:
+        pool_data: Dictionary containing pool data
+        
+    Returns:
+        Merged DataFrame indexed by date, or None if no pool has APY and TVL data
+    """
+    logger.debug("Merging pool data")
+    numeric_cols = ['apy', 'tvlUsd']
+    frames = []
+    pool_ids = []
     
     for pool_id, pool_info in pool_data.items():
         df = pool_info['data']
-        pool_name = pool_info['name']
-        
-        df = df.copy()
-        df.index = pd.to_datetime(df.index).date
-        df.index.name = 'date'
-        
-        numeric_cols = ['apy', 'tvlUsd']
-        available_cols = [col for col in numeric_cols if col in df.columns]
+        if not all(col in df.columns for col in numeric_cols):
+            continue
         
-        if len(available_cols) == 2:
-            df_subset = df[available_cols].copy()
-            
-            if len(df_subset) != len(df_subset.groupby(df_subset.index).size()):
-                df_subset = df_subset.groupby(df_subset.index).mean()
-            
-            df_subset = df_subset.rename(columns={
-                'apy': f'apy_{pool_id}',
-                'tvlUsd': f'tvlUsd_{pool_id}'
-            })
-            
-            if merged_df is None:
-                merged_df = df_subset
-            else:
-                merged_df = pd.merge(merged_df, df_subset, left_index=True, right_index=True, how='outer')
-                
+        frames.append(df[numeric_cols].set_axis(pd.to_datetime(df.index).normalize(), axis=0))
+        pool_ids.append(pool_id)
+    
+    if not frames:
+        return None
+    
+    long_df = pd.concat(frames, keys=pool_ids, names=['pool_id', 'date']).astype(float)
+    daily_df = long_df.groupby(level=['pool_id', 'date']).mean()
+    merged_df = daily_df.unstack('pool_id')
+    
+    # Keep the per-pool apy/tvlUsd column pairs in pool_data order
+    merged_df = merged_df.reindex(columns=pd.MultiIndex.from_tuples(
+        [(col, pool_id) for pool_id in pool_ids for col in numeric_cols]
+    ))
+    merged_df.columns = [f'{col}_{pool_id}' for col, pool_id in merged_df.columns]
+    merged_df.index = pd.Index(merged_df.index.date, name='date')
+    
     return merged_df
 
 
-
 def _clean_merged_data(merged_df: pd.DataFrame) -> pd.DataFrame:
     """
     Clean merged data by removing NaN values and incomplete pools.
@@ -153,20 +216,20 @@ def _clean_merged_data(merged_df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Cleaned DataFrame
     """
-    print("Cleaning data by removing NaN values...")
+    logger.debug("Cleaning data by removing NaN values")
     
     # Drop columns that are all NaN (pools with no data)
     initial_cols = len(merged_df.columns)
     merged_df = merged_df.dropna(axis=1, how='all')
     dropped_cols = initial_cols - len(merged_df.columns)
     if dropped_cols > 0:
-        print(f"Dropped {dropped_cols} columns with all NaN values")
+        logger.info("Dropped %d columns with all NaN values", dropped_cols)
     
     initial_rows = len(merged_df)
     merged_df = merged_df.dropna(axis=0, how='all')
     dropped_rows = initial_rows - len(merged_df)
     if dropped_rows > 0:
-        print(f"Dropped {dropped_rows} rows with all NaN values")
+        logger.info("Dropped %d rows with all NaN values", dropped_rows)
     
     apy_cols = [col for col in merged_df.columns if col.startswith('apy_')]
     tvl_cols = [col for col in merged_df.columns if col.startswith('tvlUsd_')]
@@ -180,9 +243,9 @@ def _clean_merged_data(merged_df: pd.DataFrame) -> pd.DataFrame:
     
     if pools_to_drop:
         merged_df = merged_df.drop(columns=pools_to_drop)
-        print(f"Dropped {len(pools_to_drop)//2} pools with incomplete data")
+        logger.info("Dropped %d pools with incomplete data", len(pools_to_drop) // 2)
     
-    print(f"Final dataset: {len(merged_df)} rows, {len(merged_df.columns)} columns")
+    logger.info("Final dataset: %d rows, %d columns", len(merged_df), len(merged_df.columns))
     return merged_df
 
 
@@ -190,25 +253,30 @@ def _calculate_weighted_metrics(merged_df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate weighted average APY and moving averages.
     
+    APY and TVL columns are paired by pool ID and pulled out as aligned
+    (dates x pools) matrices, so the TVL-weighted rate is a single masked
+    reduction rather than a loop over pools. Missing APY counts as 0 and
+    missing TVL is left out of the total.
+    
     Args:
         merged_df: DataFrame with pool data
         
     Returns:
         DataFrame with calculated metrics
     """
-    print("Calculating weighted average APY...")
-    apy_cols = [col for col in merged_df.columns if col.startswith('apy_')]
-    tvl_cols = [col for col in merged_df.columns if col.startswith('tvlUsd_')]
+    logger.debug("Calculating weighted average APY")
+    pool_ids = [col[4:] for col in merged_df.columns
+                if col.startswith('apy_') and f'tvlUsd_{col[4:]}' in merged_df.columns]
     
-    merged_df['weighted_apy'] = 0
-    total_tvl = merged_df[tvl_cols].sum(axis=1)
+    apy = merged_df[[f'apy_{pool_id}' for pool_id in pool_ids]].to_numpy(dtype=float)
+    tvl = merged_df[[f'tvlUsd_{pool_id}' for pool_id in pool_ids]].to_numpy(dtype=float)
     
-    for i in range(len(apy_cols)):
-        apy_col = apy_cols[i]
-        tvl_col = tvl_cols[i]
-        merged_df['weighted_apy'] += merged_df[apy_col].fillna(0) * merged_df[tvl_col].fillna(0)
+    tvl = np.where(np.isnan(tvl), 0.0, tvl)
+    apy = np.where(np.isnan(apy), 0.0, apy)
     
-    merged_df['weighted_apy'] = merged_df['weighted_apy'] / total_tvl.replace(0, 1)
+    total_tvl = tvl.sum(axis=1)
+    weighted_sum = np.einsum('ij,ij->i', apy, tvl)
+    merged_df['weighted_apy'] = weighted_sum / np.where(total_tvl == 0, 1, total_tvl)
     
     # Calculate moving averages
     window_size = ROLLING_WINDOW_SIZES['short']
@@ -218,83 +286,61 @@ def _calculate_weighted_metrics(merged_df: pd.DataFrame) -> pd.DataFrame:
 
 
 def _save_to_database(merged_df: pd.DataFrame, pool_data: Dict[str, Dict[str, Any]],
-                     db_filename: str) -> None:
+                     db_filename: str, replace: bool = False,
+                     selection: Optional[List[Dict[str, Any]]] = None) -> None:
     """
     Save merged data and metadata to SQLite database.
 
+    Observations are upserted into the normalised `pool_observations` table,
+    pool metadata into `pools` and the weighted rate into `prime_rate`, all
+    in one transaction.
+
+    With a selection, every selected pool stays active in `pools` at its
+    listing rank, so a pool whose history failed to fetch this run is not
+    taken for one that left the top list.
+
     Args:
         merged_df: Merged DataFrame to save
         pool_data: Original pool data for metadata
         db_filename: Database filename
+        replace: Replace all stored rows instead of upserting into them
+        selection: Metadata of every selected pool in TVL rank order (optional)
     """
-    print(f"Saving data to SQLite database: {db_filename}")
+    logger.debug("Saving data to SQLite database: %s", db_filename)
 
-    # Create directory if it doesn't exist
-    db_dir = os.path.dirname(db_filename)
-    if db_dir and not os.path.exists(db_dir):
-        os.makedirs(db_dir, exist_ok=True)
-        print(f"Created directory: {db_dir}")
-
-    conn = sqlite3.connect(db_filename)
-    
-    # Ensure we're starting with a clean slate
-    cursor = conn.cursor()
-    cursor.execute("DROP TABLE IF EXISTS pool_data")
-    cursor.execute("DROP TABLE IF EXISTS pool_metadata")
-    
-    # Save main data
-    merged_df.to_sql('pool_data', conn, if_exists='replace', index=True)
-    
-    # Save pool metadata (only for pools in final dataset)
+    # Save pool metadata (only for pools in final dataset unless the selection is known)
     pool_metadata = _create_pool_metadata(merged_df, pool_data)
-    metadata_df = pd.DataFrame(pool_metadata)
-    metadata_df.to_sql('pool_metadata', conn, if_exists='replace', index=False)
-    
-    # Final cleanup
-    cursor.execute("VACUUM")
-    conn.commit()
-    conn.close()
+    changed_rows = save_pool_dataset(db_filename, merged_df, selection or pool_metadata, replace=replace)
+    METRICS.gauge('db_rows_changed', changed_rows)
     
-    print(f"Data successfully saved to {db_filename}")
-    print(f"Final dataset contains {len(pool_metadata)} pools with valid data")
+    logger.info("Saved %d pools with valid data to %s", len(pool_metadata), db_filename)
 
 
 def _save_to_json(merged_df: pd.DataFrame, pool_data: Dict[str, Dict[str, Any]],
-                  json_filename: str) -> None:
+                  json_filename: str) -> List[Dict[str, Any]]:
     """
     Save merged data and metadata to JSON file.
 
+    Both files are published atomically, so readers never see a partially
+    written file.
+
     Args:
         merged_df: Merged DataFrame to save
         pool_data: Original pool data for metadata
         json_filename: JSON filename
+
+    Returns:
+        Manifest entries for the published files
     """
-    print(f"Saving data to JSON files...")
+    logger.debug("Saving data to JSON files")
 
     # Create directory if it doesn't exist
     json_dir = os.path.dirname(DEFAULT_JSON_DATA_FILENAME)
     if json_dir and not os.path.exists(json_dir):
         os.makedirs(json_dir, exist_ok=True)
-        print(f"Created directory: {json_dir}")
+        logger.info("Created directory: %s", json_dir)
 
-    # Prepare pool_data for JSON export
-    pool_data_for_json = {}
-    
-    # Convert DataFrame to dictionary with date strings as keys
-    for date in merged_df.index:
-        date_str = str(date)
-        pool_data_for_json[date_str] = {}
-        
-        for col in merged_df.columns:
-            value = merged_df.loc[date, col]
-            # Handle NaN values - convert to None for JSON compatibility
-            if pd.isna(value):
-                pool_data_for_json[date_str][col] = None
-            else:
-                pool_data_for_json[date_str][col] = float(value)
-    
-    # Create pool metadata (same as for SQLite)
-    pool_metadata = _create_pool_metadata(merged_df, pool_data)
+    pool_data_for_json = _build_pool_data_records(merged_df)
     
     # Save pool data to separate file
     pool_data_filename = DEFAULT_JSON_DATA_FILENAME
@@ -310,8 +356,34 @@ def _save_to_json(merged_df: pd.DataFrame, pool_data: Dict[str, Dict[str, Any]],
         }
     }
     
-    with open(pool_data_filename, 'w') as f:
-        json.dump(pool_data_export, f, indent=2, default=str)
+    pool_data_artifact = publish_json(pool_data_filename, pool_data_export, rows=len(merged_df), indent=2)
+    
+    # Save the compact columnar variant with pre-compressed copies
+    columnar_filename = DEFAULT_JSON_COLUMNAR_FILENAME
+    columnar_export = _build_columnar_export(merged_df)
+    columnar_export['export_info'] = pool_data_export['export_info']
+    columnar_data = encode_json(columnar_export)
+    columnar_artifacts = [publish_bytes(columnar_filename, columnar_data, rows=len(merged_df))]
+    columnar_artifacts += publish_compressed_copies(columnar_filename, columnar_data, rows=len(merged_df))
+    
+    # Create pool metadata (same as for SQLite)
+    pool_metadata = _create_pool_metadata(merged_df, pool_data)
+    
+    # Save the slim prime rate series for the SPR chart and the Telegram bot
+    prime_rate_filename = DEFAULT_JSON_PRIME_RATE_FILENAME
+    prime_rate_export = _build_prime_rate_export(merged_df, len(pool_metadata))
+    prime_rate_export['export_info'] = pool_data_export['export_info']
+    prime_rate_artifact = publish_json(prime_rate_filename, prime_rate_export, rows=len(merged_df))
+    
+    # Save the precomputed aggregates for the contribution charts
+    contribution_artifacts = [
+        publish_json(DEFAULT_JSON_POOL_CONTRIBUTIONS_FILENAME,
+                     pool_contributions_over_time(merged_df, pool_metadata), rows=len(merged_df)),
+        publish_json(DEFAULT_JSON_PROTOCOL_CONTRIBUTIONS_FILENAME,
+                     group_contributions(pool_metadata, 'project'), rows=len(pool_metadata)),
+        publish_json(DEFAULT_JSON_CHAIN_CONTRIBUTIONS_FILENAME,
+                     group_contributions(pool_metadata, 'chain'), rows=len(pool_metadata))
+    ]
     
     # Save pool metadata to separate file
     pool_metadata_filename = DEFAULT_JSON_METADATA_FILENAME
@@ -323,13 +395,160 @@ def _save_to_json(merged_df: pd.DataFrame, pool_data: Dict[str, Dict[str, Any]],
         }
     }
     
-    with open(pool_metadata_filename, 'w') as f:
-        json.dump(pool_metadata_export, f, indent=2, default=str)
+    pool_metadata_artifact = publish_json(pool_metadata_filename, pool_metadata_export,
+                                          rows=len(pool_metadata), indent=2)
     
-    print(f"Data successfully saved to:")
-    print(f"  - {pool_data_filename}")
-    print(f"  - {pool_metadata_filename}")
-    print(f"JSON export contains {len(pool_metadata)} pools with valid data")
+    artifacts = [pool_data_artifact, *columnar_artifacts, prime_rate_artifact, *contribution_artifacts,
+                 pool_metadata_artifact]
+    for artifact in artifacts:
+        logger.debug("Saved %s (%.0f KB)", artifact['path'], artifact['bytes'] / 1024)
+    logger.info("Saved %d JSON files (%.0f KB) for %d pools", len(artifacts),
+                sum(artifact['bytes'] for artifact in artifacts) / 1024, len(pool_metadata))
+
+    return artifacts
+
+
+def _build_pool_data_records(merged_df: pd.DataFrame) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Convert the merged frame to {date: {column: value}} records for JSON export.
+
+    The values are taken from the frame's float matrix in one pass, with NaN
+    replaced by None so they serialise as null.
+
+    Args:
+        merged_df: Merged DataFrame indexed by date
+
+    Returns:
+        Dictionary of per-date column values keyed by date string
+    """
+    cells = _json_cells(merged_df.to_numpy(dtype=float))
+
+    columns = [str(col) for col in merged_df.columns]
+    return {
+        str(date): dict(zip(columns, row))
+        for date, row in zip(merged_df.index, cells.tolist())
+    }
+
+
+def _build_columnar_export(merged_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Convert the merged frame to the compact columnar export.
+
+    Dates are listed once. Each pool is stored as APY and TVL arrays covering
+    only the dates from its first to its last observation, with `start`
+    giving the offset of the first element in `dates`, instead of being
+    padded with nulls:
+
+        {"format": "columnar-v1", "dates": [...],
+         "pools": [{"id": ..., "start": 12, "apy": [...], "tvlUsd": [...]}, ...],
+         "weighted_apy": [...], "ma_apy_14d": [...]}
+
+    Pools are listed in column (TVL rank) order.
+
+    Args:
+        merged_df: Merged DataFrame indexed by date
+
+    Returns:
+        Columnar export dictionary
+    """
+    values = merged_df.to_numpy(dtype=float)
+    observed = ~np.isnan(values)
+    positions = {col: i for i, col in enumerate(merged_df.columns)}
+
+    pools = []
+    for col in merged_df.columns:
+        if not col.startswith('apy_') or f'tvlUsd_{col[4:]}' not in positions:
+            continue
+        pool_id = col[4:]
+        apy_pos, tvl_pos = positions[col], positions[f'tvlUsd_{pool_id}']
+
+        present = np.flatnonzero(observed[:, apy_pos] | observed[:, tvl_pos])
+        if present.size == 0:
+            continue
+        start, end = int(present[0]), int(present[-1]) + 1
+        pools.append({
+            'id': pool_id,
+            'start': start,
+            'apy': _json_cells(values[start:end, apy_pos]).tolist(),
+            'tvlUsd': _json_cells(values[start:end, tvl_pos]).tolist()
+        })
+
+    export = {
+        'format': 'columnar-v1',
+        'dates': [str(date) for date in merged_df.index],
+        'pools': pools
+    }
+    for col in ('weighted_apy', 'ma_apy_14d'):
+        if col in positions:
+            export[col] = _json_cells(values[:, positions[col]]).tolist()
+    return export
+
+
+def _build_prime_rate_export(merged_df: pd.DataFrame, pool_count: int) -> Dict[str, Any]:
+    """
+    Build the slim prime rate series with a summary of the latest values.
+
+    The summary compares the latest date with the previous one (the daily
+    change the Telegram bot reports) and with the dates 7 and 30 days
+    earlier, where those dates are present.
+
+    Args:
+        merged_df: Merged DataFrame with weighted_apy and ma_apy_14d
+        pool_count: Number of pools in the dataset
+
+    Returns:
+        Prime rate export dictionary
+    """
+    dates = [str(date) for date in merged_df.index]
+    weighted_apy = merged_df['weighted_apy'].to_numpy(dtype=float)
+    ma_apy = merged_df['ma_apy_14d'].to_numpy(dtype=float)
+
+    def value(values: np.ndarray, i: Optional[int]) -> Optional[float]:
+        return None if i is None or np.isnan(values[i]) else float(values[i])
+
+    def change(values: np.ndarray, i: Optional[int]) -> Optional[float]:
+        latest, earlier = value(values, len(values) - 1), value(values, i)
+        return None if latest is None or earlier is None else latest - earlier
+
+    summary = {'pool_count': pool_count, 'data_points': len(dates)}
+    if dates:
+        positions = {date: i for i, date in enumerate(merged_df.index)}
+        latest_date = merged_df.index[-1]
+        previous = len(dates) - 2 if len(dates) > 1 else None
+        week_ago = positions.get(latest_date - timedelta(days=7))
+        month_ago = positions.get(latest_date - timedelta(days=30))
+
+        summary.update({
+            'date': dates[-1],
+            'previous_date': dates[previous] if previous is not None else None,
+            'weighted_apy': value(weighted_apy, len(dates) - 1),
+            'ma_apy_14d': value(ma_apy, len(dates) - 1),
+            'weighted_apy_change_1d': change(weighted_apy, previous),
+            'ma_apy_14d_change_1d': change(ma_apy, previous),
+            'weighted_apy_change_7d': change(weighted_apy, week_ago),
+            'weighted_apy_change_30d': change(weighted_apy, month_ago),
+        })
+        if not np.isnan(weighted_apy).all():
+            summary.update({
+                'weighted_apy_min': float(np.nanmin(weighted_apy)),
+                'weighted_apy_max': float(np.nanmax(weighted_apy)),
+                'weighted_apy_mean': float(np.nanmean(weighted_apy))
+            })
+
+    return {
+        'format': 'prime-rate-v1',
+        'dates': dates,
+        'weighted_apy': _json_cells(weighted_apy).tolist(),
+        'ma_apy_14d': _json_cells(ma_apy).tolist(),
+        'summary': summary
+    }
+
+
+def _json_cells(values: np.ndarray) -> np.ndarray:
+    """Convert a float array to an object array with NaN replaced by None."""
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    return cells
 
 
 def _create_pool_metadata(merged_df: pd.DataFrame, 
@@ -369,115 +588,390 @@ def _create_pool_metadata(merged_df: pd.DataFrame,
     return pool_metadata
 
 
-def fetch_and_process_pools(limit: int = 100, days: int = DEFAULT_FETCH_DAYS) -> Dict[str, Dict[str, Any]]:
+def fetch_and_process_pools(limit: int = 100, days: int = DEFAULT_FETCH_DAYS,
+                            incremental: bool = False,
+                            db_filename: str = DEFAULT_DB_FILENAME,
+                            max_workers: Optional[int] = None,
+                            backend: str = HTTP_BACKEND,
+                            matrix: Optional[PoolMatrix] = None,
+                            selection: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
     """
     Fetch and process data for top stablecoin pools.
     
+    Pool histories are downloaded concurrently, by a bounded worker pool or,
+    with the asyncio backend, on an event loop; the shared DeFiLlama rate
+    limiter keeps the overall request rate within budget.
+    
+    In incremental mode the history already stored in the database is reused.
+    A pool whose stored history reaches yesterday is not fetched at all: only
+    today's point can still change, and it is taken from the pools listing.
+    New pools and pools with missing days are fetched from their last stored
+    date on, and the fetched days replace the stored ones.
+    
+    With a matrix, each history is folded into it as soon as it arrives and
+    released, so parsing and merging overlap the remaining downloads and no
+    more than a few raw histories are held at a time.
+    
     Args:
         limit: Number of top pools to fetch
         days: Number of days of historical data to fetch
+        incremental: Whether to build on the history stored in the database
+        db_filename: SQLite database filename used in incremental mode
+        max_workers: Maximum number of concurrent history downloads, defaults to
+            FETCH_MAX_WORKERS (requests) or ASYNC_MAX_CONCURRENCY (asyncio)
+        backend: HTTP backend for the histories, 'requests' or 'asyncio'
+        matrix: Store to fold the histories into; the returned pool entries
+            then have 'data' set to None (optional)
+        selection: List to extend with the metadata of every selected pool in
+            TVL rank order, including pools whose history could not be
+            fetched (optional)
         
     Returns:
         Dictionary containing processed pool data
     """
+    if backend not in ('requests', 'asyncio'):
+        raise ValueError(f"Unknown HTTP backend: {backend}")
+    if max_workers is None:
+        max_workers = ASYNC_MAX_CONCURRENCY if backend == 'asyncio' else FETCH_MAX_WORKERS
+    if backend == 'requests':
+        # Workers beyond the session's connection pool would block waiting for a connection
+        get_http_session(pool_size=max_workers)
+    
     top_pools = fetch_top_stablecoin_pools_by_tvl(limit)
     
     if not top_pools:
-        print("No pools fetched. Exiting.")
+        logger.error("No pools fetched")
         return {}
     
-    print("\nTop 10 pools by TVL:")
-    for i, pool in enumerate(top_pools[:10]):
-        tvl = pool['tvlUsd']
-        apy = pool.get('apy', 0)
-        name = pool.get('name', 'Unknown')
-        print(f"{i+1}. {name} - TVL: ${tvl:,.0f} - APY: {apy:.2f}%")
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, pool in enumerate(top_pools[:10]):
+            logger.debug("Top pool %d: %s - TVL: $%s - APY: %.2f%%", i + 1, pool.get('name', 'Unknown'),
+                         f"{pool['tvlUsd']:,.0f}", pool.get('apy', 0))
     
-    print(f"\nFetching historical data for {len(top_pools)} pools...")
-    pool_data = {}
+    stored_history = load_stored_pool_history(db_filename, days) if incremental else {}
+    
+    # Usable history of each pool, None once it has been folded into the matrix
+    histories = {}
     
+    def keep_history(pool_id: str, df: Optional[pd.DataFrame]) -> None:
+        if not validate_dataframe(df):
+            return
+        if matrix is not None:
+            matrix.add(pool_id, df)
+            df = None
+        histories[pool_id] = df
+    
+    today = utc_now().date()
+    pools_to_fetch = []
+    for i, pool in enumerate(top_pools):
+        stored_df = stored_history.pop(pool['pool'], None)
+        if _reaches_yesterday(stored_df, today):
+            keep_history(pool['pool'], _with_listing_point(stored_df, pool, today))
+        else:
+            pools_to_fetch.append((i, pool, stored_df))
+    
+    if incremental:
+        logger.info("Incremental fetch: %d pools up to date (today's point from the listing), %d to fetch",
+                    len(top_pools) - len(pools_to_fetch), len(pools_to_fetch))
+    
+    logger.info("Fetching historical data for %d pools with %d %s", len(pools_to_fetch), max_workers,
+                "concurrent requests" if backend == 'asyncio' else "workers")
+    start_time = time.monotonic()
+    
+    # Report progress in quarters rather than once per pool
+    milestones = {-(-len(pools_to_fetch) * quarter // 4) for quarter in range(1, 4)}
+    fetched = []
+    listing = {pool['pool']: pool for _, pool, _ in pools_to_fetch}
+    
+    def on_history(pool_id: str, df: Optional[pd.DataFrame]) -> None:
+        if _reaches_yesterday(df, today):
+            df = _with_listing_point(df, listing[pool_id], today)
+        keep_history(pool_id, df)
+        fetched.append(pool_id)
+        if len(fetched) in milestones:
+            logger.info("Fetched %d/%d pool histories", len(fetched), len(pools_to_fetch))
+    
+    with METRICS.span('stage', stage='fetch_histories'):
+        if backend == 'asyncio':
+            _fetch_pool_histories_async(pools_to_fetch, days, max_workers, on_history)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(_fetch_pool_history, pool, i, stored_df, days): pool['pool']
+                    for i, pool, stored_df in pools_to_fetch
+                }
+                # Drop each future once handled so its history can be freed
+                for future in as_completed(futures):
+                    on_history(futures.pop(future), future.result())
+    
+    elapsed = time.monotonic() - start_time
+    if pools_to_fetch:
+        throughput = len(pools_to_fetch) / elapsed if elapsed > 0 else float('inf')
+        logger.info("Fetched %d pool histories in %.1fs (%.2f pools/s)",
+                    len(pools_to_fetch), elapsed, throughput)
+    
+    # Assemble in TVL order so downstream column order is stable
+    pool_data = {}
     for i, pool in enumerate(top_pools):
         pool_id = pool['pool']
-        pool_name = pool.get('name', f'Pool_{i}')
-        
-        df = fetch_pool_chart_data(pool_id, pool_name, days)
-        if validate_dataframe(df):
-            symbol = pool.get('symbol', 'Unknown')
-            if isinstance(symbol, list):
-                symbol = ', '.join(symbol)
-            
-            pool_data[pool_id] = {
-                'data': df,
-                'name': pool_name,
-                'current_tvl': pool['tvlUsd'],
-                'current_apy': pool.get('apy', 0),
-                'chain': pool.get('chain', 'Unknown'),
-                'project': pool.get('project', 'Unknown'),
-                'symbol': symbol
-            }
+        info = _listing_info(pool, i)
         
-        time.sleep(RATE_LIMIT_DELAY)
+        if pool_id in histories:
+            pool_data[pool_id] = {'data': histories[pool_id], **info}
+        if selection is not None:
+            selection.append({'pool_id': pool_id, **info, 'last_updated': datetime.now().isoformat()})
+    
+    missing_pools = [pool['pool'] for pool in top_pools if pool['pool'] not in pool_data]
+    METRICS.gauge('pools_selected', len(top_pools))
+    METRICS.gauge('pools_fetched', len(pools_to_fetch))
+    METRICS.gauge('pools_up_to_date', len(top_pools) - len(pools_to_fetch))
+    METRICS.increment('pools_dropped_total', len(missing_pools), reason='no_history')
+    if missing_pools:
+        logger.warning("No usable history for %d pools: %s", len(missing_pools), ', '.join(missing_pools))
+    if DEFILLAMA_RETRY_POLICY.retries_used:
+        logger.info("Used %d of %s retries this run", DEFILLAMA_RETRY_POLICY.retries_used,
+                    DEFILLAMA_RETRY_POLICY.retry_budget)
     
     return pool_data
 
 
-def print_summary_statistics(merged_df: pd.DataFrame, pool_data: Dict[str, Dict[str, Any]]) -> None:
+def _fetch_pool_history(pool: Dict[str, Any], index: int, stored_df: Optional[pd.DataFrame],
+                        days: int) -> Optional[pd.DataFrame]:
+    """
+    Fetch the history of a single pool, extending its stored history if any.
+    
+    Args:
+        pool: Pool dictionary from the yields listing
+        index: Position of the pool in the TVL ranking (used for its default name)
+        stored_df: History already stored for this pool (optional)
+        days: Number of days of historical data to fetch
+        
+    Returns:
+        DataFrame with the pool history, or None if nothing is available
+    """
+    pool_name = pool.get('name', f'Pool_{index}')
+    last_stored_date = stored_df.index.max().date() if stored_df is not None else None
+    
+    df = fetch_pool_chart_data(pool['pool'], pool_name, days, since=last_stored_date)
+    if stored_df is not None:
+        df = _combine_pool_history(stored_df, df)
+    
+    return df
+
+
+def _fetch_pool_histories_async(pools_to_fetch: List[Tuple[int, Dict[str, Any], Optional[pd.DataFrame]]],
+                                days: int, max_concurrency: int,
+                                on_history: Callable[[str, Optional[pd.DataFrame]], None]) -> None:
+    """
+    Fetch pool histories with the asyncio backend, extending stored histories
+    like `_fetch_pool_history`.
+    
+    Args:
+        pools_to_fetch: (TVL rank, pool dictionary, stored history) of each pool
+        days: Number of days of historical data to fetch
+        max_concurrency: Maximum number of requests in flight
+        on_history: Called with the pool ID and its history as each one arrives
+    """
+    # Imported here so the requests backend never loads asyncio or aiohttp
+    from async_http import fetch_pool_charts
+    
+    stored_history = {pool['pool']: stored_df for _, pool, stored_df in pools_to_fetch}
+    jobs = [(pool['pool'], pool.get('name', f'Pool_{i}'),
+             stored_df.index.max().date() if stored_df is not None else None)
+            for i, pool, stored_df in pools_to_fetch]
+    
+    def on_result(pool_id: str, df: Optional[pd.DataFrame]) -> None:
+        stored_df = stored_history.pop(pool_id)
+        on_history(pool_id, _combine_pool_history(stored_df, df) if stored_df is not None else df)
+    
+    fetch_pool_charts(jobs, days, on_result, max_concurrency=max_concurrency)
+
+
+def _listing_info(pool: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """
+    Extract the descriptive fields of a pool from its listing entry.
+    
+    Args:
+        pool: Pool dictionary from the pools listing
+        index: Position of the pool in the TVL ranking (used for its default name)
+        
+    Returns:
+        Dictionary with name, current TVL/APY, chain, project and symbol
+    """
+    symbol = pool.get('symbol', 'Unknown')
+    if isinstance(symbol, list):
+        symbol = ', '.join(symbol)
+    
+    return {
+        'name': pool.get('name', f'Pool_{index}'),
+        'current_tvl': pool['tvlUsd'],
+        'current_apy': pool.get('apy', 0),
+        'chain': pool.get('chain', 'Unknown'),
+        'project': pool.get('project', 'Unknown'),
+        'symbol': symbol
+    }
+
+
+def _reaches_yesterday(df: Optional[pd.DataFrame], today: date) -> bool:
+    """Whether a pool history has data up to yesterday, so only today's point can still change."""
+    return validate_dataframe(df) and df.index.max().date() >= today - timedelta(days=1)
+
+
+def _with_listing_point(stored_df: pd.DataFrame, pool: Dict[str, Any], today: date) -> pd.DataFrame:
     """
-    Print comprehensive summary statistics for the dataset.
+    Set today's point of a pool history from the pool's entry in the listing.
+    
+    Only used for histories that reach yesterday, so it never leaves a gap
+    before today's point.
+    
+    Args:
+        stored_df: History with 'apy' and 'tvlUsd' columns
+        pool: Pool dictionary from the yields listing
+        today: Current UTC date
+        
+    Returns:
+        History with today's row added or replaced, or unchanged if the
+        listing has no APY for the pool
+    """
+    if pool.get('apy') is None or pool.get('tvlUsd') is None:
+        return stored_df
+    
+    point = pd.DataFrame({'apy': [float(pool['apy'])], 'tvlUsd': [float(pool['tvlUsd'])]},
+                         index=pd.DatetimeIndex([pd.Timestamp(today)], name=stored_df.index.name))
+    return _combine_pool_history(stored_df, point)
+
+
+def _combine_pool_history(stored_df: pd.DataFrame, 
+                          new_df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge newly fetched rows into the stored history of a pool.
+    
+    Refetched days replace the stored rows for the same days.
+    
+    Args:
+        stored_df: Stored history with 'apy' and 'tvlUsd' columns
+        new_df: Newly fetched rows (may be None or empty if the fetch failed)
+        
+    Returns:
+        Combined DataFrame sorted by date
+    """
+    if not validate_dataframe(new_df):
+        return stored_df
+    
+    new_cols = [col for col in ['apy', 'tvlUsd'] if col in new_df.columns]
+    stored_df = stored_df[~stored_df.index.normalize().isin(new_df.index.normalize())]
+    return pd.concat([stored_df, new_df[new_cols]]).sort_index()
+
+
+def print_summary_statistics(merged_df: pd.DataFrame, pool_data: Dict[str, Dict[str, Any]],
+                             full_rebuild: bool = True) -> None:
+    """
+    Log summary statistics for the dataset.
     
     Args:
         merged_df: Merged DataFrame with all pool data
         pool_data: Original pool data dictionary
+        full_rebuild: Whether the database was purged before this run
     """
-    print("\n=== Summary Statistics ===")
-    print(f"Database contains data for {len(pool_data)} pools")
-    print(f"Date range: {merged_df.index.min()} to {merged_df.index.max()}")
-    print(f"Total data points: {len(merged_df)}")
-    
     # Verify data freshness
     latest_date = merged_df.index.max()
-    current_date = datetime.now().date()
+    current_date = utc_now().date()
     days_old = (current_date - latest_date).days
-    print(f"Latest data date: {latest_date} (data is {days_old} days old)")
+    logger.info("Dataset: %d pools, %d dates from %s to %s (latest data is %d days old)",
+                len(pool_data), len(merged_df), merged_df.index.min(), latest_date, days_old)
+    if days_old > 1:
+        logger.warning("Latest data is %d days old", days_old)
     
     if 'weighted_apy' in merged_df.columns:
         current_apy = merged_df['weighted_apy'].iloc[-1]
         mean_apy = merged_df['weighted_apy'].mean()
-        print(f"Current DeFi Prime Rate: {current_apy:.4f}%")
-        print(f"Mean DeFi Prime Rate: {mean_apy:.4f}%")
-    
-    print(f"\nData has been exported to:")
-    print(f"  - SQLite: {DEFAULT_DB_FILENAME}")
-    print(f"  - JSON Data: {DEFAULT_JSON_DATA_FILENAME}")
-    print(f"  - JSON Metadata: {DEFAULT_JSON_METADATA_FILENAME}")
-    print(f"All old data has been purged to prevent stale information.")
-
-
-def main() -> None:
+        logger.info("DeFi Prime Rate: %.4f%% (mean %.4f%%)", current_apy, mean_apy)
+    
+    logger.info("Data exported to %s, %s and %s (%s)", DEFAULT_DB_FILENAME, DEFAULT_JSON_DATA_FILENAME,
+                DEFAULT_JSON_METADATA_FILENAME,
+                "full rebuild" if full_rebuild else "stored history updated incrementally")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for the fetcher."""
+    parser = argparse.ArgumentParser(description="Fetch and compute the DeFi Prime Rate")
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help="Replace the stored data with a re-download of the full history of every pool")
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f"Number of pool histories to download concurrently "
+                             f"(default {FETCH_MAX_WORKERS}, or {ASYNC_MAX_CONCURRENCY} with asyncio)")
+    parser.add_argument('--http-backend', default=HTTP_BACKEND, choices=['requests', 'asyncio'],
+                        help="Download histories on worker threads (requests) or on an event loop (asyncio)")
+    parser.add_argument('--vacuum', action='store_true',
+                        help="Compact the database file and exit (maintenance)")
+    parser.add_argument('--metrics-file', default=METRICS_JSONL_FILENAME,
+                        help="Append spans and the run summary to this JSON lines file ('-' for stdout, '' to disable)")
+    parser.add_argument('--prometheus-textfile', default=METRICS_PROMETHEUS_FILENAME,
+                        help="Publish run metrics to this Prometheus textfile")
+    parser.add_argument('--log-level', default=LOG_LEVEL,
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], type=str.upper,
+                        help="Log verbosity (DEBUG shows every request)")
+    parser.add_argument('--log-format', default=LOG_FORMAT, choices=['text', 'json'],
+                        help="Log as plain text or as one JSON object per line")
+    return parser.parse_args()
+
+
+def run_pipeline(args: argparse.Namespace) -> bool:
     """
-    Main function to fetch, process, and save DeFi Prime Rate data.
-    """
-    # Purge existing database to ensure fresh data
-    print("\n=== Purging existing database ===")
-    purge_database()
+    Fetch, merge, save and summarise the pool data.
     
-    # Fetch and process pools
-    print("\n=== Fetching top 100 stablecoin pools by TVL ===")
-    pool_data = fetch_and_process_pools(limit=100, days=360)
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        True if the data was fetched and published
+    """
+    # Fetch and process pools, folding each history into the matrix as it arrives
+    matrix = PoolMatrix()
+    selection = []
+    pool_data = fetch_and_process_pools(limit=100, days=360,
+                                        incremental=not args.full_rebuild,
+                                        max_workers=args.workers,
+                                        backend=args.http_backend,
+                                        matrix=matrix, selection=selection)
     
     if not pool_data:
-        print("No pool data fetched successfully. Exiting.")
-        return
+        logger.error("No pool data fetched successfully")
+        return False
     
     # Merge and save data to database
-    merged_df = merge_and_save_pool_data(pool_data)
+    merged_df = merge_and_save_pool_data(pool_data, replace=args.full_rebuild, matrix=matrix,
+                                         selection=selection)
     
     if merged_df is None:
-        print("Failed to merge and save data. Exiting.")
-        return
+        logger.error("Failed to merge and save data")
+        return False
     
     # Print summary statistics
-    print_summary_statistics(merged_df, pool_data)
+    print_summary_statistics(merged_df, pool_data, full_rebuild=args.full_rebuild)
+    return True
+
+
+def main() -> None:
+    """
+    Main function to fetch, process, and save DeFi Prime Rate data.
+    """
+    args = parse_args()
+    configure_logging(args.log_level, args.log_format)
+    
+    if args.vacuum:
+        vacuum_database(DEFAULT_DB_FILENAME)
+        return
+    
+    METRICS.configure(args.metrics_file or None, args.prometheus_textfile)
+    success = False
+    try:
+        with METRICS.span('run'):
+            success = run_pipeline(args)
+    finally:
+        summary = METRICS.finish(success)
+        stages = ', '.join(f"{stage} {seconds:.1f}s" for stage, seconds in summary['stages'].items())
+        logger.info("Run took %.1fs (%s)", summary['duration_s'], stages)
 
 
 if __name__ == "__main__":
@@ -8,20 +8,651 @@ to eliminate code duplication and improve maintainability.
 import sqlite3
 import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterable, Iterator, Tuple
+import codecs
+import json
+import logging
+import random
+import threading
 import time
 import os
 
 from config import (
-    API_ENDPOINTS, DEFAULT_DB_FILENAME,
-    RATE_LIMIT_DELAY, RATE_LIMIT_RETRY_DELAY, COINGECKO_FREE_TIER_DELAY
+    API_ENDPOINTS, DEFAULT_DB_FILENAME, COINGECKO_FREE_TIER_DELAY,
+    DEFILLAMA_REQUESTS_PER_SECOND, DEFILLAMA_RATE_LIMIT_BURST,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_SIZE,
+    HTTP_CONNECTION_RETRIES, HTTP_RETRY_BACKOFF, HTTP_STREAM_CHUNK_SIZE,
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_BUDGET,
+    CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN,
+    HTTP_CACHE_ENABLED, HTTP_CACHE_DIR, HTTP_CACHE_TTL, HTTP_CACHE_MAX_BYTES
 )
+from http_cache import ResponseCache
+from metrics import METRICS
+import database
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_http_session: Optional[requests.Session] = None
+_http_session_pool_size: Optional[int] = None
+_http_session_lock = threading.Lock()
+
+
+def create_http_session(pool_size: int = HTTP_POOL_SIZE,
+                        connection_retries: int = HTTP_CONNECTION_RETRIES) -> requests.Session:
+    """
+    Create an HTTP session with connection pooling, keep-alive and compression.
+    
+    The mounted adapter only retries failed connection attempts, which never
+    reached the server; everything else is handled by `request_with_retry`.
+    
+    Args:
+        pool_size: Maximum number of keep-alive connections per host
+        connection_retries: Transport-level retry attempts
+        
+    Returns:
+        Configured requests Session
+    """
+    session = requests.Session()
+    _mount_pooled_adapter(session, pool_size, connection_retries)
+    session.headers.update({
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+    return session
+
+
+def _mount_pooled_adapter(session: requests.Session, pool_size: int,
+                          connection_retries: int = HTTP_CONNECTION_RETRIES) -> None:
+    """Mount a connection pooling adapter for http and https on a session."""
+    retry = Retry(
+        total=connection_retries,
+        connect=connection_retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size,
+                          max_retries=retry, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def get_http_session(pool_size: Optional[int] = None) -> requests.Session:
+    """
+    Return the HTTP session shared by every outbound call in the process.
+    
+    The pool blocks when all its connections are in use, so callers running
+    more concurrent requests than HTTP_POOL_SIZE pass their concurrency here
+    and the pool is grown to match.
+    
+    Args:
+        pool_size: Keep-alive connections per host the session must allow (optional)
+        
+    Returns:
+        Shared requests Session, created on first use
+    """
+    global _http_session, _http_session_pool_size
+    pool_size = max(pool_size or 0, HTTP_POOL_SIZE)
+    with _http_session_lock:
+        if _http_session is None:
+            _http_session = create_http_session(pool_size=pool_size)
+            _http_session_pool_size = pool_size
+        elif _http_session_pool_size is not None and pool_size > _http_session_pool_size:
+            # Connections already pooled are dropped with the old adapter
+            old_adapter = _http_session.get_adapter('https://')
+            _mount_pooled_adapter(_http_session, pool_size)
+            old_adapter.close()
+            _http_session_pool_size = pool_size
+            logger.debug("Grew the HTTP connection pool to %d connections per host", pool_size)
+        return _http_session
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how often requests may be sent.
+    
+    Tokens refill continuously at `rate` per second up to `burst`; every
+    request takes one token and blocks until one is available.
+    """
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available, without blocking.
+        
+        Returns:
+            0 if a request may be sent now, otherwise seconds until a token is due
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            
+            return (1 - self._tokens) / self.rate
+    
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            wait_time = self.try_acquire()
+            if wait_time <= 0:
+                return
+            time.sleep(wait_time)
+
+
+# Shared by every thread talking to DeFiLlama so the budget is enforced globally
+DEFILLAMA_RATE_LIMITER = RateLimiter(DEFILLAMA_REQUESTS_PER_SECOND, DEFILLAMA_RATE_LIMIT_BURST)
+
+
+class RetryPolicy:
+    """
+    Thread-safe retry policy shared by every request to an API.
+    
+    Backoff is exponential with full jitter and honours `Retry-After`. A
+    per-run retry budget caps the total number of retries, and a circuit
+    breaker stops sending requests for a cooldown period once too many
+    consecutive 5xx/connection failures have been seen. After the cooldown a
+    single trial request is let through; the circuit closes if it succeeds
+    and reopens if it fails.
+    """
+    
+    RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+    
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS,
+                 base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY,
+                 retry_budget: Optional[int] = RETRY_BUDGET,
+                 failure_threshold: int = CIRCUIT_BREAKER_THRESHOLD,
+                 cooldown: float = CIRCUIT_BREAKER_COOLDOWN):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.retries_used = 0
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = False
+        self._lock = threading.Lock()
+    
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute how long to wait before the next attempt.
+        
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            retry_after: Delay requested by the server, if any
+            
+        Returns:
+            Delay in seconds
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+    
+    def consume_retry(self) -> bool:
+        """Take one retry from the budget; False once it is exhausted."""
+        with self._lock:
+            if self.retry_budget is not None and self.retries_used >= self.retry_budget:
+                return False
+            self.retries_used += 1
+            return True
+    
+    def allow_request(self) -> bool:
+        """Whether the circuit breaker lets a request through."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._half_open_in_flight or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            # Half-open: let a single trial request through until it is resolved
+            self._half_open_in_flight = True
+            return True
+    
+    def record_success(self) -> None:
+        """Reset the failure count after a successful response, closing the circuit."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._half_open_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Count a 5xx/connection failure, opening the circuit at the threshold."""
+        with self._lock:
+            if self._half_open_in_flight:
+                # The trial request failed, so the circuit stays open for another cooldown
+                self._half_open_in_flight = False
+                self._opened_at = time.monotonic()
+                logger.error("Circuit breaker trial request failed, pausing requests for %.0f seconds",
+                             self.cooldown)
+                return
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.failure_threshold and self._opened_at is None:
+                self._opened_at = time.monotonic()
+                logger.error("Circuit breaker opened after %d consecutive failures, pausing requests for %.0f seconds",
+                             self._consecutive_failures, self.cooldown)
+
+
+# Shared by every request to DeFiLlama so the retry budget and circuit are per run
+DEFILLAMA_RETRY_POLICY = RetryPolicy()
+
+DEFILLAMA_RESPONSE_CACHE = (
+    ResponseCache(HTTP_CACHE_DIR, HTTP_CACHE_TTL, HTTP_CACHE_MAX_BYTES)
+    if HTTP_CACHE_ENABLED else None
+)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+    
+    Args:
+        value: Raw header value
+        
+    Returns:
+        Delay in seconds, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def utc_now() -> datetime:
+    """Current time in UTC as a naive datetime, matching parsed DeFiLlama timestamps."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def endpoint_label(url: str) -> str:
+    """Name the API endpoint of a URL for metrics, e.g. 'pools' or 'chart'."""
+    for name, base in API_ENDPOINTS.items():
+        if url.startswith(base):
+            return name
+    return 'other'
+
+
+def request_with_retry(url: str, headers: dict = None, params: dict = None,
+                       max_attempts: Optional[int] = None,
+                       rate_limiter: Optional[RateLimiter] = None,
+                       retry_policy: Optional[RetryPolicy] = None,
+                       cache: Optional[ResponseCache] = None,
+                       label: str = None, stream: bool = False) -> Optional[requests.Response]:
+    """
+    Send a GET request through the shared session, retrying per the retry policy.
+    
+    429, 5xx and connection errors are retried; any other response is
+    returned straight away. With a cache, fresh entries are served without a
+    request and stale ones are revalidated with a conditional request.
+    Streamed 200 responses are not stored here; see `stream_json_array`.
+    
+    Args:
+        url: Request URL
+        headers: Extra request headers (optional)
+        params: Query parameters (optional)
+        max_attempts: Attempts for this request, defaults to the policy's
+        rate_limiter: Limiter to acquire before each attempt (optional)
+        retry_policy: Shared policy; a fresh default policy is used if omitted
+        cache: Response cache to serve from and store into (optional)
+        label: Name used in log messages (optional)
+        stream: Whether to defer downloading the response body
+        
+    Returns:
+        The last response received, or None if no response was obtained
+    """
+    policy = retry_policy or RetryPolicy()
+    attempts = max_attempts or policy.max_attempts
+    label = label or url
+    endpoint = endpoint_label(url)
+    response = None
+    
+    cached_response, entry, headers = check_cache(cache, url, params, headers, endpoint)
+    if cached_response is not None:
+        return cached_response
+    
+    for attempt in range(attempts):
+        if not policy.allow_request():
+            logger.warning("Circuit breaker open, not requesting %s", label)
+            break
+        
+        if rate_limiter:
+            rate_limiter.acquire()
+        
+        retry_after = None
+        try:
+            with METRICS.span('http_request', endpoint=endpoint) as span:
+                span['attempt'] = attempt + 1
+                response = get_http_session().get(url, headers=headers, params=params,
+                                                  timeout=HTTP_TIMEOUT, stream=stream)
+                span['status'] = response.status_code
+        except requests.RequestException as e:
+            record_request_error(e, policy, endpoint, label, attempt)
+            response = None
+        else:
+            if response.status_code not in policy.RETRY_STATUS_CODES:
+                return accept_response(response, policy, cache, entry, url, params, endpoint, stream)
+            retry_after = record_retryable_status(response, policy, endpoint, label, attempt)
+        
+        if not may_retry(policy, attempt, attempts, label, endpoint):
+            break
+        
+        if response is not None and stream:
+            response.close()
+        
+        delay = policy.backoff_delay(attempt, retry_after)
+        logger.info("Retrying %s in %.1f seconds", label, delay)
+        time.sleep(delay)
+    
+    return response
+
+
+def check_cache(cache: Optional[ResponseCache], url: str, params: Optional[dict],
+                 headers: Optional[dict], endpoint: str
+                 ) -> Tuple[Optional[requests.Response], Optional[Dict[str, Any]], Optional[dict]]:
+    """
+    Serve a request from the cache, or prepare its conditional request.
+    
+    This and the other request lifecycle helpers below are shared by
+    `request_with_retry` and `async_http.request_with_retry_async`.
+    
+    Args:
+        cache: Response cache, or None to skip the lookup
+        url: Request URL
+        params: Query parameters (optional)
+        headers: Extra request headers (optional)
+        endpoint: Endpoint label for metrics
+        
+    Returns:
+        Tuple of (fresh cached response or None, cached entry or None, request headers)
+    """
+    entry = cache.lookup(url, params) if cache else None
+    if entry is not None:
+        if cache.is_fresh(entry):
+            cached_response = cache.build_response(entry, url)
+            if cached_response is not None:
+                METRICS.increment('http_cache_hits_total', endpoint=endpoint)
+                return cached_response, entry, headers
+        headers = {**(headers or {}), **cache.conditional_headers(entry)}
+    return None, entry, headers
+
+
+def accept_response(response: requests.Response, policy: RetryPolicy,
+                     cache: Optional[ResponseCache], entry: Optional[Dict[str, Any]],
+                     url: str, params: Optional[dict], endpoint: str,
+                     stream: bool = False) -> requests.Response:
+    """
+    Record a response that will not be retried and resolve it against the cache.
+    
+    Args:
+        response: Response received
+        policy: Retry policy to record the success with
+        cache: Response cache to resolve a 304 from and store a 200 into (optional)
+        entry: Cached entry the request was made conditional on (optional)
+        url: Request URL
+        params: Query parameters (optional)
+        endpoint: Endpoint label for metrics
+        stream: Whether the body has not been downloaded yet
+        
+    Returns:
+        The cached response for a 304 revalidation, otherwise the response itself
+    """
+    METRICS.increment('http_responses_total', endpoint=endpoint, status=response.status_code)
+    policy.record_success()
+    if cache and response.status_code == 304 and entry is not None:
+        cached_response = cache.build_response(entry, url)
+        if cached_response is not None:
+            cache.refresh(entry, response)
+            METRICS.increment('http_cache_revalidated_total', endpoint=endpoint)
+            return cached_response
+    elif response.status_code == 200 and not stream:
+        # Streamed bodies are counted as they are read, see stream_json_array
+        METRICS.increment('http_downloaded_bytes_total', len(response.content), endpoint=endpoint)
+        if cache:
+            cache.store(url, params, response)
+    return response
+
+
+def record_request_error(error: Exception, policy: RetryPolicy, endpoint: str,
+                          label: str, attempt: int) -> None:
+    """
+    Log and count a request that got no response.
+    
+    Args:
+        error: Exception raised by the transport
+        policy: Retry policy to record the failure with
+        endpoint: Endpoint label for metrics
+        label: Name used in log messages
+        attempt: Zero-based attempt number
+    """
+    logger.warning("Request failed for %s (attempt %d): %s", label, attempt + 1, error)
+    METRICS.increment('http_errors_total', endpoint=endpoint)
+    policy.record_failure()
+
+
+def record_retryable_status(response: requests.Response, policy: RetryPolicy,
+                             endpoint: str, label: str, attempt: int) -> Optional[float]:
+    """
+    Log and count a 429/5xx response.
+    
+    Args:
+        response: Retryable response received
+        policy: Retry policy to record the outcome with
+        endpoint: Endpoint label for metrics
+        label: Name used in log messages
+        attempt: Zero-based attempt number
+        
+    Returns:
+        Delay requested by the server's Retry-After header, if any
+    """
+    METRICS.increment('http_responses_total', endpoint=endpoint, status=response.status_code)
+    # 429 means the API is up, so it counts as a success for the circuit breaker
+    if response.status_code == 429:
+        METRICS.increment('http_rate_limited_total', endpoint=endpoint)
+        policy.record_success()
+    else:
+        policy.record_failure()
+    logger.warning("Received %d for %s (attempt %d)", response.status_code, label, attempt + 1)
+    return parse_retry_after(response.headers.get('Retry-After'))
+
+
+def may_retry(policy: RetryPolicy, attempt: int, attempts: int, label: str, endpoint: str) -> bool:
+    """
+    Whether a failed attempt may be retried, taking the retry from the budget.
+    
+    Args:
+        policy: Retry policy holding the budget
+        attempt: Zero-based number of the failed attempt
+        attempts: Attempts allowed for the request
+        label: Name used in log messages
+        endpoint: Endpoint label for metrics
+        
+    Returns:
+        True if another attempt should be made
+    """
+    if attempt == attempts - 1:
+        logger.error("Giving up on %s after %d attempts", label, attempts)
+        return False
+    if not policy.consume_retry():
+        logger.error("Retry budget exhausted, giving up on %s", label)
+        return False
+    METRICS.increment('http_retries_total', endpoint=endpoint)
+    return True
+
+
+def iter_json_array_items(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Incrementally parse the items of an array stored under a top-level key.
+    
+    Only the item being decoded and one chunk are held in memory, so a large
+    payload such as {"status": ..., "data": [...]} can be filtered as it
+    arrives instead of being materialised in full.
+    
+    Args:
+        chunks: UTF-8 encoded body chunks
+        key: Top-level key holding the array
+        
+    Yields:
+        Decoded array items, in order
+        
+    Raises:
+        ValueError: If the payload is not an object with an array under key
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunk_iter = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+    
+    def refill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        for chunk in chunk_iter:
+            if chunk:
+                buf = buf[pos:] + utf8.decode(chunk)
+                pos = 0
+                return True
+        buf = buf[pos:] + utf8.decode(b'', final=True)
+        pos = 0
+        eof = True
+        return False
+    
+    def skip_whitespace() -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\n\r':
+                pos += 1
+            if pos < len(buf) or not refill():
+                return
+    
+    def expect(chars: str) -> str:
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buf) or buf[pos] not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {pos} while streaming JSON")
+        pos += 1
+        return buf[pos - 1]
+    
+    def decode_value() -> Any:
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not refill():
+                    raise
+                continue
+            # A number cut by a chunk boundary ("12" of "12.5") decodes early,
+            # so only accept a value once the next delimiter has arrived
+            if (end == len(buf) or buf[end] not in ' \t\n\r,:]}') and not eof and refill():
+                continue
+            pos = end
+            return value
+    
+    expect('{')
+    skip_whitespace()
+    if pos < len(buf) and buf[pos] == '}':
+        raise ValueError(f"Key {key!r} not found in streamed JSON")
+    
+    while True:
+        name = decode_value()
+        expect(':')
+        if name != key:
+            decode_value()
+            if expect(',}') == '}':
+                raise ValueError(f"Key {key!r} not found in streamed JSON")
+            continue
+        
+        expect('[')
+        skip_whitespace()
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        while True:
+            yield decode_value()
+            if expect(',]') == ']':
+                return
+
+
+def stream_json_array(url: str, key: str = 'data',
+                      rate_limiter: Optional[RateLimiter] = None,
+                      retry_policy: Optional[RetryPolicy] = None,
+                      cache: Optional[ResponseCache] = None,
+                      chunk_size: int = HTTP_STREAM_CHUNK_SIZE) -> Optional[Iterator[Any]]:
+    """
+    Request a JSON document and stream the items of one of its arrays.
+    
+    Args:
+        url: Request URL
+        key: Top-level key holding the array
+        rate_limiter: Limiter to acquire before each attempt (optional)
+        retry_policy: Retry policy shared across requests (optional)
+        cache: Response cache; a downloaded body is written through to it (optional)
+        chunk_size: Bytes to read at a time
+        
+    Returns:
+        Iterator over the array items, or None if the request failed
+    """
+    response = request_with_retry(url, rate_limiter=rate_limiter, retry_policy=retry_policy,
+                                  cache=cache, stream=True)
+    if response is None or response.status_code != 200:
+        error_code = response.status_code if response is not None else "No response"
+        logger.error("Error streaming %s: %s", url, error_code)
+        return None
+    
+    chunks = response.iter_content(chunk_size=chunk_size)
+    if not getattr(response, 'from_cache', False):
+        chunks = _count_downloaded_bytes(chunks, endpoint_label(url))
+        if cache:
+            chunks = cache.store_stream(url, None, response, chunks)
+    
+    return iter_json_array_items(chunks, key)
+
+
+def _count_downloaded_bytes(chunks: Iterable[bytes], endpoint: str) -> Iterator[bytes]:
+    """Pass body chunks through, counting them towards the downloaded bytes metric."""
+    for chunk in chunks:
+        METRICS.increment('http_downloaded_bytes_total', len(chunk), endpoint=endpoint)
+        yield chunk
+
 
 def fetch_pool_chart_data(pool_id: str, pool_name: str = None, 
-                         days: int = 360) -> Optional[pd.DataFrame]:
+                         days: int = 360, since: Optional[date] = None,
+                         rate_limiter: Optional[RateLimiter] = DEFILLAMA_RATE_LIMITER,
+                         retry_policy: Optional[RetryPolicy] = DEFILLAMA_RETRY_POLICY,
+                         cache: Optional[ResponseCache] = DEFILLAMA_RESPONSE_CACHE) -> Optional[pd.DataFrame]:
     """
     Fetch historical chart data for a specific pool from DeFiLlama API.
     
@@ -29,6 +660,10 @@ def fetch_pool_chart_data(pool_id: str, pool_name: str = None,
         pool_id: Pool ID from DeFiLlama
         pool_name: Pool name for logging (optional)
         days: Number of days of historical data to fetch
+        since: Only keep rows dated on or after this date (optional)
+        rate_limiter: Limiter to acquire before each request (optional)
+        retry_policy: Retry policy shared across requests (optional)
+        cache: Response cache for the chart endpoint (optional)
         
     Returns:
         DataFrame with historical APY and TVL data, or None if failed
@@ -36,49 +671,70 @@ def fetch_pool_chart_data(pool_id: str, pool_name: str = None,
     display_name = pool_name or pool_id
     
     try:
-        print(f"Fetching data for {display_name}...")
+        logger.debug("Fetching data for %s", display_name)
         url = f"{API_ENDPOINTS['defi_llama_chart']}{pool_id}"
-        response = requests.get(url)
-        
-        if response.status_code == 429:
-            print(f"Rate limited for {display_name}, waiting {RATE_LIMIT_RETRY_DELAY} seconds...")
-            time.sleep(RATE_LIMIT_RETRY_DELAY)
-            response = requests.get(url)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if isinstance(data, dict) and 'data' in data:
-                data = data['data']
-            
-            if isinstance(data, list) and len(data) > 0:
-                df = pd.DataFrame(data)
-                
-                if 'timestamp' in df.columns:
-                    df = _process_timestamp_column(df, display_name)
-                    if df is None:
-                        return None
-                    
-                    cutoff_date = datetime.now() - timedelta(days=days)
-                    df = df[df.index >= cutoff_date]
-                    
-                    print(f"Successfully fetched {len(df)} data points for {display_name}")
-                    return df
-                else:
-                    print(f"No timestamp found in data for {display_name}")
-                    return None
-            else:
-                print(f"Unexpected data format for {display_name}")
-                return None
-        else:
-            print(f"Error fetching chart data for {display_name}: {response.status_code}")
-            return None
-            
+        response = request_with_retry(url, rate_limiter=rate_limiter,
+                                      retry_policy=retry_policy, cache=cache,
+                                      label=display_name)
+        return parse_pool_chart_response(response, display_name, days, since)
     except Exception as e:
-        print(f"Error fetching chart data for {display_name}: {e}")
+        logger.warning("Error fetching chart data for %s: %s", display_name, e)
         return None
 
 
+def parse_pool_chart_response(response: Optional[requests.Response], display_name: str,
+                              days: int = 360, since: Optional[date] = None) -> Optional[pd.DataFrame]:
+    """
+    Turn a DeFiLlama chart response into a pool history DataFrame.
+    
+    Shared by the blocking and asyncio HTTP backends.
+    
+    Args:
+        response: Chart endpoint response, or None if none was obtained
+        display_name: Pool name for logging
+        days: Number of days of historical data to keep
+        since: Only keep rows dated on or after this date (optional)
+        
+    Returns:
+        DataFrame with historical APY and TVL data, or None if unusable
+    """
+    if response is None:
+        logger.warning("Error fetching chart data for %s: %s", display_name, "no response")
+        return None
+    
+    if response.status_code != 200:
+        logger.warning("Error fetching chart data for %s: %s", display_name, response.status_code)
+        return None
+    
+    data = response.json()
+    
+    if isinstance(data, dict) and 'data' in data:
+        data = data['data']
+    
+    if not isinstance(data, list) or len(data) == 0:
+        logger.warning("Unexpected data format for %s", display_name)
+        return None
+    
+    df = pd.DataFrame(data)
+    
+    if 'timestamp' not in df.columns:
+        logger.warning("No timestamp found in data for %s", display_name)
+        return None
+    
+    df = _process_timestamp_column(df, display_name)
+    if df is None:
+        return None
+    
+    cutoff_date = utc_now() - timedelta(days=days)
+    df = df[df.index >= cutoff_date]
+    
+    if since is not None:
+        df = df[df.index.date >= since]
+    
+    logger.debug("Fetched %d data points for %s", len(df), display_name)
+    return df
+
+
 def _process_timestamp_column(df: pd.DataFrame, pool_name: str) -> Optional[pd.DataFrame]:
     """
     Process timestamp column and set as index.
@@ -96,7 +752,7 @@ def _process_timestamp_column(df: pd.DataFrame, pool_name: str) -> Optional[pd.D
         try:
             df['date'] = pd.to_datetime(df['timestamp'])
         except (ValueError, TypeError):
-            print(f"Could not parse timestamp format for pool {pool_name}")
+            logger.warning("Could not parse timestamp format for pool %s", pool_name)
             return None
     
     df.set_index('date', inplace=True)
@@ -111,6 +767,9 @@ def load_data_from_db(db_filename: str = DEFAULT_DB_FILENAME) -> Tuple[Optional[
     """
     Load data from SQLite database.
     
+    The normalised tables are pivoted back into the wide layout produced by
+    the fetcher (apy_<id>/tvlUsd_<id> columns plus prime rate metrics).
+    
     Args:
         db_filename: SQLite database filename
         
@@ -118,64 +777,68 @@ def load_data_from_db(db_filename: str = DEFAULT_DB_FILENAME) -> Tuple[Optional[
         Tuple of (merged_df, metadata_df) or (None, None) if failed
     """
     try:
-        print(f"Loading data from {db_filename}...")
-        conn = sqlite3.connect(db_filename)
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        print(f"Tables in database: {[table[0] for table in tables]}")
+        logger.info("Loading data from %s", db_filename)
+        merged_df = database.load_pool_matrix(db_filename)
+        metadata_df = database.load_pools(db_filename)
         
-        try:
-            merged_df = pd.read_sql('SELECT * FROM pool_data', conn, index_col='index')
-        except:
-            try:
-                merged_df = pd.read_sql('SELECT * FROM pool_data', conn)
-                if len(merged_df.columns) > 0:
-                    first_col = merged_df.columns[0]
-                    if 'date' in first_col.lower() or 'time' in first_col.lower():
-                        merged_df.set_index(first_col, inplace=True)
-                    else:
-                        merged_df.set_index(first_col, inplace=True)
-            except Exception as e:
-                print(f"Error reading pool_data table: {e}")
-                cursor.execute("PRAGMA table_info(pool_data);")
-                columns = cursor.fetchall()
-                print("Pool_data table structure:")
-                for col in columns:
-                    print(f"  {col[1]} ({col[2]})")
-                return None, None
-        
-        if not isinstance(merged_df.index, pd.DatetimeIndex):
-            try:
-                merged_df.index = pd.to_datetime(merged_df.index)
-            except:
-                print("Warning: Could not convert index to datetime")
-        
-        try:
-            metadata_df = pd.read_sql('SELECT * FROM pool_metadata', conn)
-        except Exception as e:
-            print(f"Error reading pool_metadata table: {e}")
-            metadata_df = pd.DataFrame()
-        
-        conn.close()
-        
-        print(f"Successfully loaded data for {len(metadata_df)} pools")
+        logger.info("Loaded data for %d pools", len(metadata_df))
         return merged_df, metadata_df
         
     except Exception as e:
-        print(f"Error loading data from database: {e}")
+        logger.error("Error loading data from database: %s", e)
         return None, None
 
 
-def format_date_axis(ax: plt.Axes, interval: int = 2) -> None:
+def load_stored_pool_history(db_filename: str = DEFAULT_DB_FILENAME,
+                             days: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Load the per-pool APY/TVL history already stored in the database.
+    
+    Args:
+        db_filename: SQLite database filename
+        days: Only return rows within this many days of today (optional)
+        
+    Returns:
+        Dictionary mapping pool ID to a DataFrame with 'apy' and 'tvlUsd'
+        columns indexed by date. Empty if the database has no usable data.
+    """
+    if not os.path.exists(db_filename):
+        logger.info("No existing database at %s", db_filename)
+        return {}
+    
+    # Stored rows are whole days, so the partial cutoff day is left out
+    start = None
+    if days is not None:
+        start = (utc_now() - timedelta(days=days)).date() + timedelta(days=1)
+    try:
+        observations = database.load_pool_observations(db_filename, start=start)
+    except Exception as e:
+        logger.error("Error loading stored history from %s: %s", db_filename, e)
+        return {}
+    
+    history = {}
+    for pool_id, df in observations.groupby('pool_id', sort=False):
+        history[pool_id] = (df.set_index('date')[['apy', 'tvl_usd']]
+                            .rename(columns={'tvl_usd': 'tvlUsd'}))
+    
+    logger.info("Loaded stored history for %d pools", len(history))
+    return history
+
+
+def format_date_axis(ax: 'Axes', interval: int = 2) -> None:
     """
     Format x-axis dates consistently across plots.
     
+    matplotlib is imported here rather than at module level, so the fetcher
+    and the bot can import utils without loading it.
+    
     Args:
         ax: matplotlib axis object
         interval: interval for date ticks (in weeks)
     """
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
     ax.xaxis.set_major_locator(mdates.WeekdayLocator(interval=interval))
     plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
@@ -184,77 +847,99 @@ def purge_database(db_filename: str = DEFAULT_DB_FILENAME) -> None:
     """
     Completely purge the database before fresh data insertion.
     
+    The fetcher no longer calls this (a full rebuild replaces the stored rows
+    inside the save transaction instead). Free pages are not reclaimed here;
+    run `database.vacuum_database` afterwards to shrink the file.
+    
     Args:
         db_filename: SQLite database filename
     """
-    print(f"Purging existing database: {db_filename}")
+    logger.info("Purging existing database: %s", db_filename)
     try:
         conn = sqlite3.connect(db_filename)
-        cursor = conn.cursor()
-        
-        cursor.execute("DROP TABLE IF EXISTS pool_data")
-        cursor.execute("DROP TABLE IF EXISTS pool_metadata")
-        
-        cursor.execute("VACUUM")
-        
-        conn.commit()
+        with conn:
+            for table in ('pool_observations', 'prime_rate', 'pools', 'pool_data', 'pool_metadata'):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            # Make the next writer create the schema again
+            conn.execute("PRAGMA user_version = 0")
         conn.close()
-        print("Database purged successfully")
+        logger.info("Database purged successfully")
     except Exception as e:
-        print(f"Warning: Could not purge database: {e}")
+        logger.warning("Could not purge database: %s", e)
 
 
-def safe_api_request(url: str, max_retries: int = 3, is_coingecko: bool = False, api_key: str = None, params: dict = None) -> Optional[requests.Response]:
+def safe_api_request(url: str, max_retries: int = 3, is_coingecko: bool = False, api_key: str = None, params: dict = None,
+                     rate_limiter: Optional[RateLimiter] = None,
+                     retry_policy: Optional[RetryPolicy] = None,
+                     cache: Optional[ResponseCache] = None) -> Optional[requests.Response]:
     """
     Make API request with rate limiting and retry logic.
     
     Args:
         url: API endpoint URL
-        max_retries: Maximum number of retry attempts
+        max_retries: Maximum number of attempts
         is_coingecko: Whether this is a CoinGecko API call (requires special handling)
         api_key: CoinGecko Pro API key if available
         params: Query parameters for the request
+        rate_limiter: Limiter to acquire before each attempt (optional)
+        retry_policy: Retry policy shared across requests (optional)
+        cache: Response cache to serve from and store into (optional)
         
     Returns:
         Response object or None if failed
     """
-    for attempt in range(max_retries):
-        try:
-            if is_coingecko and attempt > 0:
-                extra_delay = 3 * attempt  # Progressive delay: 3s, 6s, 9s
-                print(f"CoinGecko free tier delay: waiting {extra_delay} seconds...")
-                time.sleep(extra_delay)
-            
-            headers = {}
-            if api_key:
-                headers['x-cg-pro-api-key'] = api_key  # CoinGecko expects lowercase header
-                print(f"Making Pro API request with headers: {headers}")
-            else:
-                print(f"Making free tier request (no API key)")
-            
-            response = requests.get(url, headers=headers, params=params)
-            
-            print(f"Response status: {response.status_code}")
-            if response.status_code != 200:
-                print(f"Response text: {response.text[:200]}...")
-            
-            if response.status_code == 429:  # Rate limited
-                wait_time = RATE_LIMIT_RETRY_DELAY * (2 ** attempt)  # Exponential backoff
-                print(f"Rate limited, waiting {wait_time} seconds... (attempt {attempt + 1})")
-                time.sleep(wait_time)
-                continue
-            
-            if is_coingecko:
-                time.sleep(COINGECKO_FREE_TIER_DELAY)
-            
-            return response
-            
-        except Exception as e:
-            print(f"Request failed (attempt {attempt + 1}): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(RATE_LIMIT_DELAY)
+    headers = api_request_headers(url, api_key)
+    response = request_with_retry(url, headers=headers, params=params,
+                                  max_attempts=max_retries, rate_limiter=rate_limiter,
+                                  retry_policy=retry_policy, cache=cache)
+    response = check_api_response(url, response)
+    
+    if response is not None and is_coingecko:
+        time.sleep(COINGECKO_FREE_TIER_DELAY)
+    
+    return response
+
+
+def api_request_headers(url: str, api_key: Optional[str] = None) -> Dict[str, str]:
+    """
+    Build the headers of an API request, logging it without its key.
+    
+    Args:
+        url: API endpoint URL
+        api_key: CoinGecko Pro API key if available
+        
+    Returns:
+        Request headers
+    """
+    headers = {}
+    if api_key:
+        headers['x-cg-pro-api-key'] = api_key  # CoinGecko expects lowercase header
+    # Never log the headers themselves, they carry the API key
+    logger.debug("Requesting %s (%s)", url, "Pro API key" if api_key else "free tier")
+    return headers
+
+
+def check_api_response(url: str, response: Optional[requests.Response]) -> Optional[requests.Response]:
+    """
+    Log an unsuccessful API response and drop it if the API is still rate limiting.
+    
+    Args:
+        url: API endpoint URL
+        response: Final response of the request, if any
+        
+    Returns:
+        The response, or None if there was none or it is a 429
+    """
+    if response is None:
+        return None
+    
+    if response.status_code != 200:
+        logger.warning("Request to %s returned %d: %s", url, response.status_code, response.text[:200])
+    
+    if response.status_code == 429:
+        return None
     
-    return None
+    return response
 
 
 def validate_dataframe(df: pd.DataFrame, required_columns: list = None) -> bool:
@@ -274,17 +959,39 @@ def validate_dataframe(df: pd.DataFrame, required_columns: list = None) -> bool:
     if required_columns:
         missing_cols = [col for col in required_columns if col not in df.columns]
         if missing_cols:
-            print(f"Missing required columns: {missing_cols}")
+            logger.warning("Missing required columns: %s", missing_cols)
             return False
     
     return True
 
 # Export commonly used functions
 __all__ = [
+    'create_http_session',
+    'get_http_session',
+    'RateLimiter',
+    'DEFILLAMA_RATE_LIMITER',
+    'RetryPolicy',
+    'DEFILLAMA_RETRY_POLICY',
+    'DEFILLAMA_RESPONSE_CACHE',
+    'parse_retry_after',
+    'utc_now',
+    'endpoint_label',
+    'request_with_retry',
+    'check_cache',
+    'accept_response',
+    'record_request_error',
+    'record_retryable_status',
+    'may_retry',
+    'iter_json_array_items',
+    'stream_json_array',
     'fetch_pool_chart_data', 
+    'parse_pool_chart_response',
     'load_data_from_db',
+    'load_stored_pool_history',
     'format_date_axis',
     'purge_database',
     'safe_api_request',
+    'api_request_headers',
+    'check_api_response',
     'validate_dataframe',
 ]
\ No newline at end of file